@@ -0,0 +1,75 @@
+"""
+/search/documents 파이프라인 부하 벤치마크 (동기 파이프라인 vs 비동기 파이프라인)
+
+vLLM 은 benchmarks.fake_vllm, Qdrant 는 in-memory 컬렉션으로 대체합니다.
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_async_pipeline --model <작은 SentenceTransformer 경로> --concurrency 16
+"""
+import os
+import io
+import asyncio
+import argparse
+import contextlib
+
+from benchmarks.load_utils import run_load, print_report, fake_vllm_server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, help="임베딩 모델 경로 (KURE_v1 또는 작은 대체 모델)")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--vllm-latency", type=float, default=0.3)
+    parser.add_argument("--port", type=int, default=8011)
+    return parser.parse_args()
+
+
+async def main(args):
+    # 모듈 import 시점에 모델/엔드포인트가 결정되므로 환경 변수를 먼저 설정
+    os.environ["EMBEDDING_MODEL_PATH"] = args.model
+    os.environ["RESPONSE_CACHE_MAX_MB"] = "0"  # 반복 질의가 캐시로 빠지지 않도록 비활성화
+    os.environ["SEARCH_SUMMARIES"] = "0"  # 답변 경로만 비교 (요약 단계는 bench_summaries)
+
+    import qdrant_utils
+    import vllm_utils
+    from embedding_utils import encode_and_clear
+    from qdrant_client import QdrantClient, AsyncQdrantClient
+    from search_pipeline import run_search_pipeline
+    from benchmarks.synthetic_corpus import (
+        generate_documents, generate_queries, build_points, create_collection, async_create_collection,
+    )
+
+    # ✅ in-memory Qdrant 대체 (동기/비동기 클라이언트에 동일 데이터 적재)
+    docs = generate_documents(args.docs)
+    vectors = encode_and_clear([doc["text"] for doc in docs], batch_size=128)
+    points = build_points(docs, vectors)
+    qdrant_utils.qdrant_client = QdrantClient(location=":memory:")
+    qdrant_utils.async_qdrant_client = AsyncQdrantClient(location=":memory:")
+    create_collection(qdrant_utils.qdrant_client, qdrant_utils.collection_name, vectors.shape[1], points)
+    await async_create_collection(qdrant_utils.async_qdrant_client, qdrant_utils.collection_name, vectors.shape[1], points)
+
+    queries = generate_queries(args.requests)
+
+    # 기존 방식: async 핸들러 안에서 동기 호출 (이벤트 루프 차단)
+    async def blocking_handler(question):
+        keywords = vllm_utils.clean_llm_keywords(vllm_utils.call_vllm_generate_search_condition(question))
+        hits = qdrant_utils.keyword_then_semantic_rerank(question, keywords)
+        vllm_utils.call_vllm_answer(question, hits)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        before = await run_load(blocking_handler, queries, args.concurrency)
+        after = await run_load(run_search_pipeline, queries, args.concurrency)
+    await vllm_utils.close_vllm_client()
+
+    print(f"\n📊 concurrency={args.concurrency}, vLLM latency={args.vllm_latency}s, docs={args.docs}")
+    print_report("before (blocking)", before)
+    print_report("after (asyncio)", after)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with fake_vllm_server(args.port, {"FAKE_VLLM_LATENCY": str(args.vllm_latency)}) as url:
+        os.environ["VLLM_API_URL"] = url
+        asyncio.run(main(args))
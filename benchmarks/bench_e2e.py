@@ -0,0 +1,234 @@
+"""
+/search/documents 종단간 부하 테스트 (회귀 확인용)
+
+- vLLM: benchmarks.fake_vllm (지연 / 토큰 속도 설정)
+- Qdrant: in-memory 컬렉션 (합성 한국어 문서)
+- 임베딩: --model 로 지정한 작은 SentenceTransformer
+- main.app 을 같은 프로세스의 uvicorn 으로 띄우고 HTTP 로 호출, 동시 사용자 수를 늘려 가며 측정
+- 단계별 시간은 응답의 Server-Timing 헤더에서 수집 (p50/p95/p99)
+- 응답 / 임베딩 캐시는 기본 비활성화 (--with-cache), 요약 캐시는 실행마다 임시 파일로 새로 시작
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_e2e --model <작은 SentenceTransformer 경로> --concurrency 1 4 16 32
+    python -m benchmarks.bench_e2e --model <경로> --workload workload.jsonl --output result.json --baseline prev.json
+    python -m benchmarks.bench_e2e --model <경로> --endpoint stream   # 첫 문서 / 첫 토큰 도착 시간
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+from typing import Dict, List
+
+from benchmarks.load_utils import fake_vllm_server, percentile, print_report, run_load
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, help="임베딩 모델 경로 (KURE_v1 또는 작은 대체 모델)")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200, help="동시성 단계마다 보낼 요청 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--endpoint", choices=["documents", "stream"], default="documents")
+    parser.add_argument("--workload", help="질의 JSONL ({\"question\": ...}), 없으면 생성")
+    parser.add_argument("--save-workload", help="생성한 질의를 JSONL 로 저장 (재현용)")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="반복 질의 비율 (캐시 효과 확인)")
+    parser.add_argument("--with-cache", action="store_true", help="응답 캐시 활성화 (기본은 비활성화)")
+    parser.add_argument("--vllm-latency", type=float, default=0.3)
+    parser.add_argument("--vllm-tokens-per-sec", type=float, default=200)
+    parser.add_argument("--vllm-port", type=int, default=8021)
+    parser.add_argument("--app-port", type=int, default=8020)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="이전 결과 JSON (p95 / rps 회귀 확인)")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="회귀로 판단할 변화율")
+    return parser.parse_args()
+
+
+# ─────────────────────────────
+# ✅ 질의 워크로드 (JSONL 로 저장 / 재생)
+# ─────────────────────────────
+def build_workload(args) -> List[str]:
+    if args.workload:
+        with open(args.workload, encoding="utf-8") as f:
+            questions = [json.loads(line)["question"] for line in f if line.strip()]
+    else:
+        import random
+        from benchmarks.synthetic_corpus import generate_queries
+
+        questions = generate_queries(args.requests)
+        rng = random.Random(11)
+        for i in range(1, len(questions)):
+            if rng.random() < args.repeat_ratio:
+                questions[i] = questions[rng.randrange(i)]
+    if args.save_workload:
+        with open(args.save_workload, "w", encoding="utf-8") as f:
+            for question in questions:
+                f.write(json.dumps({"question": question}, ensure_ascii=False) + "\n")
+    return questions
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'embedding;dur=12.3, qdrant_query;dur=4.5' → {stage: 초}"""
+    timings = {}
+    for part in filter(None, (p.strip() for p in header.split(","))):
+        name, _, rest = part.partition(";")
+        if rest.startswith("dur="):
+            timings[name] = float(rest[4:]) / 1000
+    return timings
+
+
+def memory_snapshot() -> Dict[str, float]:
+    snapshot = {"peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    try:
+        with open("/proc/self/statm") as f:
+            snapshot["rss_mb"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        pass
+    try:
+        import torch
+        if torch.cuda.is_available():
+            snapshot["cuda_peak_mb"] = torch.cuda.max_memory_allocated() / 1024 / 1024
+    except ImportError:
+        pass
+    return snapshot
+
+
+# ─────────────────────────────
+# ✅ 요청 핸들러 (상태 코드 / 단계별 시간 / 스트리밍 도착 시간 기록)
+# ─────────────────────────────
+class Recorder:
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        self.status: Dict[int, int] = {}
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages.setdefault(name, []).append(seconds)
+
+    def stage_report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+            for name, values in sorted(self.stages.items())
+        }
+
+
+def make_handler(http, base_url: str, endpoint: str, recorder: Recorder):
+    async def documents(question: str):
+        response = await http.post(f"{base_url}/search/documents", json={"question": question})
+        recorder.status[response.status_code] = recorder.status.get(response.status_code, 0) + 1
+        for name, seconds in parse_server_timing(response.headers.get("server-timing", "")).items():
+            recorder.add_stage(name, seconds)
+
+    async def stream(question: str):
+        start = time.perf_counter()
+        async with http.stream("POST", f"{base_url}/search/documents/stream", json={"question": question}) as response:
+            recorder.status[response.status_code] = recorder.status.get(response.status_code, 0) + 1
+            seen = set()
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                    if event in ("documents", "token") and event not in seen:
+                        seen.add(event)
+                        recorder.add_stage(f"first_{event}", time.perf_counter() - start)
+        recorder.add_stage("stream_total", time.perf_counter() - start)
+
+    return documents if endpoint == "documents" else stream
+
+
+def compare_with_baseline(results: List[Dict], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {level["concurrency"]: level for level in json.load(f)["levels"]}
+    regressions = []
+    for level in results:
+        before = baseline.get(level["concurrency"])
+        if before is None:
+            continue
+        if level["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"c={level['concurrency']} p95 {before['p95_ms']:.1f} → {level['p95_ms']:.1f}ms")
+        if level["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"c={level['concurrency']} rps {before['rps']:.2f} → {level['rps']:.2f}")
+    return regressions
+
+
+async def main(args, questions: List[str]) -> int:
+    import httpx
+    import uvicorn
+    from qdrant_client import QdrantClient, AsyncQdrantClient
+
+    # 모듈 import 시점에 모델 / 엔드포인트 / 캐시 설정이 결정되므로 import 는 환경 변수 설정 후
+    import main as app_main
+    import qdrant_utils
+    from embedding_utils import encode_and_clear
+    from benchmarks.synthetic_corpus import generate_documents, build_points, create_collection, async_create_collection
+
+    # ✅ in-memory Qdrant 대체 (동기/비동기 클라이언트에 동일 데이터 적재)
+    start = time.perf_counter()
+    docs = generate_documents(args.docs)
+    vectors = encode_and_clear([doc["text"] for doc in docs], batch_size=128)
+    points = build_points(docs, vectors)
+    qdrant_utils.qdrant_client = QdrantClient(location=":memory:")
+    qdrant_utils.async_qdrant_client = AsyncQdrantClient(location=":memory:")
+    create_collection(qdrant_utils.qdrant_client, qdrant_utils.collection_name, vectors.shape[1], points)
+    await async_create_collection(qdrant_utils.async_qdrant_client, qdrant_utils.collection_name, vectors.shape[1], points)
+    print(f"📦 합성 문서 {args.docs}건 적재: {time.perf_counter() - start:.1f}s")
+
+    # ✅ 실제 앱을 같은 이벤트 루프의 uvicorn 으로 실행 (startup/shutdown 이벤트 포함)
+    server = uvicorn.Server(uvicorn.Config(app_main.app, host="127.0.0.1", port=args.app_port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    levels = []
+    async with httpx.AsyncClient(timeout=120, limits=limits) as http:
+        await make_handler(http, base_url, args.endpoint, Recorder())(questions[0])  # 워밍업
+        for concurrency in args.concurrency:
+            recorder = Recorder()
+            stats = await run_load(make_handler(http, base_url, args.endpoint, recorder), questions, concurrency)
+            levels.append({
+                "concurrency": concurrency, **stats,
+                "status": recorder.status, "stages": recorder.stage_report(), "memory": memory_snapshot(),
+            })
+
+    server.should_exit = True
+    await server_task
+
+    print(f"\n📊 endpoint={args.endpoint}, docs={args.docs}, requests/level={len(questions)}, "
+          f"vLLM latency={args.vllm_latency}s, {args.vllm_tokens_per_sec} tok/s, cache={'on' if args.with_cache else 'off'}")
+    for level in levels:
+        print_report(f"concurrency={level['concurrency']}", level)
+        print(f"    status={level['status']} memory={ {k: round(v, 1) for k, v in level['memory'].items()} }")
+        for name, stage in level["stages"].items():
+            print(f"    {name:28s} p50={stage['p50_ms']:8.1f}ms p95={stage['p95_ms']:8.1f}ms p99={stage['p99_ms']:8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels}, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        regressions = compare_with_baseline(levels, args.baseline, args.tolerance)
+        print("\n❌ 회귀: " + "; ".join(regressions) if regressions else f"\n✅ 기준 대비 회귀 없음 (±{args.tolerance:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    questions = build_workload(args)
+    env = {"FAKE_VLLM_LATENCY": str(args.vllm_latency), "FAKE_VLLM_TOKENS_PER_SEC": str(args.vllm_tokens_per_sec)}
+    with tempfile.TemporaryDirectory() as tmp, fake_vllm_server(args.vllm_port, env) as url:
+        os.environ["VLLM_API_URL"] = url
+        os.environ["EMBEDDING_MODEL_PATH"] = args.model
+        os.environ["SUMMARY_CACHE_PATH"] = os.path.join(tmp, "summary_cache.sqlite3")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        if not args.with_cache:
+            os.environ["RESPONSE_CACHE_MAX_MB"] = "0"
+            os.environ["EMBEDDING_CACHE_SIZE"] = "0"
+        sys.exit(asyncio.run(main(args, questions)))
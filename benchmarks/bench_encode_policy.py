@@ -0,0 +1,70 @@
+"""
+질의 임베딩 encode 지연 마이크로벤치마크 (메모리 정책 × 정밀도/백엔드)
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_encode_policy --model /home/hmo/Embedding_Models/KURE_v1 \\
+        --variants torch:fp32 torch:fp16 onnx:model_qint8_avx512_vnni.onnx
+"""
+import time
+import argparse
+
+from benchmarks.load_utils import percentile
+from benchmarks.synthetic_corpus import generate_queries
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--variants", nargs="+", default=["torch:fp32"],
+        help="backend:precision (torch 백엔드) 또는 backend:onnx파일명 (onnx 백엔드)",
+    )
+    parser.add_argument("--policies", nargs="+", default=["always", "watermark", "idle", "warm"])
+    parser.add_argument("--idle-seconds", type=float, default=5)
+    return parser.parse_args()
+
+
+def load_variant(model_path: str, variant: str):
+    from embedding_utils import load_embedding_model
+
+    backend, option = variant.split(":", 1)
+    if backend == "torch":
+        return load_embedding_model(model_path, backend="torch", precision=option)
+    return load_embedding_model(model_path, backend=backend, onnx_file=f"onnx/{option}")
+
+
+def measure(model, policy, queries):
+    model.encode(queries[:8])  # warm-up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        model.encode([query])
+        policy.after_encode()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    args = parse_args()
+    from embedding_utils import CudaMemoryPolicy
+
+    queries = generate_queries(args.queries)
+    print(f"{'variant':<36} {'policy':<10} {'p50':>9} {'p99':>9} {'mean':>9} releases")
+    for variant in args.variants:
+        model = load_variant(args.model, variant)
+        for mode in args.policies:
+            if variant.startswith(("onnx", "openvino")) and mode != "warm":
+                continue  # CPU 백엔드는 GPU 캐시 정책 영향 없음
+            policy = CudaMemoryPolicy(mode=mode, idle_seconds=args.idle_seconds)
+            latencies = measure(model, policy, queries)
+            print(
+                f"{variant:<36} {mode:<10} "
+                f"{percentile(latencies, 50) * 1000:8.2f}ms {percentile(latencies, 99) * 1000:8.2f}ms "
+                f"{sum(latencies) / len(latencies) * 1000:8.2f}ms {policy.releases}"
+            )
+        del model
+
+
+if __name__ == "__main__":
+    main()
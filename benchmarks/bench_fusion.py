@@ -0,0 +1,200 @@
+"""
+검색 순위 방식 비교: 키워드 보너스 (기존) vs 벡터 + BM25 희소 검색 결합 (RRF / 가중 정규화)
+
+- 정답이 있는 질의 집합으로 recall@k / MRR / nDCG@k, 질의별 검색 지연 p50/p95 측정
+- 기본: 합성 문서 (문서당 여러 쪽) 를 in-memory Qdrant 에 적재, 정답 = 질문의 연도/부서/설비/주제가 모두 같은 문서
+- --labels: 실제 컬렉션용 정답 JSONL ({"question": ..., "relevant": [doc_id, ...], "keywords": [...] (선택)})
+  (--collection 은 collection_bootstrap --migrate-sparse 로 bm25 벡터를 추가한 컬렉션)
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_fusion --model <작은 SentenceTransformer 경로> --docs 3000 --queries 200
+    python -m benchmarks.bench_fusion --model <KURE_v1 경로> --collection docs_test_all_v2 --labels labels.jsonl
+"""
+import os
+import sys
+import json
+import time
+import math
+import random
+import asyncio
+import argparse
+from typing import Dict, List
+
+from benchmarks.load_utils import percentile
+
+METHODS = ["keyword_bonus", "rrf", "weighted"]
+FILLERS = ["세부 점검 항목", "조치 내역", "담당자 의견", "측정 데이터", "첨부 사진 설명", "후속 계획"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, help="임베딩 모델 경로 (KURE_v1 또는 작은 대체 모델)")
+    parser.add_argument("--docs", type=int, default=3000)
+    parser.add_argument("--max-pages", type=int, default=3, help="합성 문서당 최대 쪽 수 (nPage 중복 제거 확인)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS)
+    parser.add_argument("--labels", help="정답 JSONL (없으면 합성 문서에서 생성)")
+    parser.add_argument("--save-labels", help="생성한 정답 집합을 JSONL 로 저장")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", help="실제 Qdrant 컬렉션 (지정하지 않으면 in-memory 합성 코퍼스)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+# ─────────────────────────────
+# ✅ 합성 코퍼스 (문서당 1~max_pages 쪽) / 정답 집합
+# ─────────────────────────────
+def build_pages(docs: List[Dict], max_pages: int, seed: int = 3) -> List[Dict]:
+    rng = random.Random(seed)
+    pages = []
+    for doc in docs:
+        for page_no in range(1, rng.randint(1, max_pages) + 1):
+            text = doc["text"] if page_no == 1 else f"{' '.join(doc['keywords'])} {rng.choice(FILLERS)} ({page_no}쪽)"
+            pages.append({**doc, "nPage": page_no, "text": text})
+    return pages
+
+
+def generate_labels(docs: List[Dict], n_queries: int, seed: int = 5) -> List[Dict]:
+    """문서 하나를 골라 질문 생성, 연도 + 키워드(부서/설비/주제) 가 같은 문서 전부가 정답"""
+    rng = random.Random(seed)
+    by_attributes: Dict[tuple, List[str]] = {}
+    for doc in docs:
+        by_attributes.setdefault((doc["year"], tuple(doc["keywords"])), []).append(doc["doc_id"])
+    labels = []
+    for doc in rng.sample(docs, min(n_queries, len(docs))):
+        dept, equip, *topic = doc["keywords"]
+        template = rng.choice([
+            "{year}년 {dept} {equip} {topic} 찾아줘",
+            "{year}년에 {dept}에서 작성한 {equip} {topic} 문서",
+            "{equip} {topic} 관련 {year}년 {dept} 자료 있어?",
+        ])
+        labels.append({
+            "question": template.format(year=doc["year"], dept=dept, equip=equip, topic=" ".join(topic)),
+            "relevant": by_attributes[(doc["year"], tuple(doc["keywords"]))],
+        })
+    return labels
+
+
+def load_labels(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ─────────────────────────────
+# ✅ 순위 품질 지표 (문서 ID 기준, 같은 문서의 다른 쪽은 두 번째부터 오답 취급)
+# ─────────────────────────────
+def ranking_metrics(doc_ids: List[str], relevant: List[str], k: int) -> Dict[str, float]:
+    relevant = set(relevant)
+    seen, gains = set(), []
+    for doc_id in doc_ids[:k]:
+        gains.append(1.0 if doc_id in relevant and doc_id not in seen else 0.0)
+        seen.add(doc_id)
+    dcg = sum(gain / math.log2(rank + 2) for rank, gain in enumerate(gains))
+    ideal = sum(1 / math.log2(rank + 2) for rank in range(min(len(relevant), k)))
+    first = next((rank for rank, gain in enumerate(gains) if gain), None)
+    return {
+        "recall": sum(gains) / max(min(len(relevant), k), 1),
+        "mrr": 1.0 / (first + 1) if first is not None else 0.0,
+        "ndcg": dcg / ideal if ideal else 0.0,
+        "duplicate_pages": len(doc_ids[:k]) - len(set(doc_ids[:k])),
+    }
+
+
+async def load_synthetic_collection(qdrant_utils, docs: List[Dict], max_pages: int):
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.models import PointStruct
+
+    from collection_bootstrap import create_collection_kwargs
+    from embedding_utils import encode_and_clear
+    from sparse_utils import SPARSE_VECTOR_NAME, document_sparse_text, document_sparse_vector
+
+    pages = build_pages(docs, max_pages)
+    vectors = encode_and_clear([page["text"] for page in pages], batch_size=128)
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(qdrant_utils.collection_name, **create_collection_kwargs(vectors.shape[1]))
+    points = [
+        PointStruct(
+            id=i,
+            vector={"": vector.tolist(), SPARSE_VECTOR_NAME: document_sparse_vector(document_sparse_text(page))},
+            payload=page,
+        )
+        for i, (page, vector) in enumerate(zip(pages, vectors))
+    ]
+    for start in range(0, len(points), 1024):
+        await client.upsert(qdrant_utils.collection_name, points=points[start:start + 1024])
+    qdrant_utils.async_qdrant_client = client
+    return len(pages)
+
+
+async def run_method(qdrant_utils, extractor, method: str, labels: List[Dict], top_k: int) -> Dict:
+    latencies, metrics = [], []
+    for label in labels:
+        keywords = label.get("keywords") or extractor.extract(label["question"])[0]
+        start = time.perf_counter()
+        if method == "keyword_bonus":
+            hits = await qdrant_utils.async_keyword_then_semantic_rerank(label["question"], keywords, top_k)
+        else:
+            hits = await qdrant_utils.async_fusion_search(label["question"], keywords, top_k, method=method)
+        latencies.append(time.perf_counter() - start)
+        metrics.append(ranking_metrics([hit["문서ID"] for hit in hits], label["relevant"], top_k))
+    return {
+        "method": method,
+        **{name: sum(m[name] for m in metrics) / max(len(metrics), 1) for name in metrics[0]},
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+async def main(args) -> int:
+    # 모듈 import 시점에 모델 / Qdrant 접속 설정이 결정되므로 import 는 환경 변수 설정 후
+    import qdrant_utils
+    from embedding_utils import encode_query
+    from keyword_extractor import LocalKeywordExtractor
+    from benchmarks.synthetic_corpus import generate_documents
+
+    extractor = LocalKeywordExtractor()
+    if args.collection:
+        if not args.labels:
+            print("❌ --collection 에는 --labels 가 필요합니다")
+            return 1
+        labels = load_labels(args.labels)
+        extractor.vocabulary.add(await qdrant_utils.async_scroll_keyword_terms())
+        print(f"📦 컬렉션 {args.collection} 사용")
+    else:
+        docs = generate_documents(args.docs)
+        start = time.perf_counter()
+        n_pages = await load_synthetic_collection(qdrant_utils, docs, args.max_pages)
+        print(f"📦 합성 문서 {args.docs}건 ({n_pages}쪽) 적재: {time.perf_counter() - start:.1f}s")
+        labels = load_labels(args.labels) if args.labels else generate_labels(docs, args.queries)
+        extractor.vocabulary.add({kw for doc in docs for kw in doc["keywords"]})
+    if args.save_labels:
+        with open(args.save_labels, "w", encoding="utf-8") as f:
+            for label in labels:
+                f.write(json.dumps(label, ensure_ascii=False) + "\n")
+
+    encode_query(labels[0]["question"])  # 모델 로드 / 워밍업
+    rows = [await run_method(qdrant_utils, extractor, method, labels, args.top_k) for method in args.methods]
+
+    print(f"\n📊 queries={len(labels)}, top_k={args.top_k}, rrf_k={qdrant_utils.HYBRID_RRF_K}, "
+          f"weights=dense {qdrant_utils.HYBRID_DENSE_WEIGHT} / sparse {qdrant_utils.HYBRID_SPARSE_WEIGHT}")
+    for row in rows:
+        print(f"  {row['method']:14s} recall@{args.top_k}={row['recall']:.3f}  MRR={row['mrr']:.3f}  "
+              f"nDCG@{args.top_k}={row['ndcg']:.3f}  중복 쪽={row['duplicate_pages']:.2f}  "
+              f"p50={row['p50_ms']:7.2f}ms  p95={row['p95_ms']:7.2f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.environ["EMBEDDING_MODEL_PATH"] = args.model
+    os.environ["EMBEDDING_CACHE_SIZE"] = "0"  # 방식 간 같은 질문 임베딩 캐시 적중 방지
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if args.collection:
+        os.environ.update(QDRANT_HOST=args.host, QDRANT_PORT=str(args.port), QDRANT_COLLECTION=args.collection)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,143 @@
+"""
+payload 인덱스 / payload projection 벤치마크 (합성 컬렉션, 기본 100만 포인트)
+
+in-memory(로컬 모드) Qdrant 는 payload 인덱스를 사용하지 않으므로 실제 Qdrant 서버가 필요합니다.
+    docker run -p 6333:6333 qdrant/qdrant
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_payload_indexes --points 1000000
+    python -m benchmarks.bench_payload_indexes --skip-load   # 이미 적재된 컬렉션 재사용 (인덱스는 삭제 후 재측정)
+"""
+import re
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Batch, FieldCondition, Filter, MatchAny, MatchValue, Range
+
+from benchmarks.load_utils import percentile
+from benchmarks.synthetic_corpus import generate_documents, generate_queries
+from collection_bootstrap import CANDIDATE_PAYLOAD_FIELDS, PAYLOAD_INDEXES, date_ordinal, ensure_payload_indexes
+
+QUERY_PATTERN = re.compile(r"(\d{4})년 (\d{1,2})월 (\S+) (.+)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--collection", default="bench_docs_1m")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=64, help="벡터 차원 (필터/payload 비용 비교가 목적이라 작게)")
+    parser.add_argument("--chunk", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50, help="top_k * 10 에 해당")
+    parser.add_argument("--skip-load", action="store_true")
+    return parser.parse_args()
+
+
+def random_vectors(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_collection(client: QdrantClient, args):
+    from qdrant_client.models import Distance, VectorParams
+
+    if client.collection_exists(args.collection):
+        client.delete_collection(args.collection)
+    client.create_collection(args.collection, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+
+    rng = np.random.default_rng(0)
+    start_time = time.perf_counter()
+    for start in range(0, args.points, args.chunk):
+        n = min(args.chunk, args.points - start)
+        docs = generate_documents(n, start=start)
+        client.upsert(
+            args.collection,
+            points=Batch(ids=list(range(start, start + n)), vectors=random_vectors(rng, n, args.dim).tolist(), payloads=docs),
+            wait=start + n >= args.points,  # 마지막 배치만 대기 (순서대로 반영되므로 전체 적재 완료)
+        )
+    print(f"📦 {args.points:,} 포인트 적재: {time.perf_counter() - start_time:.1f}s")
+
+
+# ✅ qdrant_utils.build_combined_filter 와 같은 모양 (연/월 must + 텍스트 should)
+def build_filter(query: str, use_date_ordinal: bool) -> Optional[Filter]:
+    match = QUERY_PATTERN.match(query)
+    if not match:
+        return None
+    year, month = int(match.group(1)), int(match.group(2))
+    text_keywords = [match.group(3), *match.group(4).split()]
+    if use_date_ordinal:
+        low = date_ordinal(year, month)
+        must = [FieldCondition(key="date_ordinal", range=Range(gte=low, lte=low + 99))]
+    else:
+        must = [FieldCondition(key="year", match=MatchValue(value=year)),
+                FieldCondition(key="month", match=MatchValue(value=month))]
+    should = []
+    for kw in text_keywords:
+        should.extend([
+            FieldCondition(key="sFileName", match=MatchValue(value=kw)),
+            FieldCondition(key="keywords", match=MatchAny(any=[kw])),
+            FieldCondition(key="keywords", match={"text": kw}),
+        ])
+    return Filter(must=must + [Filter(should=should)])
+
+
+def measure(client: QdrantClient, args, queries: List[str], vectors: np.ndarray, with_payload, use_date_ordinal=False) -> Dict:
+    latencies, sizes = [], []
+    for query, vector in zip(queries, vectors):
+        start = time.perf_counter()
+        result = client.query_points(
+            args.collection,
+            query=vector.tolist(),
+            query_filter=build_filter(query, use_date_ordinal),
+            limit=args.limit,
+            with_payload=with_payload,
+        )
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(json.dumps([p.payload for p in result.points], ensure_ascii=False).encode("utf-8")))
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "payload_kb": sum(sizes) / len(sizes) / 1024,
+    }
+
+
+def main():
+    args = parse_args()
+    client = QdrantClient(host=args.host, port=args.port, timeout=300)
+    if not args.skip_load:
+        load_collection(client, args)
+    else:
+        existing = client.get_collection(args.collection).payload_schema or {}
+        for field_name in PAYLOAD_INDEXES:
+            if field_name in existing:
+                client.delete_payload_index(args.collection, field_name, wait=True)
+
+    queries = generate_queries(args.queries)
+    vectors = random_vectors(np.random.default_rng(1), len(queries), args.dim)
+
+    results = {
+        "no index / full payload": measure(client, args, queries, vectors, True),
+        "no index / projected": measure(client, args, queries, vectors, CANDIDATE_PAYLOAD_FIELDS),
+    }
+
+    start = time.perf_counter()
+    created = ensure_payload_indexes(client, args.collection, wait=True)
+    print(f"🗂️ 인덱스 생성 {created}: {time.perf_counter() - start:.1f}s")
+
+    results["index / full payload"] = measure(client, args, queries, vectors, True)
+    results["index / projected"] = measure(client, args, queries, vectors, CANDIDATE_PAYLOAD_FIELDS)
+    results["index / projected + date_ordinal"] = measure(client, args, queries, vectors, CANDIDATE_PAYLOAD_FIELDS, True)
+
+    print(f"\n📊 points={args.points:,}, queries={len(queries)}, limit={args.limit}")
+    for title, stats in results.items():
+        print(f"  {title:34s} p50={stats['p50_ms']:7.1f}ms  p95={stats['p95_ms']:7.1f}ms  payload={stats['payload_kb']:6.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
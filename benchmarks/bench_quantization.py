@@ -0,0 +1,160 @@
+"""
+양자화 / 디스크 저장 / 검색 파라미터별 recall·지연 비교 (정확 검색 대비)
+
+합성 군집 벡터 코퍼스를 설정별 컬렉션에 같은 데이터로 적재한 뒤,
+검색 모드(semantic: 필터 없음 top_k, hybrid: 연도 필터 top_k*10)마다
+hnsw_ef × oversampling 조합의 recall@k 와 p50/p95 지연을 측정합니다.
+in-memory(로컬 모드) Qdrant 는 HNSW/양자화를 사용하지 않으므로 실제 Qdrant 서버가 필요합니다.
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_quantization --points 200000 --dim 1024
+    python -m benchmarks.bench_quantization --configs baseline scalar scalar_on_disk --skip-load
+"""
+import time
+import argparse
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Batch, CollectionStatus, FieldCondition, Filter, MatchValue
+
+from benchmarks.load_utils import percentile
+from collection_bootstrap import create_collection_kwargs, search_params
+
+CONFIGS = {
+    "baseline": dict(quantization="none", vectors_on_disk=False, hnsw_on_disk=False),
+    "scalar": dict(quantization="scalar", vectors_on_disk=False, hnsw_on_disk=False),
+    "scalar_on_disk": dict(quantization="scalar", vectors_on_disk=True, hnsw_on_disk=True),
+    "product": dict(quantization="product", vectors_on_disk=True, hnsw_on_disk=False),
+    "binary": dict(quantization="binary", vectors_on_disk=True, hnsw_on_disk=False),
+}
+YEARS = [2022, 2023, 2024, 2025]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--prefix", default="bench_quant")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=1024, help="KURE_v1 과 같은 1024 차원")
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--chunk", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--skip-load", action="store_true")
+    return parser.parse_args()
+
+
+# ✅ 합성 코퍼스 (군집 중심 + 잡음, 문장 임베딩처럼 가까운 이웃이 많은 분포)
+def cluster_centers(dim: int, n_clusters: int) -> np.ndarray:
+    return np.random.default_rng(0).standard_normal((n_clusters, dim)).astype(np.float32)
+
+
+def clustered_vectors(centers: np.ndarray, n: int, seed: int, noise: float = 0.6) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = centers[rng.integers(0, len(centers), n)] + noise * rng.standard_normal((n, centers.shape[1])).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_collection(client: QdrantClient, name: str, config: Dict, centers: np.ndarray, args):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(name, **create_collection_kwargs(args.dim, **config))
+    for start in range(0, args.points, args.chunk):
+        n = min(args.chunk, args.points - start)
+        vectors = clustered_vectors(centers, n, seed=start + 1)
+        years = np.random.default_rng(start).choice(YEARS, n)
+        client.upsert(
+            name,
+            points=Batch(ids=list(range(start, start + n)), vectors=vectors.tolist(),
+                         payloads=[{"year": int(year)} for year in years]),
+            wait=start + n >= args.points,
+        )
+    # HNSW / 양자화 구성이 끝날 때까지 대기
+    while client.get_collection(name).status != CollectionStatus.GREEN:
+        time.sleep(1)
+
+
+def mode_request(mode: str, year: int, top_k: int):
+    """(필터, limit) — qdrant_utils 의 검색 모드와 같은 모양"""
+    if mode == "hybrid":
+        return Filter(must=[FieldCondition(key="year", match=MatchValue(value=year))]), top_k * 10
+    return None, top_k
+
+
+def run_queries(client, name, queries, years, mode, top_k, params) -> Dict:
+    latencies, results = [], []
+    for vector, year in zip(queries, years):
+        query_filter, limit = mode_request(mode, year, top_k)
+        start = time.perf_counter()
+        points = client.query_points(name, query=vector.tolist(), query_filter=query_filter, limit=limit,
+                                     search_params=params, with_payload=False).points
+        latencies.append(time.perf_counter() - start)
+        results.append([p.id for p in points])
+    return {"latencies": latencies, "ids": results}
+
+
+def recall(found: List[List], truth: List[List]) -> float:
+    return float(np.mean([len(set(f) & set(t)) / max(len(t), 1) for f, t in zip(found, truth)]))
+
+
+def main():
+    args = parse_args()
+    client = QdrantClient(host=args.host, port=args.port, timeout=600)
+    centers = cluster_centers(args.dim, args.clusters)
+
+    if not args.skip_load:
+        for config_name in args.configs:
+            start = time.perf_counter()
+            load_collection(client, f"{args.prefix}_{config_name}", CONFIGS[config_name], centers, args)
+            print(f"📦 {config_name}: {args.points:,} 포인트 적재 + 인덱싱 {time.perf_counter() - start:.1f}s")
+
+    queries = clustered_vectors(centers, args.queries, seed=10_000_019)
+    years = [int(year) for year in np.random.default_rng(7).choice(YEARS, args.queries)]
+    first = f"{args.prefix}_{args.configs[0]}"
+
+    recommendations = {}
+    for mode in ("semantic", "hybrid"):
+        # 정답: 같은 데이터에 대한 정확(brute force) 검색
+        truth = run_queries(client, first, queries, years, mode, args.top_k, search_params(exact=True))["ids"]
+        print(f"\n📊 mode={mode}, points={args.points:,}, dim={args.dim}, top_k={args.top_k}")
+        rows = []
+        for config_name in args.configs:
+            quantized = CONFIGS[config_name]["quantization"] != "none"
+            for ef in args.ef:
+                for oversampling in (args.oversampling if quantized else [0.0]):
+                    params = search_params(hnsw_ef=ef, oversampling=oversampling)
+                    result = run_queries(client, f"{args.prefix}_{config_name}", queries, years, mode, args.top_k, params)
+                    row = {
+                        "config": config_name, "ef": ef, "oversampling": oversampling,
+                        "recall": recall(result["ids"], truth),
+                        "p50_ms": percentile(result["latencies"], 50) * 1000,
+                        "p95_ms": percentile(result["latencies"], 95) * 1000,
+                    }
+                    rows.append(row)
+                    print(f"  {config_name:15s} ef={ef:4d} oversampling={oversampling:3.1f}  "
+                          f"recall={row['recall']:.3f}  p50={row['p50_ms']:6.2f}ms  p95={row['p95_ms']:6.2f}ms")
+
+        # 목표 recall 을 만족하는 가장 빠른 조합 (설정별)
+        for config_name in args.configs:
+            ok = [r for r in rows if r["config"] == config_name and r["recall"] >= args.target_recall]
+            if ok:
+                best = min(ok, key=lambda r: r["p50_ms"])
+                recommendations.setdefault(config_name, {})[mode] = best
+
+    print(f"\n✅ recall ≥ {args.target_recall} 인 가장 빠른 검색 파라미터")
+    for config_name, modes in recommendations.items():
+        env = " ".join(
+            f"QDRANT_{mode.upper()}_HNSW_EF={r['ef']} QDRANT_{mode.upper()}_OVERSAMPLING={r['oversampling']}"
+            for mode, r in modes.items()
+        )
+        print(f"  {config_name:15s} {env}")
+
+
+if __name__ == "__main__":
+    main()
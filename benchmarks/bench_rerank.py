@@ -0,0 +1,72 @@
+"""
+키워드 보너스 재정렬 벤치마크 (기존 Python 루프 vs 벡터화 rerank_hits)
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_rerank --sizes 1000 10000
+"""
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+from rerank_utils import rerank_hits, decaying_bonus_score, bm25_style_score, reciprocal_rank_fusion_score
+from benchmarks.synthetic_corpus import generate_documents
+
+
+def legacy_apply_keyword_bonus(results, text_keywords, top_k):
+    """변경 전 apply_keyword_bonus (출력문 제외)"""
+    reranked = []
+    for hit in results:
+        payload = hit.payload
+        score = float(hit.score)
+        doc_keywords = payload.get("keywords", [])
+        matched_keywords = [
+            kw for kw in text_keywords if kw in (payload.get("sFileName") or "") or kw in doc_keywords
+        ]
+        for i, _ in enumerate(matched_keywords):
+            score += max(0.05 - i * 0.01, 0.01)
+        reranked.append({"id": hit.id, "score": round(score, 5)})
+    reranked.sort(key=lambda x: x["score"], reverse=True)
+    return reranked[:top_k]
+
+
+def make_hits(n_hits: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(id=i, score=rng.uniform(0.3, 0.9), payload=doc)
+        for i, doc in enumerate(generate_documents(n_hits, seed=seed))
+    ]
+
+
+def time_it(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    keywords = ["설비기술그룹", "활동", "일지", "연신설비", "고장"]
+    variants = {
+        "legacy loop": lambda hits: legacy_apply_keyword_bonus(hits, keywords, args.top_k),
+        "vectorized decaying": lambda hits: rerank_hits(hits, keywords, args.top_k, decaying_bonus_score),
+        "vectorized bm25": lambda hits: rerank_hits(hits, keywords, args.top_k, bm25_style_score),
+        "vectorized rrf": lambda hits: rerank_hits(hits, keywords, args.top_k, reciprocal_rank_fusion_score),
+    }
+    for size in args.sizes:
+        hits = make_hits(size)
+        legacy_ids = [hit["id"] for hit in variants["legacy loop"](hits)]
+        same = legacy_ids == [hit["id"] for hit in variants["vectorized decaying"](hits)]
+        print(f"\n📊 candidates={size} (decaying 결과 일치: {same})")
+        for name, fn in variants.items():
+            print(f"  {name:<22} {time_it(lambda: fn(hits), args.repeat):8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+문서 요약 단계 벤치마크 (순차 동기 요약 vs 동시 배치 요약 vs 캐시 적중)
+
+vLLM 은 benchmarks.fake_vllm 으로 대체, 요약 캐시는 임시 SQLite 파일을 사용합니다.
+
+실행 (저장소 루트에서):
+    python -m benchmarks.bench_summaries --docs 5 --rounds 10
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+
+from benchmarks.load_utils import fake_vllm_server, percentile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=5, help="검색 1회당 요약할 문서 수")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=4, help="vLLM 요청 1회에 담는 요약 수 (1 이면 문서별 요청)")
+    parser.add_argument("--vllm-latency", type=float, default=0.3)
+    parser.add_argument("--port", type=int, default=8013)
+    return parser.parse_args()
+
+
+def article(round_no: int, doc_no: int) -> str:
+    return f"{round_no}회차 {doc_no}번 문서: 냉각수 펌프 교체 작업 후 압력 점검 결과 정상 범위를 확인하였으며 다음 점검은 분기별로 진행한다."
+
+
+async def timed_rounds(fn, rounds):
+    latencies = []
+    for texts in rounds:
+        start = time.perf_counter()
+        await fn(texts)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main(args, cache_path):
+    import vllm_utils
+    from summary_utils import SummaryStore, summarize_documents
+
+    store = SummaryStore(cache_path)
+    rounds = [[article(r, d) for d in range(args.docs)] for r in range(args.rounds)]
+
+    # 기존 방식: 문서마다 동기 요약 (캐시 없음)
+    async def sequential(texts):
+        return [vllm_utils.call_vllm_summarize_article(text) for text in texts]
+
+    first_arrivals = []
+
+    async def concurrent(texts):
+        start = time.perf_counter()
+        first = None
+        async for _ in summarize_documents(texts, args.concurrency, store, args.batch_size):
+            first = first if first is not None else time.perf_counter() - start
+        first_arrivals.append(first)
+
+    results = {
+        "sequential (sync)": await timed_rounds(sequential, rounds),
+        "concurrent (cold)": await timed_rounds(concurrent, rounds),
+    }
+    cold_first = list(first_arrivals)
+    results["concurrent (cached)"] = await timed_rounds(concurrent, rounds)
+    await vllm_utils.close_vllm_client()
+
+    print(f"\n📊 docs/search={args.docs}, concurrency={args.concurrency}, batch={args.batch_size}, vLLM latency={args.vllm_latency}s")
+    for title, latencies in results.items():
+        print(f"  {title:22s} p50={percentile(latencies, 50) * 1000:8.1f}ms  p95={percentile(latencies, 95) * 1000:8.1f}ms")
+    print(f"  첫 요약 도착 (cold)     p50={percentile(cold_first, 50) * 1000:8.1f}ms")
+    print(f"  캐시: {store.stats()}")
+    store.close()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp, fake_vllm_server(args.port, {"FAKE_VLLM_LATENCY": str(args.vllm_latency)}) as url:
+        os.environ["VLLM_API_URL"] = url
+        os.environ["SUMMARY_CACHE_PATH"] = os.path.join(tmp, "summary_cache.sqlite3")
+        asyncio.run(main(args, os.environ["SUMMARY_CACHE_PATH"]))
@@ -0,0 +1,72 @@
+"""
+VLLMClient 동작 확인 (benchmarks.fake_vllm 대상)
+
+- 배치 요청 결과 순서 / <think> 제거
+- 503 주입 시 지터 재시도로 복구되는 비율
+- 서버 중단 시 서킷 브레이커가 열려 즉시 실패하는지
+
+실행 (저장소 루트에서):
+    python -m benchmarks.check_vllm_client
+"""
+import time
+import json
+import argparse
+import urllib.request
+
+from benchmarks.load_utils import fake_vllm_server
+from vllm_utils import VLLMClient, VLLMError, VLLMCircuitOpenError, CircuitBreaker
+
+
+def check(name: str, ok: bool):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    results = []
+    env = {"FAKE_VLLM_LATENCY": "0.05", "FAKE_VLLM_TOKENS_PER_SEC": "2000", "FAKE_VLLM_FAILURE_RATE": "0"}
+    with fake_vllm_server(args.port, env) as url:
+        client = VLLMClient(url, max_retries=0)
+        articles = [f"[본문]\n문서 {i} 냉각수 펌프 교체 및 점검 기록" for i in range(5)]
+        texts = client.complete_batch(articles, call_type="summary")
+        results.append(check("배치 요청 5건 → 응답 5건, 순서 유지", [t.split()[1] for t in texts] == [str(i) for i in range(5)]))
+        results.append(check("<think> 구간 제거", all("<think>" not in t for t in texts)))
+        stats = json.load(urllib.request.urlopen(url.replace("/v1/completions", "/stats")))
+        results.append(check("배치는 HTTP 요청 1회", stats["requests"] == 1))
+
+    with fake_vllm_server(args.port, {**env, "FAKE_VLLM_FAILURE_RATE": str(args.failure_rate)}) as url:
+        client = VLLMClient(url, max_retries=3, retry_backoff=0.01, breaker=CircuitBreaker(1000, 1))
+        succeeded = 0
+        for _ in range(50):
+            try:
+                client.complete("키워드:", call_type="keywords")
+                succeeded += 1
+            except VLLMError:
+                pass
+        results.append(check(f"503 {args.failure_rate:.0%} 주입, 재시도 후 성공 {succeeded}/50", succeeded >= 45))
+
+    # 서버가 내려간 상태 → 연속 실패 후 서킷 열림
+    client = VLLMClient(url, max_retries=0, breaker=CircuitBreaker(3, 60))
+    for _ in range(3):
+        try:
+            client.complete("키워드:")
+        except VLLMError:
+            pass
+    start = time.perf_counter()
+    try:
+        client.complete("키워드:")
+        opened = False
+    except VLLMCircuitOpenError:
+        opened = True
+    results.append(check(f"서킷 열림 후 즉시 실패 ({(time.perf_counter() - start) * 1000:.2f}ms)", opened))
+
+    print(f"\n{sum(results)}/{len(results)} 통과")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+로컬 키워드 추출기 vs LLM 키워드 생성 비교 (일치도 / 지연)
+
+실행 (저장소 루트에서, vLLM 서버 필요):
+    python -m benchmarks.compare_keyword_extractors --vocab qdrant
+    python -m benchmarks.compare_keyword_extractors --vocab synthetic --queries-file queries.txt
+"""
+import time
+import argparse
+from statistics import mean
+
+from keyword_extractor import KeywordVocabulary, LocalKeywordExtractor
+from benchmarks.load_utils import percentile
+
+SAMPLE_QUERIES = [
+    "2024년 1월 설비기술그룹 활동 일지",
+    "2023년 3월 15일 고장 이력",
+    "설비고장 이력",
+    "23년도 품질보증팀 점검 결과",
+    "24년 5월 3라인 설비이상 보고서",
+    "연신설비 유지보수 매뉴얼",
+    "2024년 냉각수 펌프 교체 이력 알려줘",
+    "클린룸 미세먼지 측정값",
+    "공정관리파트 1분기 수율 분석",
+    "2023년 하반기 안전교육 자료",
+    "신규 장비 입고 리스트",
+    "2025년 2월 생산기술팀 코팅기 점검 결과",
+]
+
+
+def load_vocabulary(source: str) -> KeywordVocabulary:
+    if source == "synthetic":
+        from benchmarks.synthetic_corpus import generate_documents
+
+        return KeywordVocabulary(kw for doc in generate_documents(5000) for kw in doc["keywords"])
+
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(host="localhost", port=6333)
+    vocabulary = KeywordVocabulary()
+    offset = None
+    while True:
+        points, offset = client.scroll("docs_test_all", limit=1000, offset=offset, with_payload=["keywords"])
+        vocabulary.add(kw for point in points for kw in (point.payload or {}).get("keywords") or [])
+        if offset is None:
+            return vocabulary
+
+
+def jaccard(a, b) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vocab", choices=["qdrant", "synthetic"], default="qdrant")
+    parser.add_argument("--queries-file")
+    parser.add_argument("--min-confidence", type=float, default=0.6)
+    args = parser.parse_args()
+
+    from vllm_utils import call_vllm_generate_search_condition, clean_llm_keywords
+
+    queries = SAMPLE_QUERIES
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    extractor = LocalKeywordExtractor(load_vocabulary(args.vocab), min_confidence=args.min_confidence)
+    print(f"📚 사전 단어 수: {len(extractor.vocabulary)}\n")
+
+    rows = []
+    for query in queries:
+        start = time.perf_counter()
+        local, confidence = extractor.extract(query)
+        local_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        llm = clean_llm_keywords(call_vllm_generate_search_condition(query))
+        llm_ms = (time.perf_counter() - start) * 1000
+
+        rows.append((query, local, confidence, local_ms, llm, llm_ms))
+        print(f"❓ {query}\n   local({confidence:.2f}, {local_ms:.3f}ms): {local}\n   llm({llm_ms:.0f}ms):          {llm}")
+
+    confident = [r for r in rows if extractor.is_confident(r[2])]
+    print("\n📊 요약")
+    print(f"  완전 일치율          {mean(set(r[1]) == set(r[4]) for r in rows):.2%}")
+    print(f"  평균 Jaccard         {mean(jaccard(r[1], r[4]) for r in rows):.3f}")
+    print(f"  신뢰 구간 Jaccard    {mean(jaccard(r[1], r[4]) for r in confident) if confident else 0:.3f} ({len(confident)}/{len(rows)}건 로컬 처리)")
+    print(f"  로컬 지연 p50/p99    {percentile([r[3] for r in rows], 50):.3f} / {percentile([r[3] for r in rows], 99):.3f} ms")
+    print(f"  LLM 지연 p50/p99     {percentile([r[5] for r in rows], 50):.0f} / {percentile([r[5] for r in rows], 99):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
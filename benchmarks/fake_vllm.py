@@ -0,0 +1,72 @@
+"""
+vLLM /v1/completions 대체 서버 (벤치마크용)
+
+실행:
+    FAKE_VLLM_LATENCY=0.5 FAKE_VLLM_TOKENS_PER_SEC=30 python -m uvicorn benchmarks.fake_vllm:app --port 8001
+"""
+import os
+import json
+import random
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# ✅ 응답 지연(초) 설정
+FAKE_VLLM_LATENCY = float(os.getenv("FAKE_VLLM_LATENCY", "0.5"))
+# ✅ 스트리밍 시 초당 토큰 수
+FAKE_VLLM_TOKENS_PER_SEC = float(os.getenv("FAKE_VLLM_TOKENS_PER_SEC", "30"))
+# ✅ 503 응답 비율 (재시도/서킷 브레이커 확인용)
+FAKE_VLLM_FAILURE_RATE = float(os.getenv("FAKE_VLLM_FAILURE_RATE", "0"))
+
+stats = {"requests": 0, "prompts": 0, "failures": 0}
+
+app = FastAPI()
+
+
+def fake_completion_text(prompt: str) -> str:
+    # 키워드 생성 프롬프트에는 쉼표 구분 키워드로 응답
+    if "키워드:" in prompt:
+        return "2024,1,설비기술그룹,활동,일지"
+    if "[본문]" in prompt:
+        return "<think>본문 확인</think>" + prompt.rsplit("[본문]", 1)[1].strip()[:40] + " 관련 기록입니다."
+    return "검색된 문서를 기준으로 설비 점검 이력과 조치 내용을 확인할 수 있습니다."
+
+
+async def stream_completion(text: str):
+    # 첫 토큰까지 FAKE_VLLM_LATENCY, 이후 FAKE_VLLM_TOKENS_PER_SEC 속도로 한 글자씩 전송
+    await asyncio.sleep(FAKE_VLLM_LATENCY)
+    for token in text:
+        chunk = {"object": "text_completion", "choices": [{"index": 0, "text": token, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        await asyncio.sleep(1 / FAKE_VLLM_TOKENS_PER_SEC)
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/completions")
+async def completions(request: Request):
+    data = await request.json()
+    prompts = data.get("prompt", "")
+    prompts = prompts if isinstance(prompts, list) else [prompts]
+    stats["requests"] += 1
+    stats["prompts"] += len(prompts)
+    if random.random() < FAKE_VLLM_FAILURE_RATE:
+        stats["failures"] += 1
+        return JSONResponse(status_code=503, content={"error": "fake overload"})
+
+    texts = [fake_completion_text(prompt) for prompt in prompts]
+    if data.get("stream"):
+        return StreamingResponse(stream_completion(texts[0]), media_type="text/event-stream")
+
+    # 배치 요청은 가장 긴 응답 기준으로 한 번만 대기 (vLLM 연속 배치와 유사)
+    await asyncio.sleep(FAKE_VLLM_LATENCY + max(len(text) for text in texts) / FAKE_VLLM_TOKENS_PER_SEC)
+    return {
+        "id": "cmpl-fake",
+        "object": "text_completion",
+        "model": data.get("model", "/model"),
+        "choices": [{"index": i, "text": text, "finish_reason": "stop"} for i, text in enumerate(texts)],
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
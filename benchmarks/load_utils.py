@@ -0,0 +1,76 @@
+"""
+벤치마크 공통 유틸 (부하 생성, 지연 통계, 대체 서버 실행)
+"""
+import os
+import sys
+import time
+import asyncio
+import subprocess
+import contextlib
+import urllib.request
+from typing import Callable, Awaitable, Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize_latencies(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run_load(handler: Callable[[str], Awaitable], queries: List[str], concurrency: int) -> Dict[str, float]:
+    """concurrency 개의 가상 사용자가 queries 를 나눠서 순서대로 호출"""
+    queue = asyncio.Queue()
+    for query in queries:
+        queue.put_nowait(query)
+    latencies = []
+
+    async def user():
+        while not queue.empty():
+            query = queue.get_nowait()
+            start = time.perf_counter()
+            await handler(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return summarize_latencies(latencies, time.perf_counter() - start)
+
+
+def print_report(title: str, stats: Dict[str, float]):
+    print(
+        f"{title:<28} req={stats['requests']:<5} rps={stats['rps']:8.2f} "
+        f"p50={stats['p50_ms']:8.1f}ms p95={stats['p95_ms']:8.1f}ms p99={stats['p99_ms']:8.1f}ms"
+    )
+
+
+@contextlib.contextmanager
+def fake_vllm_server(port: int, env: Dict[str, str] = None):
+    """benchmarks.fake_vllm 을 별도 프로세스로 띄우고 준비될 때까지 대기"""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_vllm:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/docs", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.2)
+        yield f"http://127.0.0.1:{port}/v1/completions"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
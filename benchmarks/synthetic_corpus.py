@@ -0,0 +1,74 @@
+"""
+벤치마크용 합성 한국어 문서 컬렉션 생성
+"""
+import random
+from typing import List, Dict
+
+from qdrant_client.models import Distance, VectorParams, PointStruct
+
+from collection_bootstrap import date_ordinal
+
+DEPARTMENTS = ["설비기술그룹", "품질보증팀", "공정관리파트", "안전환경팀", "생산기술팀"]
+TOPICS = ["활동 일지", "고장 이력", "점검 결과", "유지보수 매뉴얼", "수율 분석", "교육 자료", "장비 입고"]
+EQUIPMENT = ["연신설비", "냉각수 펌프", "클린룸", "3라인", "압출기", "코팅기"]
+EXTENSIONS = ["pdf", "docx", "xlsx", "pptx"]
+GRADES = ["A", "B", "C"]
+
+
+def generate_documents(n_docs: int, seed: int = 42, start: int = 0) -> List[Dict]:
+    """start 를 바꿔 가며 나눠 생성 가능 (대용량 컬렉션)"""
+    rng = random.Random(seed + start)
+    docs = []
+    for doc_id in range(start, start + n_docs):
+        year = rng.choice([2022, 2023, 2024, 2025])
+        month = rng.randint(1, 12)
+        day = rng.randint(1, 28)
+        dept = rng.choice(DEPARTMENTS)
+        topic = rng.choice(TOPICS)
+        equip = rng.choice(EQUIPMENT)
+        file_name = f"{year % 100}년_{month}월_{dept}_{equip.replace(' ', '')}_{topic.replace(' ', '_')}.{rng.choice(EXTENSIONS)}"
+        docs.append({
+            "doc_id": f"DOC{doc_id:07d}",
+            "nPage": 1,
+            "sFileName": file_name,
+            "sFilePath": f"\\\\NAS\\{dept}\\{file_name}",
+            "sGrade": rng.choice(GRADES),
+            "year": year,
+            "month": month,
+            "day": day,
+            "date_ordinal": date_ordinal(year, month, day),
+            "keywords": [dept, equip, *topic.split()],
+            "text": f"{year}년 {month}월 {day}일 {dept} {equip} {topic}",
+        })
+    return docs
+
+
+def generate_queries(n_queries: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice([2023, 2024])}년 {rng.randint(1, 12)}월 {rng.choice(DEPARTMENTS)} {rng.choice(TOPICS)}"
+        for _ in range(n_queries)
+    ]
+
+
+def build_points(docs: List[Dict], vectors, start: int = 0) -> List[PointStruct]:
+    return [
+        PointStruct(id=start + i, vector=[float(x) for x in vector], payload=doc)
+        for i, (doc, vector) in enumerate(zip(docs, vectors))
+    ]
+
+
+def create_collection(client, collection_name: str, dim: int, points: List[PointStruct], batch_size: int = 1024):
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    client.create_collection(collection_name, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    for start in range(0, len(points), batch_size):
+        client.upsert(collection_name, points=points[start:start + batch_size])
+
+
+async def async_create_collection(client, collection_name: str, dim: int, points: List[PointStruct], batch_size: int = 1024):
+    if await client.collection_exists(collection_name):
+        await client.delete_collection(collection_name)
+    await client.create_collection(collection_name, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    for start in range(0, len(points), batch_size):
+        await client.upsert(collection_name, points=points[start:start + batch_size])
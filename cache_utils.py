@@ -0,0 +1,106 @@
+import re
+import json
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+
+# ✅ 질문 정규화 (유니코드 NFC, 대소문자, 공백, 끝 문장부호)
+def normalize_question(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = " ".join(text.split())
+    return re.sub(r"[\s?.!~]+$", "", text)
+
+
+def estimate_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+# ✅ 응답 캐시 (메모리 상한 + TTL + 컬렉션 버전별 무효화)
+class ResponseCache:
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()  # key → (저장 시각, 값, 크기, 계산 소요 시간)
+        self._lock = threading.Lock()
+
+    def set_version(self, version):
+        """컬렉션 버전이 바뀌면 전체 무효화"""
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None:
+                self.invalidations += 1
+            self.version = version
+            self._entries.clear()
+            self.bytes = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry[3]
+                return entry[1]
+            if entry is not None:
+                self._evict(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value, cost_seconds: float = 0.0):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.monotonic(), value, size, cost_seconds)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str):
+        self.bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "invalidations": self.invalidations,
+            }
+
+
+# ✅ 컬렉션 변경 감지 (포인트 수 + 적재 프로세스가 기록한 ingest_version, refresh_interval 마다 조회)
+class CollectionVersionTracker:
+    def __init__(self, fetch_version: Callable[[], Awaitable[str]], refresh_interval: float):
+        self.fetch_version = fetch_version
+        self.refresh_interval = refresh_interval
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+
+    async def current(self) -> str:
+        if self._version is None or time.monotonic() - self._checked_at >= self.refresh_interval:
+            self._version = await self.fetch_version()
+            self._checked_at = time.monotonic()
+        return self._version
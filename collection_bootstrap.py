@@ -0,0 +1,241 @@
+"""
+docs_test_all 컬렉션 payload 인덱스 / date_ordinal 마이그레이션
+
+실행 (저장소 루트에서):
+    python -m collection_bootstrap                         # 누락된 payload 인덱스 생성
+    python -m collection_bootstrap --backfill-date-ordinal # date_ordinal 없는 포인트 채우기
+    python -m collection_bootstrap --migrate-sparse docs_test_all_v2  # bm25 희소 벡터를 포함한 새 컬렉션으로 복사
+    QDRANT_QUANTIZATION=scalar QDRANT_VECTORS_ON_DISK=1 python -m collection_bootstrap --apply-storage-config
+"""
+import os
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization, BinaryQuantizationConfig, CollectionInfo, CompressionRatio, Disabled, Distance, Filter, HnswConfigDiff,
+    IsEmptyCondition, Modifier, PayloadField, PayloadSchemaType, PointStruct, ProductQuantization,
+    ProductQuantizationConfig, QuantizationSearchParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, SetPayload, SetPayloadOperation, SparseIndexParams, SparseVectorParams, VectorParams, VectorParamsDiff,
+)
+
+from sparse_utils import SPARSE_VECTOR_NAME, document_sparse_text, document_sparse_vector
+
+# ✅ 벡터 저장 방식 (코퍼스가 RAM 을 넘을 때)
+# - QDRANT_QUANTIZATION: none | scalar (int8, 4배 압축) | product (x16) | binary (x32, 고차원 전용)
+# - 원본 벡터/HNSW 는 디스크, 양자화 벡터만 RAM 에 두고 원본으로 rescore 하는 구성이 기본 권장
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")
+QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "1") == "1"
+QDRANT_PRODUCT_COMPRESSION = os.getenv("QDRANT_PRODUCT_COMPRESSION", "x16")
+QDRANT_VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "0") == "1"
+QDRANT_HNSW_ON_DISK = os.getenv("QDRANT_HNSW_ON_DISK", "0") == "1"
+
+# ✅ 검색 필터가 사용하는 필드별 인덱스
+# - year/month/day: MatchValue, date_ordinal: Range (연월일 → 정수 하나)
+# - sFileName/keywords: MatchValue/MatchAny 정확 일치 (keywords 의 MatchText 는 인덱스 없이 부분문자열 비교)
+PAYLOAD_INDEXES: Dict[str, PayloadSchemaType] = {
+    "year": PayloadSchemaType.INTEGER,
+    "month": PayloadSchemaType.INTEGER,
+    "day": PayloadSchemaType.INTEGER,
+    "date_ordinal": PayloadSchemaType.INTEGER,
+    "sFileName": PayloadSchemaType.KEYWORD,
+    "keywords": PayloadSchemaType.KEYWORD,
+    "sGrade": PayloadSchemaType.KEYWORD,  # 보안등급 필터 (모든 검색에 적용)
+}
+
+# ✅ 검색 응답에 실제로 쓰는 payload 필드
+# - 후보 검색 (top_k * 배수): 재정렬 / 중복 제거용 메타데이터만 (sFileName/keywords/doc_id)
+# - 최종 top_k: 요약에 쓰는 본문(text) 을 id 로 따로 조회
+CANDIDATE_PAYLOAD_FIELDS = ["doc_id", "nPage", "sFileName", "sFilePath", "sGrade", "year", "month", "day", "keywords"]
+TEXT_PAYLOAD_FIELDS = ["text"]
+
+
+# ✅ 양자화 / 디스크 저장 설정
+def quantization_config(kind: str = QDRANT_QUANTIZATION, always_ram: bool = QDRANT_QUANTIZATION_ALWAYS_RAM):
+    if kind == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=always_ram))
+    if kind == "product":
+        return ProductQuantization(product=ProductQuantizationConfig(
+            compression=CompressionRatio(QDRANT_PRODUCT_COMPRESSION), always_ram=always_ram
+        ))
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+    if kind == "none":
+        return None
+    raise ValueError(f"알 수 없는 QDRANT_QUANTIZATION: {kind}")
+
+
+def vectors_config(dim: int, vectors_on_disk: bool = QDRANT_VECTORS_ON_DISK) -> VectorParams:
+    return VectorParams(size=dim, distance=Distance.COSINE, on_disk=vectors_on_disk)
+
+
+def sparse_vectors_config(on_disk: bool = QDRANT_VECTORS_ON_DISK) -> Dict[str, SparseVectorParams]:
+    """BM25 희소 벡터 (문서 쪽 tf 가중치는 sparse_utils, idf 는 Qdrant 가 계산)"""
+    return {SPARSE_VECTOR_NAME: SparseVectorParams(index=SparseIndexParams(on_disk=on_disk), modifier=Modifier.IDF)}
+
+
+def create_collection_kwargs(dim: int, quantization: str = QDRANT_QUANTIZATION,
+                             vectors_on_disk: bool = QDRANT_VECTORS_ON_DISK,
+                             hnsw_on_disk: bool = QDRANT_HNSW_ON_DISK, sparse: bool = True) -> Dict:
+    """create_collection 에 넘길 벡터/양자화/HNSW 설정 (환경 변수 기본값)"""
+    return {
+        "vectors_config": vectors_config(dim, vectors_on_disk),
+        "sparse_vectors_config": sparse_vectors_config(vectors_on_disk) if sparse else None,
+        "quantization_config": quantization_config(quantization),
+        "hnsw_config": HnswConfigDiff(on_disk=hnsw_on_disk),
+    }
+
+
+def apply_storage_config(client: QdrantClient, collection_name: str):
+    """기존 컬렉션에 현재 저장 설정 반영 (Qdrant 가 백그라운드에서 세그먼트 재구성)"""
+    client.update_collection(
+        collection_name,
+        vectors_config={"": VectorParamsDiff(on_disk=QDRANT_VECTORS_ON_DISK)},
+        hnsw_config=HnswConfigDiff(on_disk=QDRANT_HNSW_ON_DISK),
+        quantization_config=quantization_config() or Disabled.DISABLED,
+    )
+
+
+# ✅ 검색 파라미터 (hnsw_ef 가 클수록 recall ↑ / 지연 ↑, oversampling 배수만큼 양자화 후보를 뽑아 원본으로 rescore)
+def search_params(hnsw_ef: int = 0, oversampling: float = 0.0, rescore: bool = True, exact: bool = False) -> Optional[SearchParams]:
+    if not (hnsw_ef or oversampling or exact):
+        return None
+    quantization = QuantizationSearchParams(rescore=rescore, oversampling=oversampling) if oversampling else None
+    return SearchParams(hnsw_ef=hnsw_ef or None, exact=exact, quantization=quantization)
+
+
+# ✅ 2024-01-15 → 20240115 (월/일이 없으면 0)
+def date_ordinal(year, month=None, day=None) -> Optional[int]:
+    try:
+        return int(year) * 10000 + int(month or 0) * 100 + int(day or 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str, indexes: Dict = None, wait: bool = True) -> List[str]:
+    """누락된 인덱스만 생성 (이미 있으면 건너뜀), 생성한 필드 목록 반환"""
+    indexes = indexes or PAYLOAD_INDEXES
+    existing = client.get_collection(collection_name).payload_schema or {}
+    created = []
+    for field_name, schema in indexes.items():
+        if field_name in existing:
+            continue
+        client.create_payload_index(collection_name, field_name=field_name, field_schema=schema, wait=wait)
+        created.append(field_name)
+    return created
+
+
+def backfill_date_ordinal(client: QdrantClient, collection_name: str, batch_size: int = 1000) -> int:
+    """date_ordinal 이 없는 포인트에 year/month/day 로 계산한 값 기록, 갱신한 포인트 수 반환"""
+    missing = Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="date_ordinal"))])
+    updated = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=missing,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["year", "month", "day"],
+            with_vectors=False,
+        )
+        # 같은 날짜끼리 묶어 set_payload 한 번으로 처리
+        ids_by_ordinal = defaultdict(list)
+        for point in points:
+            payload = point.payload or {}
+            ordinal = date_ordinal(payload.get("year"), payload.get("month"), payload.get("day"))
+            if ordinal is not None:
+                ids_by_ordinal[ordinal].append(point.id)
+        if ids_by_ordinal:
+            client.batch_update_points(
+                collection_name,
+                update_operations=[
+                    SetPayloadOperation(set_payload=SetPayload(payload={"date_ordinal": ordinal}, points=ids))
+                    for ordinal, ids in ids_by_ordinal.items()
+                ],
+            )
+            updated += sum(len(ids) for ids in ids_by_ordinal.values())
+        if offset is None:
+            return updated
+
+
+# ✅ 적재 버전 (컬렉션 metadata, 적재 프로세스가 올리고 검색 서버가 읽어 응답 캐시 무효화)
+# - 재적재 / 문서 수정은 포인트 수가 그대로일 수 있으므로 포인트 수와 함께 버전 문자열을 구성
+INGEST_VERSION_KEY = "ingest_version"
+
+
+def ingest_version(info: CollectionInfo) -> int:
+    return int((info.config.metadata or {}).get(INGEST_VERSION_KEY, 0))
+
+
+def collection_version_key(info: CollectionInfo) -> str:
+    return f"{info.points_count or 0}:{ingest_version(info)}"
+
+
+def bump_ingest_version(client: QdrantClient, collection_name: str) -> int:
+    version = ingest_version(client.get_collection(collection_name)) + 1
+    client.update_collection(collection_name, metadata={INGEST_VERSION_KEY: version})
+    return version
+
+
+# ✅ BM25 희소 벡터 (기존 컬렉션에는 새 벡터를 추가할 수 없으므로 새 컬렉션으로 복사)
+def has_sparse_vectors(client: QdrantClient, collection_name: str) -> bool:
+    return SPARSE_VECTOR_NAME in (client.get_collection(collection_name).config.params.sparse_vectors or {})
+
+
+def migrate_with_sparse(client: QdrantClient, source: str, target: str, batch_size: int = 256) -> int:
+    """source 의 포인트(id / 벡터 / payload 그대로)에 bm25 벡터를 더해 target 에 기록, 복사한 포인트 수 반환"""
+    if not client.collection_exists(target):
+        dim = client.get_collection(source).config.params.vectors.size
+        client.create_collection(target, **create_collection_kwargs(dim))
+    copied = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=True,
+        )
+        if points:
+            client.upsert(target, points=[
+                PointStruct(
+                    id=point.id,
+                    vector={"": point.vector, SPARSE_VECTOR_NAME: document_sparse_vector(document_sparse_text(point.payload or {}))},
+                    payload=point.payload,
+                )
+                for point in points
+            ])
+            copied += len(points)
+        if offset is None:
+            break
+    ensure_payload_indexes(client, target)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default="docs_test_all")
+    parser.add_argument("--backfill-date-ordinal", action="store_true")
+    parser.add_argument("--apply-storage-config", action="store_true", help="QDRANT_QUANTIZATION / *_ON_DISK 반영")
+    parser.add_argument("--migrate-sparse", metavar="TARGET", help="bm25 희소 벡터를 포함한 새 컬렉션으로 복사")
+    args = parser.parse_args()
+
+    client = QdrantClient(host=args.host, port=args.port)
+    if args.apply_storage_config:
+        apply_storage_config(client, args.collection)
+        print(f"💾 저장 설정 반영: quantization={QDRANT_QUANTIZATION}, vectors_on_disk={QDRANT_VECTORS_ON_DISK}, "
+              f"hnsw_on_disk={QDRANT_HNSW_ON_DISK}")
+    if args.backfill_date_ordinal:
+        print(f"📅 date_ordinal 기록: {backfill_date_ordinal(client, args.collection)}건")
+    if args.migrate_sparse:
+        copied = migrate_with_sparse(client, args.collection, args.migrate_sparse)
+        print(f"🔤 bm25 희소 벡터 포함 복사: {copied}건 → {args.migrate_sparse} "
+              f"(QDRANT_COLLECTION={args.migrate_sparse} SEARCH_RANKING=fusion 로 전환)")
+        return
+    created = ensure_payload_indexes(client, args.collection)
+    print(f"🗂️ 생성한 payload 인덱스: {created if created else '없음 (모두 존재)'}")
+
+
+if __name__ == "__main__":
+    main()
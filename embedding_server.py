@@ -0,0 +1,89 @@
+import time
+import asyncio
+import logging
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel
+
+from embedding_utils import (
+    EMBEDDING_MODEL_PATH,
+    EMBEDDING_WARMUP_TEXT,
+    EmbeddingBatcher,
+    detached_future,
+    embedding_executor,
+    encode_local,
+    get_model,
+)
+from metrics_utils import render_metrics, stage
+
+# ─────────────────────────────
+# ✅ 임베딩 전용 서버 (모델은 이 프로세스 하나에만 로드)
+#   uvicorn embedding_server:app --host 127.0.0.1 --port 8100 --workers 1
+#   EMBEDDING_MODE=remote EMBEDDING_SERVER_URL=http://127.0.0.1:8100 uvicorn main:app --workers 4
+# 단건 요청은 여러 API 워커에서 온 것까지 마이크로 배치로 묶어서 encode
+# ─────────────────────────────
+logger = logging.getLogger("uvicorn")
+
+app = FastAPI()
+batcher = EmbeddingBatcher(encode_local)
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+    batch_size: int = 32
+
+
+def vectors_response(vectors) -> Response:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis, :]
+    return Response(
+        content=vectors.tobytes(),
+        media_type="application/octet-stream",
+        headers={"X-Embedding-Dim": str(vectors.shape[1])},
+    )
+
+
+@app.on_event("startup")
+async def warm_up():
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(embedding_executor, encode_local, [EMBEDDING_WARMUP_TEXT])
+    logger.info(f"🔥 임베딩 서버 준비: {EMBEDDING_MODEL_PATH} ({time.perf_counter() - start:.1f}s)")
+
+
+@app.post("/embed")
+async def embed(req: EmbedRequest):
+    if not req.texts:
+        dim = get_model().get_sentence_embedding_dimension()
+        return vectors_response(np.zeros((0, dim), dtype=np.float32))
+    if len(req.texts) == 1:
+        with stage("embed_single"):
+            vector = await asyncio.wrap_future(detached_future(batcher.submit(req.texts[0])))
+        return vectors_response(vector)
+
+    loop = asyncio.get_running_loop()
+    with stage("embed_batch"):
+        vectors = await loop.run_in_executor(
+            embedding_executor, lambda: encode_local(req.texts, batch_size=req.batch_size)
+        )
+    return vectors_response(vectors)
+
+
+@app.get("/health")
+async def health():
+    batches = batcher.batches
+    return {
+        "model": EMBEDDING_MODEL_PATH,
+        "dim": get_model().get_sentence_embedding_dimension(),
+        "batches": batches,
+        "avg_batch_size": batcher.batched_texts / batches if batches else 0.0,
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
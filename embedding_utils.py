@@ -0,0 +1,418 @@
+import os
+import gc
+import time
+import logging
+import queue
+import asyncio
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+# ✅ 임베딩 실행 위치
+# local: 이 프로세스에서 모델 로드 (첫 encode / 워밍업 시점, import 시에는 로드하지 않음)
+# remote: embedding_server 프로세스에 HTTP 로 요청 (uvicorn 다중 워커가 모델 하나를 공유)
+EMBEDDING_MODE = os.getenv("EMBEDDING_MODE", "local")
+EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL", "http://127.0.0.1:8100")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "30"))
+EMBEDDING_WARMUP_TEXT = os.getenv("EMBEDDING_WARMUP_TEXT", "2024년 3월 설비기술그룹 점검 결과")
+
+# ✅ SentenceTransformer (KURE_v1)
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", "/home/hmo/Embedding_Models/KURE_v1")
+# torch | onnx | openvino (onnx/openvino 는 CPU 노드용)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# fp32 | fp16 | bf16 (torch 백엔드 전용)
+EMBEDDING_PRECISION = os.getenv("EMBEDDING_PRECISION", "fp32")
+# onnx 백엔드에서 사용할 파일 (예: "onnx/model_qint8_avx512_vnni.onnx" → int8 양자화 모델)
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")
+
+# ✅ GPU 메모리 관리 정책
+# warm: 해제하지 않음 (기본) | watermark: 예약 메모리가 임계치를 넘을 때만 해제
+# idle: 일정 시간 encode 가 없으면 해제 | always: encode 마다 해제 (기존 동작)
+EMBEDDING_MEMORY_POLICY = os.getenv("EMBEDDING_MEMORY_POLICY", "warm")
+EMBEDDING_GPU_HIGH_WATERMARK = float(os.getenv("EMBEDDING_GPU_HIGH_WATERMARK", "0.85"))
+EMBEDDING_IDLE_RELEASE_SEC = float(os.getenv("EMBEDDING_IDLE_RELEASE_SEC", "60"))
+
+# ✅ 임베딩 전용 스레드 풀 (이벤트 루프 비차단, 동시 encode 수 제한)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "2"))
+embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS, thread_name_prefix="embedding")
+
+# ✅ 질의 임베딩 캐시 / 마이크로 배치 설정
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "3600"))
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "32"))
+
+
+def load_embedding_model(
+    path: str = EMBEDDING_MODEL_PATH,
+    backend: str = EMBEDDING_BACKEND,
+    precision: str = EMBEDDING_PRECISION,
+    onnx_file: str = EMBEDDING_ONNX_FILE,
+) -> "SentenceTransformer":
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if backend != "torch":
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        return SentenceTransformer(path, backend=backend, model_kwargs=model_kwargs)
+
+    loaded = SentenceTransformer(path)
+    if precision == "fp16":
+        if loaded.device.type == "cuda":
+            loaded.half()
+        else:
+            logger.warning("fp16 은 GPU 에서만 적용됩니다 → fp32 유지")
+    elif precision == "bf16":
+        loaded.to(torch.bfloat16)
+    return loaded
+
+
+# ✅ GPU 캐시 해제 정책 (encode 직후 호출)
+class CudaMemoryPolicy:
+    def __init__(
+        self,
+        mode: str = EMBEDDING_MEMORY_POLICY,
+        high_watermark: float = EMBEDDING_GPU_HIGH_WATERMARK,
+        idle_seconds: float = EMBEDDING_IDLE_RELEASE_SEC,
+    ):
+        import torch
+
+        if mode not in ("warm", "watermark", "idle", "always"):
+            raise ValueError(f"알 수 없는 메모리 정책: {mode}")
+        self.mode = mode
+        self.high_watermark = high_watermark
+        self.idle_seconds = idle_seconds
+        self.releases = 0
+        self._enabled = torch.cuda.is_available()
+        self._last_used = time.monotonic()
+        self._released_since_use = True
+        self._lock = threading.Lock()
+        if self._enabled and mode == "idle":
+            threading.Thread(target=self._idle_watch, name="embedding-idle-release", daemon=True).start()
+
+    def release(self):
+        import torch
+
+        with self._lock:
+            torch.cuda.empty_cache()
+            gc.collect()
+            self.releases += 1
+            self._released_since_use = True
+
+    def _over_watermark(self) -> bool:
+        import torch
+
+        total = torch.cuda.get_device_properties(torch.cuda.current_device()).total_memory
+        return torch.cuda.memory_reserved() / total >= self.high_watermark
+
+    def after_encode(self):
+        if not self._enabled:
+            return
+        self._last_used = time.monotonic()
+        self._released_since_use = False
+        if self.mode == "always" or (self.mode == "watermark" and self._over_watermark()):
+            self.release()
+
+    def _idle_watch(self):
+        while True:
+            time.sleep(max(self.idle_seconds / 2, 1))
+            idle_for = time.monotonic() - self._last_used
+            if not self._released_since_use and idle_for >= self.idle_seconds:
+                self.release()
+
+
+# ─────────────────────────────
+# ✅ local: 모델 지연 로드 (처음 필요할 때 한 번)
+# ─────────────────────────────
+_model = None
+_memory_policy = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> "SentenceTransformer":
+    global _model, _memory_policy
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                start = time.perf_counter()
+                loaded = load_embedding_model()
+                _memory_policy = CudaMemoryPolicy()
+                _model = loaded
+                logger.info(f"🧠 임베딩 모델 로드: {EMBEDDING_MODEL_PATH} ({time.perf_counter() - start:.1f}s)")
+    return _model
+
+
+def __getattr__(name: str):
+    # 기존 코드 호환: embedding_utils.model / memory_policy 접근 시 로드
+    if name == "model":
+        return get_model()
+    if name == "memory_policy":
+        get_model()
+        return _memory_policy
+    raise AttributeError(name)
+
+
+# ─────────────────────────────
+# ✅ remote: embedding_server 호출 (응답은 float32 바이트, 배치 단위 1회 요청)
+# ─────────────────────────────
+class RemoteEmbeddingClient:
+    def __init__(self, url: str = EMBEDDING_SERVER_URL, timeout: float = EMBEDDING_SERVER_TIMEOUT):
+        import httpx
+
+        self.url = url.rstrip("/")
+        self._client = httpx.Client(timeout=timeout, limits=httpx.Limits(max_connections=EMBEDDING_WORKERS * 4))
+
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        response = self._client.post(
+            f"{self.url}/embed", json={"texts": [texts] if single else list(texts), "batch_size": batch_size}
+        )
+        response.raise_for_status()
+        dim = int(response.headers["X-Embedding-Dim"])
+        vectors = np.frombuffer(response.content, dtype=np.float32).reshape(-1, dim)
+        return vectors[0] if single else vectors
+
+    def dimension(self) -> int:
+        response = self._client.get(f"{self.url}/health")
+        response.raise_for_status()
+        return int(response.json()["dim"])
+
+    def close(self):
+        self._client.close()
+
+
+_remote_client = None
+
+
+def close_embedding_client():
+    global _remote_client
+    if _remote_client is not None:
+        _remote_client.close()
+        _remote_client = None
+
+
+def get_remote_client() -> RemoteEmbeddingClient:
+    global _remote_client
+    if _remote_client is None:
+        with _model_lock:
+            if _remote_client is None:
+                _remote_client = RemoteEmbeddingClient()
+    return _remote_client
+
+
+def encode_local(texts, **kwargs):
+    vectors = get_model().encode(texts, **kwargs)
+    _memory_policy.after_encode()
+    return vectors
+
+
+def encode_and_clear(texts, **kwargs):
+    if EMBEDDING_MODE == "remote":
+        return get_remote_client().encode(texts, **kwargs)
+    return encode_local(texts, **kwargs)
+
+
+def embedding_dimension() -> int:
+    if EMBEDDING_MODE == "remote":
+        return get_remote_client().dimension()
+    return get_model().get_sentence_embedding_dimension()
+
+
+async def async_encode(texts, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(embedding_executor, partial(encode_and_clear, texts, **kwargs))
+
+
+# ✅ 캐시 키 정규화 (유니코드 NFC + 공백 정리)
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+# ✅ 질의 임베딩 LRU + TTL 캐시
+class EmbeddingCache:
+    def __init__(self, maxsize: int = EMBEDDING_CACHE_SIZE, ttl: float = EMBEDDING_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def _settle(future: Future, result=None, exception: Exception = None):
+    # 결과 전달 실패 (이미 완료된 Future) 가 배치 스레드를 멈추지 않도록 Future 단위로 격리
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+# ✅ 동시 단건 encode 요청을 짧은 시간창 안에서 하나의 model.encode 배치로 묶기
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], object],
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch: int = EMBEDDING_MAX_BATCH,
+    ):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.batched_texts = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            # 대기 중 취소된 Future 는 제외 (클라이언트 연결 끊김 등)
+            pending = [(text, future) for text, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            # 같은 문장은 배치 안에서 한 번만 encode
+            unique_texts = list(dict.fromkeys(text for text, _ in pending))
+            try:
+                vectors = self.encode_fn(unique_texts)
+            except Exception as e:
+                for _, future in pending:
+                    _settle(future, exception=e)
+                continue
+
+            self.batches += 1
+            self.batched_texts += len(pending)
+            by_text = dict(zip(unique_texts, vectors))
+            for text, future in pending:
+                _settle(future, result=by_text[text])
+
+
+def detached_future(source: Future, transform: Callable = lambda value: value) -> Future:
+    """source 결과를 받는 별도 Future (반환값을 취소해도 공유 배치 Future 에는 전파되지 않음)"""
+    future = Future()
+
+    def _on_done(done: Future):
+        if done.cancelled():
+            future.cancel()
+        elif done.exception() is not None:
+            _settle(future, exception=done.exception())
+        else:
+            _settle(future, result=transform(done.result()))
+
+    source.add_done_callback(_on_done)
+    return future
+
+
+query_embedding_cache = EmbeddingCache()
+query_embedding_batcher = EmbeddingBatcher(encode_and_clear)
+
+
+def _cached_vector(text: str):
+    key = normalize_text(text)
+    return key, query_embedding_cache.get(key)
+
+
+def _store_vector(key: str, vector):
+    vector.flags.writeable = False  # 캐시 공유 벡터 보호
+    query_embedding_cache.put(key, vector)
+    return vector
+
+
+# ✅ 단건 질의 임베딩 (캐시 → 마이크로 배치)
+def submit_encode_query(text: str) -> Future:
+    """캐시에 있으면 완료된 Future, 없으면 배치 스레드에 제출 (결과는 캐시에 저장)"""
+    key, vector = _cached_vector(text)
+    if vector is not None:
+        future = Future()
+        future.set_result(vector)
+        return future
+    return detached_future(query_embedding_batcher.submit(key), lambda batch_vector: _store_vector(key, batch_vector))
+
+
+def encode_query(text: str):
+    return submit_encode_query(text).result()
+
+
+async def async_encode_query(text: str):
+    return await asyncio.wrap_future(submit_encode_query(text))
+
+
+# ✅ 워밍업 (모델 로드 / CUDA 커널 / 원격 연결을 첫 요청 전에 준비)
+async def warm_up_embedding(text: str = EMBEDDING_WARMUP_TEXT) -> float:
+    start = time.perf_counter()
+    await async_encode([text])
+    await async_encode([text] * EMBEDDING_MAX_BATCH)  # 마이크로 배치 최대 크기
+    return time.perf_counter() - start
+
+
+def embedding_cache_stats() -> Dict[str, float]:
+    stats = query_embedding_cache.stats()
+    batches = query_embedding_batcher.batches
+    stats["batches"] = batches
+    stats["avg_batch_size"] = query_embedding_batcher.batched_texts / batches if batches else 0.0
+    return stats
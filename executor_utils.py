@@ -0,0 +1,178 @@
+import time
+import asyncio
+import threading
+import contextlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """전역 동시 실행 한도가 queue_timeout 안에 비지 않은 경우 (→ 503)"""
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _SlotWaiter:
+    """slot 대기자 (동기: threading.Event, 비동기: 이벤트 루프의 Future) — granted 는 _lock 안에서만 변경"""
+    __slots__ = ("granted", "notify")
+
+    def __init__(self, notify: Callable[[], None]):
+        self.granted = False
+        self.notify = notify
+
+
+# ✅ 프로세스 전역 공유 스레드 풀 + 전역 동시 실행 한도 + 대기 시간 제한
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_concurrency: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        # 남은 slot 수 + FIFO 대기열 (반납 시 다음 대기자에게 slot 을 직접 넘김)
+        self._available = max_concurrency
+        self._waiters: Deque[_SlotWaiter] = deque()
+        self._lock = threading.Lock()
+
+        # 지표
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # ─────────────────────────────
+    # 슬롯 획득/반납
+    # ─────────────────────────────
+    def _try_acquire_locked(self) -> bool:
+        if self._available > 0 and not self._waiters:
+            self._available -= 1
+            self.in_flight += 1
+            self.acquired += 1
+            return True
+        return False
+
+    def _enqueue_locked(self, notify: Callable[[], None]) -> _SlotWaiter:
+        waiter = _SlotWaiter(notify)
+        self._waiters.append(waiter)
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        return waiter
+
+    def _finish_wait_locked(self, waiter: _SlotWaiter, waited: float) -> bool:
+        """대기 종료 (깨어남 / 시간 초과 / 취소), slot 을 넘겨받았으면 True"""
+        if waiter.granted:
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            return True
+        self._waiters.remove(waiter)
+        self.queue_depth -= 1
+        return False
+
+    def _saturated(self, timeout: float) -> ExecutorSaturatedError:
+        return ExecutorSaturatedError(
+            f"[{self.name}] 동시 실행 한도({self.max_concurrency}) 초과, {timeout:.1f}초 대기 후 거절"
+        )
+
+    def _acquire(self, timeout: float):
+        start = time.monotonic()
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            event = threading.Event()
+            waiter = self._enqueue_locked(event.set)
+        event.wait(timeout)
+        with self._lock:
+            acquired = self._finish_wait_locked(waiter, time.monotonic() - start)
+            self.rejected += not acquired
+        if not acquired:
+            raise self._saturated(timeout)
+
+    async def _async_acquire(self, timeout: float):
+        """이벤트 루프 안에서 대기 (스레드를 점유하지 않음)"""
+        start = time.monotonic()
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            waiter = self._enqueue_locked(lambda: loop.call_soon_threadsafe(_resolve, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # 대기 중 요청이 취소되어도, 그 사이 넘겨받은 slot 은 반납
+            with self._lock:
+                granted = self._finish_wait_locked(waiter, time.monotonic() - start)
+            if granted:
+                self._release()
+            raise
+        with self._lock:
+            acquired = self._finish_wait_locked(waiter, time.monotonic() - start)
+            self.rejected += not acquired
+        if not acquired:
+            raise self._saturated(timeout)
+
+    def _release(self):
+        with self._lock:
+            if not self._waiters:
+                self.in_flight -= 1
+                self._available += 1
+                return
+            waiter = self._waiters.popleft()  # in_flight 유지, slot 을 그대로 넘김
+            self.queue_depth -= 1
+            waiter.granted = True
+        try:
+            waiter.notify()
+        except RuntimeError:  # 대기자의 이벤트 루프가 이미 닫힘
+            self._release()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """동기 호출자가 직접 수행하는 작업을 전역 한도 안에서 실행"""
+        self._acquire(self.queue_timeout)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self):
+        """비동기 호출자용 slot (대기는 이벤트 루프 안에서, queue_timeout 을 넘기면 거절)"""
+        await self._async_acquire(self.queue_timeout)
+        try:
+            yield
+        finally:
+            self._release()
+
+    # ─────────────────────────────
+    # 작업 제출
+    # ─────────────────────────────
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        self._acquire(self.queue_timeout)
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "avg_wait_ms": self.total_wait / self.acquired * 1000 if self.acquired else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
@@ -1,6 +1,7 @@
 console.log("✅ index.js Loaded");
 
 let currentUser = null;
+let authToken = null; // 로그인 시 서버가 발급한 토큰 (보안등급 / 검색 기록은 이 토큰으로 확인)
 let timerInterval = null;
 let timeLeft = 1200;
 let isSidebarCollapsed = false;
@@ -12,7 +13,27 @@ let currentSessionId = Date.now(); // 🕒 현재 활성 세션의 고유 ID (Ti
 let isHistoryLoaded = false; // 🚩 현재 세션이 히스토리에서 로드된 상태인지 추적
 let isThinkingOrTyping = false; // 🚩 AI가 처리 중인지 확인하는 상태
 
-// 세션을 저장할 Mock DB (실제는 서버/DB 사용)
+// 로그인 토큰을 실은 요청 헤더
+function authHeaders(extra = {}) {
+    return authToken ? {...extra, "Authorization": `Bearer ${authToken}`} : extra;
+}
+
+// 모델 출력 / 문서 메타데이터는 HTML 로 해석하지 않고 텍스트로 삽입
+function escapeHtml(text) {
+    return String(text ?? "").replace(/[&<>"']/g, ch => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[ch]));
+}
+
+// 답변 본문은 textContent, 스트리밍 커서는 별도 요소
+function renderAnswer(contentDiv, text, streaming = false) {
+    contentDiv.textContent = text;
+    if (streaming) {
+        const cursor = document.createElement('span');
+        cursor.className = "cursor";
+        contentDiv.appendChild(cursor);
+    }
+}
+
+// 세션별 대화 내용 (서버 기록은 /history/{session_id} 로 불러와서 채움)
 let MOCK_HISTORY_DB = {}; 
 
 // 🚩 [수정 강화] 컨트롤 상태 관리 함수: 입력창 비활성화/활성화 및 포커스 관리
@@ -63,12 +84,14 @@ async function checkLogin() {
         const data = await res.json();
         if (data.success) {
             currentUser = id;
+            authToken = data.token;
             document.getElementById('auth-layer').classList.add('hidden');
             document.getElementById('main-app').classList.remove('hidden');
             document.getElementById('display-username').innerText = id;
             document.getElementById('full-email').innerText = id + "@cnhxo.com";
             startTimer();
             resetChat();
+            loadServerHistory();
         } else {
             alert("❌ " + data.message);
         }
@@ -125,10 +148,13 @@ function updateTimer() {
     document.getElementById('timer').innerText = `${String(m).padStart(2,'0')}:${String(s).padStart(2,'0')}`;
 }
 function logout() {
-    currentUser = null; stopTimer();
+    if (authToken) fetch("/auth/logout", {method: "POST", headers: authHeaders()}).catch(e => console.error(e));
+    currentUser = null; authToken = null; stopTimer();
     document.getElementById('main-app').classList.add('hidden');
     document.getElementById('auth-layer').classList.remove('hidden');
     document.getElementById('loginId').value=""; document.getElementById('loginPw').value="";
+    MOCK_HISTORY_DB = {};
+    document.getElementById('history-list').innerHTML = "";
     resetChat();
 }
 
@@ -177,7 +203,7 @@ async function performSearch() {
     userBubble.onclick = () => restoreDocs(qId);
     userBubble.innerHTML = `
         <div class="msg-label">User • ${timeString} (클릭하여 문서 보기)</div>
-        <div class="msg-text">${query}</div>
+        <div class="msg-text">${escapeHtml(query)}</div>
     `;
     chatContainer.appendChild(userBubble);
     chatContainer.scrollTop = chatContainer.scrollHeight;
@@ -197,69 +223,100 @@ async function performSearch() {
     chatContainer.appendChild(thinkingBubble);
     chatContainer.scrollTop = chatContainer.scrollHeight;
 
-    // 4. 🚩 더미 지연 시간 설정 (1000ms ~ 5000ms)
-    const dummyDelay = Math.floor(Math.random() * 4000) + 1000;
-    
-    let data;
-    try {
-        const [apiResponse] = await Promise.all([
-            fetch("/search/documents", {
-                method: "POST", headers: {"Content-Type":"application/json"},
-                body: JSON.stringify({question: query})
-            }).then(res => res.json()),
-            new Promise(resolve => setTimeout(resolve, dummyDelay))
-        ]);
-        data = apiResponse;
-        
-    } catch(e) {
-        console.error(e);
+    // 4. 🚩 SSE 스트리밍 요청 (문서 목록 → 답변 토큰 순서로 수신)
+    let aiBubble = null;
+    let contentDiv = null;
+    let answer = "";
+    let docs = [];
+
+    // 문서 목록 수신 즉시 모션 제거 + 답변 말풍선 준비
+    const showAnswerBubble = () => {
         const thinkingElement = document.getElementById(thinkingBubbleId);
         if (thinkingElement) thinkingElement.remove();
-        
-        const aiBubble = document.createElement('div');
+
+        aiBubble = document.createElement('div');
         aiBubble.className = "chat-message ai";
         aiBubble.id = `ai-msg-${qId}`;
         aiBubble.innerHTML = `
+            <div class="ai-header"><i class="fas fa-star-of-life"></i> AI 답변</div>
+            <div class="ai-content"><span class="cursor"></span></div>
+        `;
+        chatContainer.appendChild(aiBubble);
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+        contentDiv = aiBubble.querySelector('.ai-content');
+    };
+
+    try {
+        const res = await fetch("/search/documents/stream", {
+            method: "POST", headers: authHeaders({"Content-Type":"application/json"}),
+            body: JSON.stringify({question: query, session_id: String(currentSessionId)})
+        });
+        if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let sep;
+            while ((sep = buffer.indexOf("\n\n")) >= 0) {
+                const { event, data } = parseSseEvent(buffer.slice(0, sep));
+                buffer = buffer.slice(sep + 2);
+
+                if (event === "documents") {
+                    docs = data.documents;
+                    showAnswerBubble();
+                    renderDocs(docs);
+                } else if (event === "summary" && docs[data.index]) {
+                    docs[data.index].summary = data.summary;
+                    renderDocs(docs);
+                } else if (event === "done" && data.answer !== undefined) {
+                    answer = data.answer; // 서버에서 정제한 최종 답변 (비스트리밍 / 캐시 응답과 동일)
+                } else if (event === "token" && contentDiv) {
+                    answer += data.text;
+                    renderAnswer(contentDiv, answer, true);
+                    chatContainer.scrollTop = chatContainer.scrollHeight;
+                }
+            }
+        }
+    } catch(e) {
+        console.error(e);
+        const thinkingElement = document.getElementById(thinkingBubbleId);
+        if (thinkingElement) thinkingElement.remove();
+        if (aiBubble) aiBubble.remove();
+
+        const errorBubble = document.createElement('div');
+        errorBubble.className = "chat-message ai";
+        errorBubble.id = `ai-msg-${qId}`;
+        errorBubble.innerHTML = `
             <div class="ai-header" style="color:#e74c3c;"><i class="fas fa-times-circle"></i> AI 답변 (오류)</div>
             <div class="ai-content">통신 오류가 발생했습니다. 잠시 후 다시 시도해 주세요.</div>
         `;
-        chatContainer.appendChild(aiBubble);
+        chatContainer.appendChild(errorBubble);
         setControlsDisabled(false); // 오류 시 컨트롤 활성화
         return;
     }
-    
-    // 6. 더미 지연 및 서버 요청 완료 후 모션 제거
-    const thinkingElement = document.getElementById(thinkingBubbleId);
-    if (thinkingElement) thinkingElement.remove();
-
-    // 7. AI 답변 준비 (빈 상태로 추가)
-    const aiBubble = document.createElement('div');
-    aiBubble.className = "chat-message ai";
-    aiBubble.id = `ai-msg-${qId}`;
-    aiBubble.innerHTML = `
-        <div class="ai-header"><i class="fas fa-star-of-life"></i> AI 답변</div>
-        <div class="ai-content"><span class="cursor"></span></div>
-    `;
-    chatContainer.appendChild(aiBubble);
-    chatContainer.scrollTop = chatContainer.scrollHeight;
-    
-    // 8. 데이터 저장
+
+    // 5. 🚩 스트림 완료: 커서 제거 후 컨트롤 활성화
+    if (!aiBubble) showAnswerBubble();
+    renderAnswer(contentDiv, answer);
+    setControlsDisabled(false);
+
+    // 6. 데이터 저장
     const sessionItem = {
         id: qId,
         question: query,
-        answer: data.llm_response,
-        docs: data.documents,
+        answer: answer,
+        docs: docs,
         timestamp: now,
         sessionId: currentSessionId
     };
     currentSessionData.push(sessionItem);
 
-    // 9. 타이핑 효과 시작 (완료되면 setControlsDisabled(false) 호출)
-    const contentDiv = aiBubble.querySelector('.ai-content');
-    typeWriter(data.llm_response, contentDiv, 0);
-
-    // 10. 문서 패널 업데이트 및 히스토리 갱신
-    renderDocs(data.documents);
+    // 7. 히스토리 갱신
     if (currentSessionData.length === 1 && !isHistoryLoaded) {
         MOCK_HISTORY_DB[currentSessionId] = currentSessionData;
         addToSidebar(currentSessionData, currentSessionId);
@@ -269,22 +326,15 @@ async function performSearch() {
     }
 }
 
-// ✅ [최종] 불규칙 타이핑 효과 + 완료 시 컨트롤 활성화
-function typeWriter(text, element, index) { 
-    if (index < text.length) {
-        element.innerHTML = text.substring(0, index + 1) + '<span class="cursor"></span>';
-        const randomDelay = Math.floor(Math.random() * 90) + 10;
-        
-        setTimeout(() => {
-            typeWriter(text, element, index + 1);
-            const container = document.getElementById('chat-container');
-            container.scrollTop = container.scrollHeight;
-        }, randomDelay);
-    } else {
-        // 🚩 [핵심] 타이핑 완료: 커서 제거 후 컨트롤 활성화
-        element.innerHTML = text; // 커서 제거
-        setControlsDisabled(false); 
-    }
+// ✅ SSE 이벤트 블록 파싱 ("event: ...\ndata: {...}")
+function parseSseEvent(rawEvent) {
+    let event = "message";
+    let data = "";
+    rawEvent.split("\n").forEach(line => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+    });
+    return { event, data: data ? JSON.parse(data) : {} };
 }
 
 function renderDocs(docs) {
@@ -298,16 +348,24 @@ function renderDocs(docs) {
     docs.forEach(doc => {
         html += `
         <div class="result-card">
-            <div class="result-title">📄 ${doc.file_name}</div>
-            <div class="result-meta">📅 ${doc.date} | 등급: ${doc.grade} | 정확도: ${doc.accuracy}</div>
-            <div class="clickable-path" onclick="alert('경로 복사: ${doc.path.replace(/\\/g, '\\\\')}')">
-                📂 ${doc.path}
+            <div class="result-title">📄 ${escapeHtml(doc.file_name)}</div>
+            <div class="result-meta">📅 ${escapeHtml(doc.date)} | 등급: ${escapeHtml(doc.grade)} | 정확도: ${escapeHtml(doc.accuracy)}</div>
+            <div class="clickable-path" data-path="${escapeHtml(doc.path)}" onclick="alert('경로 복사: ' + this.dataset.path)">
+                📂 ${escapeHtml(doc.path)}
             </div>
+            ${renderSummary(doc)}
         </div>`;
     });
     docDiv.innerHTML = html;
 }
 
+// ✅ 문서 요약 (null: 생성 중, 키 없음: 요약 비활성화)
+function renderSummary(doc) {
+    if (!("summary" in doc)) return "";
+    const text = doc.summary === null ? "⏳ 요약 생성 중..." : doc.summary;
+    return `<div class="result-summary" style="margin-top:6px; color:#555; font-size:0.9em;">📝 ${escapeHtml(text)}</div>`;
+}
+
 function restoreDocs(qId) {
     const item = currentSessionData.find(d => d.id === qId);
     if(item) {
@@ -370,11 +428,14 @@ function addToSidebar(sessionData, sessionId) {
 
     const firstItem = sessionData[0];
     const lastItem = sessionData[sessionData.length - 1];
-    
-    const title = firstItem.question;
+    renderSidebarItem(sessionId, firstItem.question, firstItem.timestamp, lastItem.timestamp, false);
+}
+
+// ✅ 사이드바 항목 생성/갱신 (서버 목록은 최신순으로 받으므로 append)
+function renderSidebarItem(sessionId, title, startDate, endDate, append) {
     const formatTime = (date) => date.toLocaleDateString() + " " + date.toLocaleTimeString([], {hour:'2-digit', minute:'2-digit'});
-    const startTime = formatTime(firstItem.timestamp);
-    const endTime = formatTime(lastItem.timestamp);
+    const startTime = formatTime(startDate);
+    const endTime = formatTime(endDate);
     const tooltipText = `시작: ${startTime}\n마지막: ${endTime}`;
 
     const listDiv = document.getElementById('history-list');
@@ -398,12 +459,42 @@ function addToSidebar(sessionData, sessionId) {
     // 휴지통 버튼 추가 (이전 HTML 수정본과 동일)
     div.innerHTML = `
         <div style="display:flex; justify-content:space-between; align-items:center;">
-            <span class="item-content"><i class="far fa-comments"></i> <span class="item-title">${title}</span></span>
+            <span class="item-content"><i class="far fa-comments"></i> <span class="item-title">${escapeHtml(title)}</span></span>
             <i class="fas fa-trash-alt delete-btn" onclick="deleteHistory(event, '${sessionId}')"></i>
         </div>
     `;
 
-    listDiv.prepend(div);
+    if (append) listDiv.appendChild(div);
+    else listDiv.prepend(div);
+}
+
+// ✅ 로그인 시 서버에 저장된 검색 기록 목록 불러오기
+async function loadServerHistory() {
+    try {
+        const res = await fetch("/history/list", {headers: authHeaders()});
+        if (!res.ok) return;
+        const data = await res.json();
+        data.history.forEach(session => {
+            renderSidebarItem(
+                session.session_id, session.title,
+                new Date(session.created_at * 1000), new Date(session.updated_at * 1000), true
+            );
+        });
+    } catch(e) { console.error(e); }
+}
+
+async function fetchServerSession(sessionId) {
+    const res = await fetch(`/history/${encodeURIComponent(sessionId)}`, {headers: authHeaders()});
+    if (!res.ok) return null;
+    const data = await res.json();
+    return data.turns.map((turn, i) => ({
+        id: i,
+        question: turn.question,
+        answer: turn.answer,
+        docs: turn.documents,
+        timestamp: new Date(turn.created_at * 1000),
+        sessionId: sessionId
+    }));
 }
 
 function updateSidebarItem(sessionId, sessionData) {
@@ -416,9 +507,11 @@ function deleteHistory(event, sessionId) { /* ... (기존과 동일) ... */
     event.stopPropagation(); 
     const itemToDelete = document.getElementById(`history-item-${sessionId}`);
     if (itemToDelete) {
-        const confirmDelete = confirm("정말로 이 대화 기록을 삭제하시겠습니까?\n\n(참고: 이 기능은 프론트엔드 목업이므로 페이지 새로고침 시 복구될 수 있습니다.)");
+        const confirmDelete = confirm("정말로 이 대화 기록을 삭제하시겠습니까?");
         if (confirmDelete) {
             delete MOCK_HISTORY_DB[sessionId];
+            fetch(`/history/${encodeURIComponent(sessionId)}`, {method: "DELETE", headers: authHeaders()})
+                .catch(e => console.error(e));
             itemToDelete.remove();
             if (currentSessionId.toString() === sessionId) {
                 resetChat();
@@ -430,9 +523,14 @@ function deleteHistory(event, sessionId) { /* ... (기존과 동일) ... */
 
 
 // ✅ [수정] 히스토리 클릭 시 로드 (이탈 시 자동 갱신 로직 추가)
-function loadHistorySession(sessionId) {
-    const sessionData = MOCK_HISTORY_DB[sessionId];
-    if (!sessionData) return;
+async function loadHistorySession(sessionId) {
+    let sessionData = MOCK_HISTORY_DB[sessionId];
+    if (!sessionData) {
+        // 이전 로그인에서 저장된 세션 → 서버에서 불러오기
+        sessionData = await fetchServerSession(sessionId);
+        if (!sessionData || sessionData.length === 0) return;
+        MOCK_HISTORY_DB[sessionId] = sessionData;
+    }
     
     // 🚩 현재 작업 중이던 세션이 있다면 MOCK_HISTORY_DB에 저장/갱신 (자동 저장)
     if (currentSessionData.length > 0 && currentSessionId.toString() !== sessionId) {
@@ -444,6 +542,7 @@ function loadHistorySession(sessionId) {
     currentSessionId = sessionId;
     isHistoryLoaded = true;
     currentSessionData = sessionData;
+    chatCounter = Math.max(chatCounter, ...sessionData.map(item => item.id + 1));
     
     const chatContainer = document.getElementById('chat-container');
     chatContainer.innerHTML = ""; 
@@ -454,12 +553,12 @@ function loadHistorySession(sessionId) {
         const userBubble = document.createElement('div');
         userBubble.className = "chat-message user";
         userBubble.onclick = () => restoreDocs(item.id);
-        userBubble.innerHTML = `<div class="msg-label">User • ${timeString}</div><div class="msg-text">${item.question}</div>`;
+        userBubble.innerHTML = `<div class="msg-label">User • ${timeString}</div><div class="msg-text">${escapeHtml(item.question)}</div>`;
         chatContainer.appendChild(userBubble);
 
         const aiBubble = document.createElement('div');
         aiBubble.className = "chat-message ai";
-        aiBubble.innerHTML = `<div class="ai-header"><i class="fas fa-star-of-life"></i> AI 답변</div><div class="ai-content">${item.answer}</div>`;
+        aiBubble.innerHTML = `<div class="ai-header"><i class="fas fa-star-of-life"></i> AI 답변</div><div class="ai-content">${escapeHtml(item.answer)}</div>`;
         chatContainer.appendChild(aiBubble);
     });
 
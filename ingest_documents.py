@@ -0,0 +1,326 @@
+"""
+JSONL 문서 → 청크 분할 → 임베딩 → Qdrant 적재 (재시작 가능, 변경 없는 문서는 건너뜀)
+
+입력 (한 줄에 문서 하나, PDF/DOCX/XLSX 에서 미리 추출한 텍스트):
+    {"sFileName": "24년_1월_설비기술그룹_활동_일지.pdf", "sFilePath": "\\\\NAS\\...", "sGrade": "B",
+     "text": "..." 또는 "pages": ["1쪽 본문", "2쪽 본문", ...],
+     "doc_id": 선택, "year"/"month"/"day": 선택 (없으면 파일명에서 추출), "keywords": 선택 (없으면 파일명에서 추출)}
+
+실행 (저장소 루트에서):
+    python -m ingest_documents data/*.jsonl
+    python -m ingest_documents data/docs.jsonl --restart   # 체크포인트 무시하고 처음부터 (변경 없는 문서는 여전히 건너뜀)
+"""
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import argparse
+import resource
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Batch, PointIdsList
+
+from collection_bootstrap import (
+    bump_ingest_version, create_collection_kwargs, date_ordinal, ensure_payload_indexes, has_sparse_vectors,
+)
+from executor_utils import BoundedExecutor
+from keyword_extractor import LocalKeywordExtractor, extract_date_parts
+from sparse_utils import SPARSE_VECTOR_NAME, document_sparse_text, document_sparse_vector
+
+# ✅ 적재 설정
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "800"))  # 글자 수
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "100"))
+INGEST_ENCODE_BATCH = int(os.getenv("INGEST_ENCODE_BATCH", "512"))  # encode 1회에 넘기는 청크 수
+INGEST_MODEL_BATCH = int(os.getenv("INGEST_MODEL_BATCH", "64"))  # SentenceTransformer 내부 batch_size
+INGEST_UPSERT_BATCH = int(os.getenv("INGEST_UPSERT_BATCH", "256"))
+INGEST_UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", "4"))
+INGEST_STATE_PATH = os.getenv("INGEST_STATE_PATH", "ingest_state.sqlite3")
+
+SENTENCE_END = re.compile(r"[.!?。]\s")
+filename_keyword_extractor = LocalKeywordExtractor()
+
+
+# ─────────────────────────────
+# ✅ 청크 분할 / payload 구성
+# ─────────────────────────────
+def chunk_text(text: str, size: int = INGEST_CHUNK_SIZE, overlap: int = INGEST_CHUNK_OVERLAP) -> List[str]:
+    """size 글자 이내로 분할 (가능하면 문장 끝에서 자르고, 앞 청크와 overlap 글자 겹침)"""
+    text = " ".join((text or "").split())
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            boundaries = list(SENTENCE_END.finditer(text, start + size // 2, end))
+            if boundaries:
+                end = boundaries[-1].start() + 1
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        overlap_start = max(end - overlap, start + 1)
+        space = text.find(" ", overlap_start, end)
+        start = space + 1 if space >= 0 else overlap_start  # 단어 중간에서 시작하지 않도록
+    return [chunk for chunk in chunks if chunk]
+
+
+def document_key(record: Dict) -> str:
+    return str(record.get("doc_id") or record.get("sFilePath") or record["sFileName"])
+
+
+def document_hash(record: Dict) -> str:
+    return hashlib.sha256(json.dumps(record, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def point_id(key: str, chunk_index: int) -> str:
+    """문서 키 + 청크 순번 → 고정 ID (재적재 시 같은 포인트를 덮어씀)"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{key}#{chunk_index}"))
+
+
+def filename_metadata(file_name: str) -> Tuple[Optional[int], Optional[int], Optional[int], List[str]]:
+    """파일명 (예: 24년_1월_설비기술그룹_활동_일지.pdf) → 연, 월, 일, 키워드"""
+    stem = os.path.splitext(file_name)[0].replace("_", " ")
+    year, month, day, rest = extract_date_parts(stem)
+    keywords, _ = filename_keyword_extractor.extract(rest)
+    return year, month, day, keywords
+
+
+def build_document_payload(record: Dict, key: str, content_hash: str) -> Dict:
+    year, month, day, keywords = filename_metadata(record["sFileName"])
+    year, month, day = record.get("year", year), record.get("month", month), record.get("day", day)
+    return {
+        "doc_id": key,
+        "sFileName": record["sFileName"],
+        "sFilePath": record.get("sFilePath", ""),
+        "sGrade": record.get("sGrade", ""),
+        "year": year,
+        "month": month,
+        "day": day,
+        "date_ordinal": date_ordinal(year, month, day) if year else None,
+        "keywords": record.get("keywords") or keywords,
+        "content_hash": content_hash,
+    }
+
+
+def build_chunks(record: Dict) -> List[Tuple[int, str]]:
+    """(nPage, 청크 본문) 목록 — pages 가 있으면 쪽 단위로 분할"""
+    pages = record.get("pages") or [record.get("text", "")]
+    return [(page_no, chunk) for page_no, page in enumerate(pages, start=1) for chunk in chunk_text(page)]
+
+
+# ─────────────────────────────
+# ✅ 적재 상태 (문서별 content hash + 입력 파일별 체크포인트)
+# ─────────────────────────────
+class IngestState:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_key TEXT PRIMARY KEY, content_hash TEXT NOT NULL, n_points INTEGER NOT NULL, ingested_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "input_path TEXT PRIMARY KEY, byte_offset INTEGER NOT NULL, updated_at REAL NOT NULL);"
+        )
+
+    def document(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT content_hash, n_points FROM documents WHERE doc_key = ?", (key,)
+            ).fetchone()
+
+    def checkpoint(self, input_path: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT byte_offset FROM checkpoints WHERE input_path = ?", (input_path,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def commit(self, documents: List[Tuple[str, str, int]], input_path: str, byte_offset: int):
+        """적재 완료된 문서들과 체크포인트를 한 트랜잭션으로 기록"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (doc_key, content_hash, n_points, ingested_at) VALUES (?, ?, ?, ?)",
+                [(key, content_hash, n_points, now) for key, content_hash, n_points in documents],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (input_path, byte_offset, updated_at) VALUES (?, ?, ?)",
+                (input_path, byte_offset, now),
+            )
+
+    def reset(self, input_path: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM checkpoints WHERE input_path = ?", (input_path,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def read_jsonl(path: str, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """(레코드, 이 줄 다음 바이트 위치) — offset 부터 이어서 읽기"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if line.strip():
+                yield json.loads(line), f.tell()
+
+
+# ─────────────────────────────
+# ✅ 적재기 (encode 는 호출 스레드, upsert 는 병렬 / 앞선 배치가 모두 끝나야 체크포인트 전진)
+# ─────────────────────────────
+class DocumentIngestor:
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        encode_fn: Callable[[List[str]], object],
+        state: IngestState,
+        encode_batch: int = INGEST_ENCODE_BATCH,
+        upsert_batch: int = INGEST_UPSERT_BATCH,
+        upsert_workers: int = INGEST_UPSERT_WORKERS,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.encode_fn = encode_fn
+        self.state = state
+        self.encode_batch = encode_batch
+        self.upsert_batch = upsert_batch
+        # 포화 시 submit 이 대기 → encode 가 upsert 보다 너무 앞서 나가지 않음
+        self.executor = BoundedExecutor("ingest", upsert_workers, upsert_workers * 2, queue_timeout=600)
+        self._in_flight = deque()  # (futures, 문서 목록, 입력 파일, 바이트 위치)
+        self.sparse = False  # 컬렉션에 bm25 희소 벡터가 있으면 함께 기록
+        self.stats = {"documents": 0, "skipped": 0, "chunks": 0, "encode_sec": 0.0}
+
+    def ensure_collection(self, dim: int):
+        if not self.client.collection_exists(self.collection_name):
+            self.client.create_collection(self.collection_name, **create_collection_kwargs(dim))
+        ensure_payload_indexes(self.client, self.collection_name)
+        self.sparse = has_sparse_vectors(self.client, self.collection_name)
+
+    def ingest_file(self, path: str, restart: bool = False):
+        input_path = os.path.abspath(path)
+        if restart:
+            self.state.reset(input_path)
+
+        ids, texts, payloads, documents = [], [], [], []
+        byte_offset = self.state.checkpoint(input_path)
+        for record, byte_offset in read_jsonl(input_path, byte_offset):
+            key, content_hash = document_key(record), document_hash(record)
+            previous = self.state.document(key)
+            if previous is not None and previous[0] == content_hash:
+                self.stats["skipped"] += 1
+                continue
+
+            base = build_document_payload(record, key, content_hash)
+            chunks = build_chunks(record)
+            for chunk_index, (page_no, chunk) in enumerate(chunks):
+                ids.append(point_id(key, chunk_index))
+                texts.append(chunk)
+                payloads.append({**base, "nPage": page_no, "chunk_index": chunk_index, "text": chunk})
+            stale = [point_id(key, i) for i in range(len(chunks), previous[1])] if previous else []
+            documents.append((key, content_hash, len(chunks), stale))
+            self.stats["documents"] += 1
+
+            if len(texts) >= self.encode_batch:
+                self._flush(ids, texts, payloads, documents, input_path, byte_offset)
+                ids, texts, payloads, documents = [], [], [], []
+
+        self._flush(ids, texts, payloads, documents, input_path, byte_offset)
+        self._drain(wait_all=True)
+
+    def _flush(self, ids, texts, payloads, documents, input_path: str, byte_offset: int):
+        futures = []
+        if texts:
+            start = time.perf_counter()
+            vectors = self.encode_fn(texts)
+            self.stats["encode_sec"] += time.perf_counter() - start
+            self.stats["chunks"] += len(texts)
+            for i in range(0, len(texts), self.upsert_batch):
+                batch_vectors = vectors[i:i + self.upsert_batch].tolist()
+                if self.sparse:
+                    batch_vectors = {"": batch_vectors, SPARSE_VECTOR_NAME: [
+                        document_sparse_vector(document_sparse_text(payload))
+                        for payload in payloads[i:i + self.upsert_batch]
+                    ]}
+                futures.append(self.executor.submit(
+                    self.client.upsert,
+                    self.collection_name,
+                    points=Batch(
+                        ids=ids[i:i + self.upsert_batch],
+                        vectors=batch_vectors,
+                        payloads=payloads[i:i + self.upsert_batch],
+                    ),
+                ))
+        stale = [pid for *_, doc_stale in documents for pid in doc_stale]
+        if stale:  # 청크 수가 줄어든 문서의 남은 포인트 삭제
+            futures.append(self.executor.submit(
+                self.client.delete, self.collection_name, points_selector=PointIdsList(points=stale)
+            ))
+        self._in_flight.append((futures, [doc[:3] for doc in documents], input_path, byte_offset))
+        self._drain()
+
+    def _drain(self, wait_all: bool = False):
+        while self._in_flight and (wait_all or all(f.done() for f in self._in_flight[0][0])):
+            futures, documents, input_path, byte_offset = self._in_flight.popleft()
+            for future in futures:
+                future.result()  # 실패 시 예외 → 체크포인트는 마지막 성공 배치에 머무름
+            self.state.commit(documents, input_path, byte_offset)
+            if documents:  # 검색 서버 응답 캐시 무효화 (포인트 수가 그대로인 재적재 포함)
+                bump_ingest_version(self.client, self.collection_name)
+
+
+def peak_memory_mb() -> Dict[str, float]:
+    memory = {"rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    try:
+        import torch
+        if torch.cuda.is_available():
+            memory["cuda_mb"] = torch.cuda.max_memory_allocated() / 1024 / 1024
+    except ImportError:
+        pass
+    return memory
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="+", help="JSONL 파일")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default="docs_test_all")
+    parser.add_argument("--state", default=INGEST_STATE_PATH)
+    parser.add_argument("--restart", action="store_true")
+    args = parser.parse_args()
+
+    from embedding_utils import embedding_dimension, encode_and_clear
+
+    client = QdrantClient(host=args.host, port=args.port, timeout=120)
+    state = IngestState(args.state)
+    ingestor = DocumentIngestor(
+        client, args.collection, lambda texts: encode_and_clear(texts, batch_size=INGEST_MODEL_BATCH), state
+    )
+    ingestor.ensure_collection(embedding_dimension())
+
+    start = time.perf_counter()
+    for path in args.inputs:
+        ingestor.ingest_file(path, restart=args.restart)
+        print(f"📄 {path}: 누적 적재 {ingestor.stats['documents']}건, 건너뜀 {ingestor.stats['skipped']}건")
+    elapsed = time.perf_counter() - start
+    state.close()
+
+    stats = ingestor.stats
+    print(f"\n📊 문서 {stats['documents']}건 / 청크 {stats['chunks']}개 / 건너뜀 {stats['skipped']}건, {elapsed:.1f}s")
+    print(f"  처리량: {stats['documents'] / elapsed:.1f} docs/s, {stats['chunks'] / elapsed:.1f} chunks/s "
+          f"(encode {stats['encode_sec']:.1f}s)")
+    print(f"  최대 메모리: {peak_memory_mb()}")
+
+
+if __name__ == "__main__":
+    main()
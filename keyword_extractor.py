@@ -0,0 +1,169 @@
+import re
+from typing import Container, Iterable, List, Optional, Tuple
+
+
+# ✅ 날짜 표현 → 숫자 ("23년도" → 2023, "1월" → 1, "15일" → 15, "2024.01.15")
+# 구분자 형식은 4자리 연도만 인정 ("10.5", "3.10.2" 같은 수치 / 버전은 날짜 아님, 2자리 연도는 "23년" 형식만)
+FULL_DATE_PATTERN = re.compile(r"(?<![\d.])((?:19|20)\d{2})[./-](\d{1,2})(?:[./-](\d{1,2}))?(?!\.?\d)")
+YEAR_PATTERN = re.compile(r"(?<!\d)(\d{4}|\d{2})\s*년(?:도)?")
+MONTH_PATTERN = re.compile(r"(?<!\d)(\d{1,2})\s*월")
+DAY_PATTERN = re.compile(r"(?<!\d)(\d{1,2})\s*일")
+
+# 조사 / 어미 (긴 것부터 제거)
+PARTICLES = sorted(
+    ["에서는", "으로는", "에서", "으로", "에게", "까지", "부터", "처럼", "보다", "이나", "에는", "와의", "과의",
+     "은", "는", "이", "가", "을", "를", "의", "에", "로", "와", "과", "도", "만", "랑", "나"],
+    key=len, reverse=True,
+)
+# 검색 의도와 무관한 요청 표현
+STOPWORDS = {
+    "관련", "관련된", "대한", "대해", "대해서", "내용", "자료", "문서", "알려줘", "알려주세요", "보여줘", "보여주세요",
+    "찾아줘", "찾아주세요", "정리", "정리해줘", "요약", "요약해줘", "있어", "있나요", "있는", "어떤", "무엇", "뭐야",
+    "해줘", "주세요", "좀", "그리고", "및", "또는",
+}
+MIN_TERM_LENGTH = 2
+# 명사의 끝 글자로도 흔한 조사 (결과, 온도, 회로, 회의, 평가 ...) — 사전에 없는 단어에서는 남는 부분이 충분히 길 때만 제거
+AMBIGUOUS_PARTICLE_HEADS = {"과", "와", "도", "이", "가", "나", "만", "로", "의", "랑"}
+AMBIGUOUS_MIN_STEM_LENGTH = 4
+
+
+def normalize_year(value: str) -> int:
+    year = int(value)
+    return 2000 + year if year < 100 else year
+
+
+def extract_date_parts(text: str) -> Tuple[Optional[int], Optional[int], Optional[int], str]:
+    """(연, 월, 일, 날짜 표현을 제거한 나머지 문장) — 없는 항목은 None"""
+    year = month = day = None
+
+    match = FULL_DATE_PATTERN.search(text)
+    if match and 1 <= int(match.group(2)) <= 12:
+        year, month = normalize_year(match.group(1)), int(match.group(2))
+        if match.group(3) and 1 <= int(match.group(3)) <= 31:
+            day = int(match.group(3))
+        text = text[:match.start()] + " " + text[match.end():]
+
+    for pattern, slot in ((YEAR_PATTERN, "year"), (MONTH_PATTERN, "month"), (DAY_PATTERN, "day")):
+        match = pattern.search(text)
+        if not match:
+            continue
+        value = int(match.group(1))
+        if slot == "year" and year is None:
+            year = normalize_year(match.group(1))
+        elif slot == "month" and month is None and 1 <= value <= 12:
+            month = value
+        elif slot == "day" and day is None and 1 <= value <= 31:
+            day = value
+        else:
+            continue
+        text = text[:match.start()] + " " + text[match.end():]
+
+    return year, month, day, text
+
+
+def extract_dates(text: str) -> Tuple[List[str], str]:
+    """날짜 키워드 (연, 월, 일 순) 와 날짜 표현을 제거한 나머지 문장"""
+    year, month, day, text = extract_date_parts(text)
+    return [str(v) for v in (year, month, day) if v is not None], text
+
+
+def particle_stripped_candidates(token: str) -> List[str]:
+    """원형 + 조사를 떼어낸 후보들 (긴 조사부터)"""
+    return [token] + [
+        token[:-len(particle)]
+        for particle in PARTICLES
+        if token.endswith(particle) and len(token) - len(particle) >= MIN_TERM_LENGTH
+    ]
+
+
+def strip_particles(token: str, vocabulary: Container[str] = ()) -> str:
+    """조사를 가장 길게 떼어낸 형태 ("설비에서는" → "설비", "는" 만 뗀 "설비에서" 가 아님)
+
+    명사 끝 글자와 겹치는 조사는 남는 부분이 사전 단어이거나 AMBIGUOUS_MIN_STEM_LENGTH 이상일 때만 제거
+    ("점검결과" → 그대로, "점검결과의" → "점검결과")
+    """
+    for stem in sorted(particle_stripped_candidates(token)[1:], key=len):
+        if (stem in vocabulary or token[len(stem)] not in AMBIGUOUS_PARTICLE_HEADS
+                or len(stem) >= AMBIGUOUS_MIN_STEM_LENGTH):
+            return stem
+    return token
+
+
+# ✅ Qdrant keywords payload 로 만든 복합명사 사전
+class KeywordVocabulary:
+    def __init__(self, terms: Iterable[str] = ()):
+        self.terms = set()
+        self.max_length = 0
+        self.add(terms)
+
+    def add(self, terms: Iterable[str]):
+        for term in terms:
+            term = str(term).strip()
+            if len(term) >= MIN_TERM_LENGTH:
+                self.terms.add(term)
+                self.max_length = max(self.max_length, len(term))
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.terms
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def segment(self, token: str) -> Optional[List[str]]:
+        """사전 단어로만 분할 가능하면 가장 적은 조각 수로 분할 (불가능하면 None)"""
+        n = len(token)
+        best: List[Optional[List[str]]] = [None] * (n + 1)
+        best[0] = []
+        for end in range(1, n + 1):
+            for start in range(max(0, end - self.max_length), end):
+                piece = token[start:end]
+                if best[start] is not None and piece in self.terms:
+                    candidate = best[start] + [piece]
+                    if best[end] is None or len(candidate) < len(best[end]):
+                        best[end] = candidate
+        return best[n]
+
+
+# ✅ 로컬 키워드 추출기 (LLM 프롬프트 규칙과 같은 출력 형식)
+class LocalKeywordExtractor:
+    def __init__(self, vocabulary: Optional[KeywordVocabulary] = None, min_confidence: float = 0.6):
+        self.vocabulary = vocabulary or KeywordVocabulary()
+        self.min_confidence = min_confidence
+
+    def extract(self, question: str) -> Tuple[List[str], float]:
+        """(키워드 목록, 신뢰도 0~1) — 신뢰도는 사전/날짜로 설명되는 토큰 비율"""
+        dates, rest = extract_dates(question)
+        rest = re.sub(r"[^\w\s]", " ", rest)
+
+        keywords = list(dates)
+        known = len(dates)
+        total = len(dates)
+        for raw_token in rest.split():
+            candidates = particle_stripped_candidates(raw_token)
+            stem = strip_particles(raw_token, self.vocabulary)
+            if stem in STOPWORDS or len(stem) < MIN_TERM_LENGTH:
+                continue
+            total += 1
+            pieces = self._resolve(candidates)
+            if pieces:
+                keywords.extend(pieces)
+                known += 1
+            else:
+                keywords.append(stem)  # 사전에 없는 단어는 조사만 떼고 그대로 사용
+
+        keywords = list(dict.fromkeys(keywords))
+        confidence = known / total if total else 0.0
+        return keywords, confidence
+
+    def _resolve(self, candidates: List[str]) -> Optional[List[str]]:
+        for candidate in candidates:
+            if candidate in self.vocabulary:
+                return [candidate]
+            pieces = self.vocabulary.segment(candidate)
+            if pieces:
+                return pieces
+        return None
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.min_confidence
+
@@ -1,22 +1,114 @@
 import os
+import json
+import asyncio
 import logging
 import random
 import time
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from embedding_utils import EMBEDDING_MODE, close_embedding_client, embedding_cache_stats, warm_up_embedding
+from executor_utils import ExecutorSaturatedError
+from metrics_utils import (
+    TraceIdFilter, current_stage_timings, end_trace, register_gauges, render_metrics, request_seconds,
+    server_timing_header, start_trace,
+)
+from qdrant_utils import async_ensure_payload_indexes, qdrant_executor
+from search_pipeline import run_search_pipeline, stream_search_pipeline, cache_stats, load_keyword_vocabulary
+from session_store import session_store
+from summary_utils import summary_store
+from vllm_utils import close_vllm_client
+
 # ─────────────────────────────
 # ✅ 로깅 설정
 # ─────────────────────────────
-logging.basicConfig(level=logging.INFO, format="%(message)s")
+# LOG_LEVEL=DEBUG 이면 검색 단계별 상세 로그 (질문/키워드 분류) 출력
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# 서버 시작 시 임베딩 워밍업 (local: 모델 로드 + CUDA 준비, remote: 임베딩 서버 연결 확인)
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "1") == "1"
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s [%(trace_id)s] %(name)s %(message)s")
+for handler in logging.getLogger().handlers:
+    handler.addFilter(TraceIdFilter())
 logger = logging.getLogger("uvicorn")
 
 app = FastAPI()
 
+# ✅ /metrics 에 함께 노출할 캐시 / 실행기 상태
+register_gauges("rag_cache", "검색 캐시 상태", "cache", lambda: {**cache_stats(), "query_embedding": embedding_cache_stats()})
+register_gauges("rag_executor", "Qdrant 동시 실행 상태", "executor", lambda: {"qdrant": qdrant_executor.stats()})
+register_gauges("rag_session", "세션 / 검색 기록 저장소 상태", "store", lambda: {"session": session_store.stats()})
+
+
+# ✅ 요청별 trace ID (X-Trace-Id 헤더로 전달/반환) + 처리 시간 / 단계별 시간 (Server-Timing)
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace_id, tokens = start_trace(request.headers.get("X-Trace-Id"))
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Trace-Id"] = trace_id
+        timings = current_stage_timings()
+        if timings:
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+    finally:
+        request_seconds.observe(time.perf_counter() - start, request.url.path, str(status))
+        end_trace(tokens)
+
+
+@app.on_event("startup")
+async def ensure_indexes():
+    try:
+        created = await async_ensure_payload_indexes()
+        if created:
+            logger.info(f"🗂️ payload 인덱스 생성 요청: {created}")
+    except Exception as e:
+        logger.warning(f"⚠️ payload 인덱스 확인 실패: {e}")
+
+
+@app.on_event("startup")
+async def load_vocabulary():
+    try:
+        logger.info(f"📚 키워드 사전 적재: {await load_keyword_vocabulary()}개")
+    except Exception as e:
+        logger.warning(f"⚠️ 키워드 사전 적재 실패 (LLM 키워드 추출로 동작): {e}")
+
+
+@app.on_event("startup")
+async def warm_up_embedding_model():
+    if not EMBEDDING_WARMUP:
+        return
+    try:
+        logger.info(f"🔥 임베딩 워밍업 ({EMBEDDING_MODE}): {await warm_up_embedding():.1f}s")
+    except Exception as e:
+        logger.warning(f"⚠️ 임베딩 워밍업 실패 (첫 요청에서 다시 시도): {e}")
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    await close_vllm_client()
+    close_embedding_client()
+    summary_store.close()
+    session_store.close()
+
+
+# ✅ Qdrant 동시 실행 한도 초과 → 503 (클라이언트 재시도 유도)
+@app.exception_handler(ExecutorSaturatedError)
+async def handle_saturated(request: Request, exc: ExecutorSaturatedError):
+    logger.warning(str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"error": "⚠️ 검색 요청이 많아 잠시 후 다시 시도해 주세요."},
+        headers={"Retry-After": "1"},
+    )
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -32,22 +124,25 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # ─────────────────────────────
-# ✅ [Mock DB] 데이터
+# ✅ [Mock DB] 데이터 (인증 코드 / 가입 정보 / 검색 기록은 session_store)
 # ─────────────────────────────
 ALLOWED_USERS_DB = ["admin", "test", "samsung", "engineer", "user1"]
-VERIFICATION_CODES = {}
-REGISTERED_USERS = {"admin": "1234"}
-
-# 더미 문서 풀 (랜덤 추출용)
-DUMMY_DOCS_POOL = [
-    {"file": "24년_3라인_설비이상_보고서.pdf", "path": "\\\\NAS\\Line3\\Report_2403.pdf", "grade": "B"},
-    {"file": "연신설비_유지보수_매뉴얼_v2.docx", "path": "\\\\NAS\\Manual\\Stretching_v2.docx", "grade": "A"},
-    {"file": "23년_하반기_안전교육_자료.pptx", "path": "\\\\NAS\\Safety\\Edu_2023H2.pptx", "grade": "C"},
-    {"file": "냉각수_펌프_교체_이력.xlsx", "path": "\\\\NAS\\Maintenance\\Pump_Log.xlsx", "grade": "B"},
-    {"file": "클린룸_미세먼지_측정값.csv", "path": "\\\\NAS\\Env\\Dust_2024.csv", "grade": "B"},
-    {"file": "공정_수율_분석_1분기.pdf", "path": "\\\\NAS\\Yield\\Q1_Analysis.pdf", "grade": "A"},
-    {"file": "신규_장비_입고_리스트.xlsx", "path": "\\\\NAS\\Asset\\New_Equipment.xlsx", "grade": "C"},
-]
+DEFAULT_USERS = {"admin": "1234"}
+
+# ✅ 사용자별 보안등급 (qdrant_utils.SECURITY_GRADES 중 하나, 해당 등급 이하 문서만 검색)
+USER_CLEARANCE_DB = {"admin": "A", "engineer": "B"}
+DEFAULT_USER_CLEARANCE = os.getenv("DEFAULT_USER_CLEARANCE", "C")
+SECURITY_GRADE_FILTER = os.getenv("SECURITY_GRADE_FILTER", "1") == "1"  # 0 이면 등급 제한 없이 검색
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+SESSION_ID_MAX_LENGTH = 64
+
+
+@app.on_event("startup")
+async def seed_default_users():
+    for user_id, password in DEFAULT_USERS.items():
+        await asyncio.to_thread(session_store.register_user, user_id, password, False)
 
 # ─────────────────────────────
 # ✅ 데이터 모델
@@ -79,64 +174,150 @@ async def request_code(req: AuthRequest):
     user_id = req.user_id.strip()
     if user_id not in ALLOWED_USERS_DB:
         return JSONResponse(status_code=400, content={"error": "❌ 명단에 없는 아이디입니다."})
-    if user_id in REGISTERED_USERS and user_id != "admin":
+    if user_id != "admin" and await asyncio.to_thread(session_store.is_registered, user_id):
         return JSONResponse(status_code=400, content={"error": "⚠️ 이미 가입된 아이디입니다."})
 
     code = str(random.randint(100000, 999999))
-    VERIFICATION_CODES[user_id] = code
-    print(f"\n{'='*50}\n📧 [메일 발송] 수신자: {user_id}@cnhxo.com\n🔑 인증 코드: [{code}]\n{'='*50}\n")
+    await asyncio.to_thread(session_store.set_verification_code, user_id, code)
+    logger.info(f"📧 [메일 발송] 수신자: {user_id}@cnhxo.com 🔑 인증 코드: [{code}]")
     return {"message": "인증 코드가 발송되었습니다."}
 
 @app.post("/auth/register")
 async def register_user(req: RegisterRequest):
     user_id = req.user_id.strip()
-    saved_code = VERIFICATION_CODES.get(user_id)
-    if not saved_code or saved_code != req.code:
+    if not await asyncio.to_thread(session_store.consume_verification_code, user_id, req.code):
         return JSONResponse(status_code=400, content={"error": "❌ 인증 코드가 틀렸습니다."})
-    
-    REGISTERED_USERS[user_id] = req.password
-    del VERIFICATION_CODES[user_id]
+
+    await asyncio.to_thread(session_store.register_user, user_id, req.password)
     return {"message": "가입 완료!"}
 
 @app.post("/auth/login")
 async def login(req: LoginRequest):
     user_id = req.user_id.strip()
-    if user_id in REGISTERED_USERS and REGISTERED_USERS[user_id] == req.password:
-        return {"success": True}
+    if await asyncio.to_thread(session_store.verify_password, user_id, req.password):
+        token = await asyncio.to_thread(session_store.create_auth_token, user_id)
+        return {"success": True, "token": token}
     return {"success": False, "message": "아이디 또는 비밀번호 오류"}
 
+@app.post("/auth/logout")
+async def logout(request: Request):
+    token = bearer_token(request)
+    if token:
+        await asyncio.to_thread(session_store.revoke_auth_token, token)
+    return {"success": True}
+
+
+# ✅ 로그인 토큰 (Authorization: Bearer <토큰>) → user_id, 없거나 만료되면 ""
+# - 보안등급 / 검색 기록의 사용자는 요청 본문이 아니라 이 토큰으로만 결정
+def bearer_token(request: Request) -> str:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else ""
+
+
+async def authenticated_user(request: Request) -> str:
+    token = bearer_token(request)
+    if not token:
+        return ""
+    return await asyncio.to_thread(session_store.resolve_auth_token, token) or ""
+
 # ─────────────────────────────
-# ✅ [API] 검색 (랜덤 문서 반환)
+# ✅ [API] 검색 (비동기 RAG 파이프라인)
 # ─────────────────────────────
+# 로그인한 사용자 + session_id 가 있으면 검색 기록 저장
+def session_param(data: dict) -> str:
+    return str(data.get('session_id') or '')[:SESSION_ID_MAX_LENGTH]
+
+
+# 로그인하지 않은 요청은 기본 등급 ("" 은 제한 없음), user_id 는 authenticated_user 결과
+def user_clearance(user_id: str) -> str:
+    if not SECURITY_GRADE_FILTER:
+        return ""
+    return USER_CLEARANCE_DB.get(user_id, DEFAULT_USER_CLEARANCE)
+
+
 @app.post("/search/documents")
 async def document_search(request: Request):
     data = await request.json()
     question = data.get('question', '')
-    
-    # 2~4개의 랜덤 문서 추출 (질문마다 결과가 달라짐을 보여주기 위함)
-    selected_docs = random.sample(DUMMY_DOCS_POOL, k=random.randint(2, 4))
-    
-    # 문서 포맷팅
-    formatted_docs = []
-    for doc in selected_docs:
-        formatted_docs.append({
-            "file_name": doc['file'],
-            "date": "2024-05-20", # 예시 날짜
-            "path": doc['path'],
-            "grade": doc['grade'],
-            "accuracy": f"{random.randint(85, 99)}.{random.randint(0,9)}%"
-        })
-
-    # 질문에 따라 약간 다른 답변 (더미)
-    llm_answer = f"'{question}'에 대한 분석 결과입니다.\n\n해당 설비의 주요 이슈는 3라인 냉각 계통 압력 저하로 확인됩니다. 관련된 유지보수 매뉴얼과 최근 3개월간의 점검 리스트를 우측 문서 패널에서 확인하실 수 있습니다.\n\n추가적으로 궁금한 사항이 있다면 질문해 주세요."
-
-    return {
-        "result_count": len(formatted_docs),
-        "llm_response": llm_answer,
-        "documents": formatted_docs
-    }
+    user_id, session_id = await authenticated_user(request), session_param(data)
+
+    return await run_search_pipeline(
+        question, user_grade=user_clearance(user_id), user_id=user_id, session_id=session_id
+    )
+
+
+# ✅ [API] 검색 스트리밍 (SSE: documents → token/summary... → done)
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/search/documents/stream")
+async def document_search_stream(request: Request):
+    data = await request.json()
+    question = data.get('question', '')
+    user_id, session_id = await authenticated_user(request), session_param(data)
+
+    events = await stream_search_pipeline(
+        question, user_grade=user_clearance(user_id), user_id=user_id, session_id=session_id
+    )
+
+    async def event_stream():
+        async for message in events:
+            yield format_sse(message["event"], message["data"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ✅ [API] 검색 캐시 적중률 / 절약 시간
+@app.get("/search/cache/stats")
+async def search_cache_stats():
+    return cache_stats()
+
+
+# ✅ [API] Prometheus 지표 (단계별 히스토그램 / 요청 시간 / 캐시·실행기 상태)
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# ─────────────────────────────
+# ✅ [API] 검색 기록 (사이드바 세션 목록 / 세션별 질문, 페이지 단위)
+# ─────────────────────────────
+def page_params(limit: int, offset: int):
+    return min(max(limit, 1), HISTORY_MAX_PAGE_SIZE), max(offset, 0)
+
+
+# 기록은 로그인 토큰의 사용자 것만 조회 / 삭제 (토큰이 없거나 만료되면 401)
+def unauthorized() -> JSONResponse:
+    return JSONResponse(status_code=401, content={"error": "🔒 로그인이 필요합니다."})
+
 
 @app.get("/history/list")
-async def get_history():
-    # 사이드바 초기 더미 데이터
-    return {"history": []}
+async def get_history(request: Request, limit: int = HISTORY_PAGE_SIZE, offset: int = 0):
+    user_id = await authenticated_user(request)
+    if not user_id:
+        return unauthorized()
+    limit, offset = page_params(limit, offset)
+    sessions, total = await asyncio.to_thread(session_store.list_sessions, user_id, limit, offset)
+    return {"history": sessions, "total": total}
+
+
+@app.get("/history/{session_id}")
+async def get_history_session(request: Request, session_id: str, limit: int = HISTORY_MAX_PAGE_SIZE, offset: int = 0):
+    user_id = await authenticated_user(request)
+    if not user_id:
+        return unauthorized()
+    limit, offset = page_params(limit, offset)
+    turns, total = await asyncio.to_thread(session_store.get_turns, user_id, session_id, limit, offset)
+    return {"session_id": session_id, "turns": turns, "total": total}
+
+
+@app.delete("/history/{session_id}")
+async def delete_history_session(request: Request, session_id: str):
+    user_id = await authenticated_user(request)
+    if not user_id:
+        return unauthorized()
+    return {"deleted": await asyncio.to_thread(session_store.delete_session, user_id, session_id)}
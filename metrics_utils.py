@@ -0,0 +1,200 @@
+import time
+import uuid
+import bisect
+import logging
+import threading
+import contextlib
+import contextvars
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# ✅ 요청 단위 추적 정보 (asyncio 태스크 / to_thread 로 자동 전파)
+trace_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="-")
+stage_timings_var: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "stage_timings", default=None
+)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# ─────────────────────────────
+# ✅ Prometheus 텍스트 포맷 지표 (외부 의존성 없이)
+# ─────────────────────────────
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels → [버킷별 개수, 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.label_names, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class GaugeCollector:
+    """수집 시점에 stats() 류 함수를 호출해 gauge 로 노출 (캐시 / 실행기 지표)"""
+
+    def __init__(self, name: str, documentation: str, label_name: str, collect: Callable[[], Dict[str, Dict]]):
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        samples: Dict[str, List[str]] = {}
+        for source, stats in self.collect().items():
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                samples.setdefault(key, []).append(f'{self.name}_{key}{{{self.label_name}="{source}"}} {value}')
+        lines = []
+        for key, metric_samples in samples.items():
+            lines.append(f"# HELP {self.name}_{key} {self.documentation} ({key})")
+            lines.append(f"# TYPE {self.name}_{key} gauge")
+            lines.extend(metric_samples)
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+stage_seconds = registry.register(Histogram(
+    "rag_stage_seconds", "검색 파이프라인 단계별 소요 시간", ("stage",)
+))
+request_seconds = registry.register(Histogram(
+    "rag_request_seconds", "HTTP 요청 처리 시간 (스트리밍은 응답 시작까지)", ("path", "status")
+))
+stage_errors = registry.register(Counter("rag_stage_errors_total", "단계별 예외 수", ("stage",)))
+
+
+def register_gauges(name: str, documentation: str, label_name: str, collect: Callable[[], Dict[str, Dict]]):
+    registry.register(GaugeCollector(name, documentation, label_name, collect))
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+# ─────────────────────────────
+# ✅ 요청 추적 / 단계 측정
+# ─────────────────────────────
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def start_trace(trace_id: Optional[str] = None):
+    """요청 시작 시 호출, (trace_id, 컨텍스트 복원용 토큰) 반환"""
+    trace_id = trace_id or new_trace_id()
+    tokens = (trace_id_var.set(trace_id), stage_timings_var.set({}))
+    return trace_id, tokens
+
+
+def end_trace(tokens):
+    trace_id_var.reset(tokens[0])
+    stage_timings_var.reset(tokens[1])
+
+
+def current_stage_timings() -> Dict[str, float]:
+    return dict(stage_timings_var.get() or {})
+
+
+def record_stage(name: str, seconds: float):
+    stage_seconds.observe(seconds, name)
+    timings = stage_timings_var.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """with stage("qdrant_query"): ... — 동기/비동기 코드 모두 사용 (await 를 감싸도 벽시계 기준)"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(name)
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """브라우저 개발자 도구에서 볼 수 있는 Server-Timing 헤더 값"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+# ✅ 모든 로그 레코드에 trace_id 부여 (logging format 에서 %(trace_id)s 사용)
+class TraceIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+def format_fields(**fields) -> str:
+    """구조화 로그 본문 (key=value)"""
+    return " ".join(f"{key}={value!r}" if isinstance(value, str) else f"{key}={value}" for key, value in fields.items())
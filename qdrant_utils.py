@@ -1,228 +1,412 @@
-import gc
-import torch
+import os
+import asyncio
+import logging
 import re
-from typing import List, Tuple, Dict, Set
-from concurrent.futures import ThreadPoolExecutor
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.models import MatchValue, MatchAny, Filter, FieldCondition
-from sklearn.metrics.pairwise import cosine_similarity
-
+from typing import List, Tuple, Dict, Set, Optional
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    MatchValue, MatchAny, Filter, FieldCondition, IsEmptyCondition, PayloadField, QueryRequest, Range,
+)
+
+from collection_bootstrap import (
+    CANDIDATE_PAYLOAD_FIELDS, TEXT_PAYLOAD_FIELDS, collection_version_key, date_ordinal, ensure_payload_indexes,
+    search_params,
+)
+from executor_utils import BoundedExecutor
+from metrics_utils import format_fields, stage
+from rerank_utils import DENSE_VECTOR_NAME, CandidateSet, rerank_hits, decaying_bonus_score, dedupe_by_document, rrf_fuse, weighted_fuse
+from sparse_utils import SPARSE_VECTOR_NAME, query_sparse_vector
+from embedding_utils import submit_encode_query
+
+logger = logging.getLogger(__name__)
 
 # ✅ Qdrant 설정
-qdrant_client = QdrantClient(host="localhost", port=6333)
-collection_name = "docs_test_all"
-
-# ✅ SentenceTransformer (KURE_v1)
-model = SentenceTransformer("/home/hmo/Embedding_Models/KURE_v1")
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+qdrant_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+async_qdrant_client = AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+collection_name = os.getenv("QDRANT_COLLECTION", "docs_test_all")
+
+# ✅ 검색 모드별 HNSW / 양자화 검색 파라미터 (0 이면 Qdrant 기본값)
+# - hybrid: 필터 검색 (keyword_then_semantic_rerank), 후보를 top_k * QDRANT_CANDIDATE_FACTOR 개 뽑아 재정렬하므로 낮은 ef 로도 충분
+# - semantic: 필터 없는 의미검색 (hybrid 의 fallback)
+SEARCH_MODE_PARAMS = {
+    mode: search_params(
+        hnsw_ef=int(os.getenv(f"QDRANT_{mode.upper()}_HNSW_EF", "0")),
+        oversampling=float(os.getenv(f"QDRANT_{mode.upper()}_OVERSAMPLING", "0")),
+        rescore=os.getenv(f"QDRANT_{mode.upper()}_RESCORE", "1") == "1",
+    )
+    for mode in ("hybrid", "semantic")
+}
+# ✅ 연도가 있는 날짜 조건을 date_ordinal 범위 하나로 검색 (collection_bootstrap 으로 채운 뒤 사용)
+QDRANT_DATE_ORDINAL_FILTER = os.getenv("QDRANT_DATE_ORDINAL_FILTER", "0") == "1"
+# ✅ 보안등급 (sGrade): 낮은 등급 → 높은 등급 순, 사용자 등급 이하 문서만 Qdrant 에서 검색
+SECURITY_GRADES = [grade.strip() for grade in os.getenv("SECURITY_GRADES", "C,B,A").split(",") if grade.strip()]
+SECURITY_ALLOW_UNGRADED = os.getenv("SECURITY_ALLOW_UNGRADED", "0") == "1"  # sGrade 없는 문서 노출 여부
+# ✅ 필터 검색 후보 수 = top_k * 배수 (등급 필터가 검색 시점에 적용되므로 사후 제거분을 감안할 필요 없음)
+QDRANT_CANDIDATE_FACTOR = int(os.getenv("QDRANT_CANDIDATE_FACTOR", "10"))
+# ✅ 검색 순위 방식
+# - keyword_bonus: 키워드 필터 검색 + 매칭 수 보너스 (기존)
+# - fusion: 벡터 검색과 BM25 희소 검색을 한 번의 배치 요청으로 실행 → RRF / 가중 정규화로 결합 → 문서(doc_id) 단위 중복 제거
+#   (bm25 희소 벡터가 있는 컬렉션 필요: collection_bootstrap --migrate-sparse)
+SEARCH_RANKING = os.getenv("SEARCH_RANKING", "keyword_bonus")
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf")  # rrf | weighted
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+HYBRID_SPARSE_WEIGHT = float(os.getenv("HYBRID_SPARSE_WEIGHT", "1.0"))
+# ✅ 후속 질문: 후보를 뽑은 질문과의 코사인 유사도가 이 값 이상이면 이전 후보 안에서 재정렬
+FOLLOWUP_SIMILARITY_THRESHOLD = float(os.getenv("FOLLOWUP_SIMILARITY_THRESHOLD", "0.7"))
+
+# ✅ Qdrant 호출 공유 스레드 풀 / 동시 실행 한도 (포화 시 ExecutorSaturatedError → 503)
+QDRANT_MAX_WORKERS = int(os.getenv("QDRANT_MAX_WORKERS", "16"))
+QDRANT_MAX_CONCURRENCY = int(os.getenv("QDRANT_MAX_CONCURRENCY", "32"))
+QDRANT_QUEUE_TIMEOUT = float(os.getenv("QDRANT_QUEUE_TIMEOUT", "2.0"))
+qdrant_executor = BoundedExecutor(
+    name="qdrant",
+    max_workers=QDRANT_MAX_WORKERS,
+    max_concurrency=QDRANT_MAX_CONCURRENCY,
+    queue_timeout=QDRANT_QUEUE_TIMEOUT,
+)
+
+# ✅ 누락된 payload 인덱스 생성 (서버 시작 시, 이미 있으면 건너뜀)
+async def async_ensure_payload_indexes() -> List[str]:
+    return await asyncio.to_thread(ensure_payload_indexes, qdrant_client, collection_name, None, False)
+
+
+# ✅ 컬렉션 버전 (포인트 수 + 적재 버전, 응답 캐시 무효화 기준)
+async def async_collection_version() -> str:
+    async with qdrant_executor.async_slot():
+        info = await async_qdrant_client.get_collection(collection_name)
+    return collection_version_key(info)
+
+
+# ✅ 전체 문서의 keywords payload 수집 (로컬 키워드 추출 사전용)
+async def async_scroll_keyword_terms(batch_size: int = 1000) -> Set[str]:
+    terms = set()
+    offset = None
+    while True:
+        async with qdrant_executor.async_slot():
+            points, offset = await async_qdrant_client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["keywords"],
+                with_vectors=False,
+            )
+        for point in points:
+            terms.update(str(kw) for kw in (point.payload or {}).get("keywords") or [])
+        if offset is None:
+            return terms
+
+
+# ✅ 사용자 등급 → 검색 가능한 등급 목록 ("" 이면 제한 없음, 모르는 등급은 가장 낮은 등급만)
+def allowed_grades(user_grade: str) -> Optional[List[str]]:
+    if not user_grade:
+        return None
+    if user_grade not in SECURITY_GRADES:
+        logger.warning("unknown_user_grade " + format_fields(user_grade=user_grade))
+        return SECURITY_GRADES[:1]
+    return SECURITY_GRADES[:SECURITY_GRADES.index(user_grade) + 1]
+
+
+def build_grade_condition(user_grade: str):
+    grades = allowed_grades(user_grade)
+    if grades is None:
+        return None
+    if SECURITY_ALLOW_UNGRADED:
+        # 등급 없음 = sGrade 키 없음 / null (IsEmpty) 또는 빈 문자열 (적재 시 기본값 "")
+        return Filter(should=[
+            FieldCondition(key="sGrade", match=MatchAny(any=[*grades, ""])),
+            IsEmptyCondition(is_empty=PayloadField(key="sGrade")),
+        ])
+    return FieldCondition(key="sGrade", match=MatchAny(any=grades))
 
 
-def encode_and_clear(texts, **kwargs):
-    vectors = model.encode(texts, **kwargs)
-    if torch.cuda.is_available():
-        torch.cuda.empty_cache()
-        gc.collect()
-    return vectors
+def apply_grade_filter(filter_query: Optional[Filter], user_grade: str) -> Optional[Filter]:
+    """모든 검색 필터에 등급 조건을 must 로 추가 (filter_query 가 None 이면 등급 조건만)"""
+    condition = build_grade_condition(user_grade)
+    if condition is None:
+        return filter_query
+    if filter_query is None:
+        return Filter(must=[condition])
+    return Filter(must=[condition, filter_query])
 
 
 # ✅ 공통 점수 보정 함수 (날짜 여부 무관)
-def apply_keyword_bonus(results, text_keywords, top_k):
+def apply_keyword_bonus(results, text_keywords, top_k, scoring_fn=decaying_bonus_score):
     """검색 결과에 키워드 교집합 기반 점수 보너스 적용"""
-    reranked = []
-    for hit in results:
-        payload = hit.payload
-        score = float(hit.score)
-        doc_keywords = payload.get("keywords", [])
-
-        matched_keywords = []
-        for kw in text_keywords:
-            if kw in (payload.get("sFileName") or "") or kw in doc_keywords:
-                matched_keywords.append(kw)
-
-        # ✅ 교집합 보너스 (0.05, 0.04, 0.03, ...)
-        for i, _ in enumerate(matched_keywords):
-            score += max(0.05 - i * 0.01, 0.01)
-
-        if matched_keywords:
-            print(f"\n📄 {payload.get('sFileName', '')}")
-            print(f"   🔹 문서 keywords: {doc_keywords}")
-            print(f"   🔹 매칭: {matched_keywords} → 최종 score={round(score,5)}")
-
-        reranked.append({
-            "id": hit.id,
-            "문서ID": payload.get("doc_id", ""),
-            "파일명": payload.get("sFileName", ""),
-            "날짜": f"{payload.get('year', '----')}-{payload.get('month', '--')}-{payload.get('day', '--')}",
-            "경로": payload.get("sFilePath", ""),
-            "보안등급": payload.get("sGrade", ""),
-            "score": round(score, 5),
-        })
-
-    reranked.sort(key=lambda x: x["score"], reverse=True)
-    return reranked[:top_k]
+    return rerank_hits(results, text_keywords, top_k, scoring_fn=scoring_fn)
 
 
-# ✅ 단일 키워드 검색
-def keyword_search_single(keyword: str, top_k: int = 30) -> Tuple[Set, Dict, str]:
-    keyword_type = "none"
-    query_filter = None
-
+# ✅ 단일 키워드 유형 분류 (정규식만 사용, DB 조회 없음)
+def classify_keyword(keyword: str) -> str:
     if re.fullmatch(r"\d{4}", keyword):  # 연도
-        keyword_type = "year"
-        query_filter = Filter(must=[FieldCondition(key="year", match=MatchValue(value=int(keyword)))])
+        return "year"
     elif keyword.isdigit() and 1 <= int(keyword) <= 12:  # 월
-        keyword_type = "month"
-        query_filter = Filter(must=[FieldCondition(key="month", match=MatchValue(value=int(keyword)))])
+        return "month"
     elif keyword.isdigit() and 1 <= int(keyword) <= 31:  # 일
-        keyword_type = "day"
-        query_filter = Filter(must=[FieldCondition(key="day", match=MatchValue(value=int(keyword)))])
-    else:  # 텍스트 키워드
-        keyword_type = "text"
-        query_filter = Filter(should=[
-            FieldCondition(key="sFileName", match=MatchValue(value=keyword)),
-            FieldCondition(key="keywords", match=MatchAny(any=[keyword])),
-        ])
+        return "day"
+    return "text"  # 텍스트 키워드
 
-    result = qdrant_client.query_points(
-        collection_name=collection_name,
-        query_filter=query_filter,
-        limit=top_k,
-        with_payload=True,
-        with_vectors=True,
-    )
-
-    ids = {p.id for p in result.points}
-    payloads = {p.id: {"payload": p.payload, "vector": p.vector} for p in result.points}
-    return ids, payloads, keyword_type
 
+def classify_keywords(keywords: List[str]) -> Tuple[List[str], List[str], Dict[str, str]]:
+    keyword_types = {kw: classify_keyword(kw) for kw in keywords}
+    date_keywords = [kw for kw, t in keyword_types.items() if t in ("year", "month", "day")]
+    text_keywords = [kw for kw, t in keyword_types.items() if t == "text"]
+    return date_keywords, text_keywords, keyword_types
 
-# ✅ 병렬 키워드 검색
-def search_qdrant_metadata_parallel(keywords: List[str], top_k_per_keyword: int = 50) -> Tuple[Dict, Dict, Dict]:
-    all_payloads = {}
-    keyword_results = {}
-    keyword_types = {}
-
-    if not keywords:
-        return {}, {}, {}
 
-    with ThreadPoolExecutor(max_workers=max(1, len(keywords))) as executor:
-        futures = {executor.submit(keyword_search_single, kw, top_k_per_keyword): kw for kw in keywords}
-        for future in futures:
-            ids, payloads, kw_type = future.result()
-            kw = futures[future]
-            keyword_results[kw] = ids
-            keyword_types[kw] = kw_type
-            all_payloads.update(payloads)
+# ✅ 날짜/텍스트 키워드 → 결합 필터
+def build_text_should_conditions(text_keywords: List[str]) -> List[FieldCondition]:
+    should_conditions = []
+    for kw in text_keywords:
+        should_conditions.extend([
+            FieldCondition(key="sFileName", match=MatchValue(value=kw)),
+            FieldCondition(key="keywords", match=MatchAny(any=[kw])),
+            FieldCondition(key="keywords", match={"text": kw}),
+        ])
+    return should_conditions
 
-    return keyword_results, all_payloads, keyword_types
 
+def build_date_conditions(date_keywords: List[str], keyword_types: Dict[str, str]) -> List[FieldCondition]:
+    """연/월/일 각각 MatchValue, QDRANT_DATE_ORDINAL_FILTER 이면 연(+월(+일)) 을 date_ordinal 범위 하나로"""
+    values = {}
+    for kw in date_keywords:
+        values.setdefault(keyword_types[kw], []).append(int(kw))
+    single = all(len(v) == 1 for v in values.values())
+    if QDRANT_DATE_ORDINAL_FILTER and single and "year" in values and ("day" not in values or "month" in values):
+        year, month, day = values["year"][0], values.get("month", [0])[0], values.get("day", [0])[0]
+        low = date_ordinal(year, month, day)
+        high = low + (0 if day else 99 if month else 9999)
+        return [FieldCondition(key="date_ordinal", range=Range(gte=low, lte=high))]
 
-# ✅ 날짜 + 키워드 결합 검색
-def keyword_then_semantic_rerank(question: str, keywords: List[str], top_k: int = 5):
-    print("\n" + "=" * 80)
-    print(f"🧩 [keyword_then_semantic_rerank] 검색 요청 시작")
-    print(f"📥 질문: {question}")
-    print(f"🔑 키워드 리스트: {keywords}")
-    print("=" * 80)
-
-    keyword_results, all_payloads, keyword_types = search_qdrant_metadata_parallel(keywords, top_k_per_keyword=200)
-    date_keywords = [kw for kw, t in keyword_types.items() if t in ("year", "month", "day")]
-    text_keywords = [kw for kw, t in keyword_types.items() if t == "text"]
+    return [
+        FieldCondition(key=keyword_types[kw], match=MatchValue(value=int(kw)))
+        for kw in date_keywords
+        if keyword_types[kw] in ("year", "month", "day")
+    ]
 
-    print(f"📅 날짜 키워드: {date_keywords if date_keywords else '없음'}")
-    print(f"💬 텍스트 키워드: {text_keywords if text_keywords else '없음'}")
 
-    # 날짜가 포함된 경우
+def build_combined_filter(date_keywords: List[str], text_keywords: List[str], keyword_types: Dict[str, str]) -> Optional[Filter]:
+    """날짜 키워드는 must, 텍스트 키워드는 should 로 묶은 필터 (키워드 없으면 None)"""
     if date_keywords:
-        print("\n⚡ [1단계] 날짜 + 키워드 결합 → Qdrant 검색 실행")
-        query_vector = encode_and_clear([question])[0]
-
-        must_conditions = []
-        for kw in date_keywords:
-            kw_type = keyword_types[kw]
-            if kw_type == "year":
-                must_conditions.append(FieldCondition(key="year", match=MatchValue(value=int(kw))))
-            elif kw_type == "month":
-                must_conditions.append(FieldCondition(key="month", match=MatchValue(value=int(kw))))
-            elif kw_type == "day":
-                must_conditions.append(FieldCondition(key="day", match=MatchValue(value=int(kw))))
+        must_conditions = build_date_conditions(date_keywords, keyword_types)
 
         if text_keywords:
-            should_conditions = []
-            for kw in text_keywords:
-                should_conditions.extend([
-                    FieldCondition(key="sFileName", match=MatchValue(value=kw)),
-                    FieldCondition(key="keywords", match=MatchAny(any=[kw])),
-                    FieldCondition(key="keywords", match={"text": kw}),
-                ])
-            must_conditions.append(Filter(should=should_conditions))
-
-        filter_query = Filter(must=must_conditions)
-        results = qdrant_client.search(
-            collection_name=collection_name,
-            query_vector=query_vector,
-            query_filter=filter_query,
-            limit=top_k * 10,
-            with_payload=True
-        )
+            must_conditions.append(Filter(should=build_text_should_conditions(text_keywords)))
+        return Filter(must=must_conditions)
+
+    if text_keywords:
+        return Filter(should=build_text_should_conditions(text_keywords))
+
+    return None
+
+
+# ✅ 필터 검색 + 의미검색 fallback 을 한 번의 query_batch_points 요청으로 구성
+def build_hybrid_requests(
+    query_vector, filter_query: Optional[Filter], top_k: int, with_vectors: bool = False, user_grade: str = ""
+) -> List[QueryRequest]:
+    """with_vectors: 후보 벡터도 받아 후속 질문에서 재사용 (bm25 희소 벡터는 제외) / 두 요청 모두 등급 필터 적용"""
+    query = query_vector.tolist() if hasattr(query_vector, "tolist") else list(query_vector)
+    with_vector = [DENSE_VECTOR_NAME] if with_vectors else False
+    limit = top_k * QDRANT_CANDIDATE_FACTOR
+    if filter_query is None:
+        return [QueryRequest(
+            query=query, filter=apply_grade_filter(None, user_grade), limit=limit,
+            params=SEARCH_MODE_PARAMS["hybrid"], with_payload=CANDIDATE_PAYLOAD_FIELDS, with_vector=with_vector,
+        )]
+    return [
+        QueryRequest(
+            query=query, filter=apply_grade_filter(filter_query, user_grade), limit=limit,
+            params=SEARCH_MODE_PARAMS["hybrid"], with_payload=CANDIDATE_PAYLOAD_FIELDS, with_vector=with_vector,
+        ),
+        # 0건일 때 사용할 의미검색
+        QueryRequest(
+            query=query, filter=apply_grade_filter(None, user_grade), limit=top_k,
+            params=SEARCH_MODE_PARAMS["semantic"], with_payload=CANDIDATE_PAYLOAD_FIELDS,
+        ),
+    ]
 
-        # ✅ 결과 없을 경우 → 의미검색 fallback
-        if not results:
-            print("⚠️ [1단계] 검색 결과 0건 → 의미검색 fallback 실행")
-            return semantic_vector_search(question, top_k)
-
-       # print(f"📊 Qdrant 검색 결과: {len(results)}건\n")
-        return apply_keyword_bonus(results, text_keywords, top_k)
-
-    # 키워드만 있을 경우
-    elif text_keywords:
-        print("\n🔤 [2단계] 키워드 기반 검색 실행")
-        query_vector = encode_and_clear([question])[0]
-        should_conditions = []
-        for kw in text_keywords:
-            should_conditions.extend([
-                FieldCondition(key="sFileName", match=MatchValue(value=kw)),
-                FieldCondition(key="keywords", match=MatchAny(any=[kw])),
-                FieldCondition(key="keywords", match={"text": kw}),
-            ])
-        filter_query = Filter(should=should_conditions)
-        results = qdrant_client.search(
-            collection_name=collection_name,
-            query_vector=query_vector,
-            query_filter=filter_query,
-            limit=top_k * 10,
-            with_payload=True
-        )
 
-        # ✅ 결과 없을 경우 → 의미검색 fallback
-        if not results:
-            print("⚠️ [2단계] 검색 결과 0건 → 의미검색 fallback 실행")
-            return semantic_vector_search(question, top_k)
+def resolve_hybrid_responses(responses, filter_query: Optional[Filter], keywords: List[str], text_keywords: List[str], top_k: int):
+    if filter_query is None:
+        return apply_keyword_bonus(responses[0].points, keywords, top_k)
 
-        #print(f"📊 Qdrant 검색 결과: {len(results)}건\n")
-        return apply_keyword_bonus(results, text_keywords, top_k)
+    # ✅ 결과 없을 경우 → 의미검색 fallback
+    if not responses[0].points:
+        logger.info("hybrid_search_fallback " + format_fields(reason="필터 검색 결과 0건", hits=len(responses[1].points)))
+        return format_semantic_hits(responses[1].points)
 
-    # 아무것도 없을 경우 → 의미검색 fallback
-    else:
-        print("\n⚠️ [3단계] 필터 없음 → 전체 의미검색 fallback")
-        results = qdrant_client.search(
-            collection_name=collection_name,
-            query_vector=encode_and_clear([question])[0],
-            limit=top_k * 10,
-            with_payload=True
+    return apply_keyword_bonus(responses[0].points, text_keywords, top_k)
+
+
+# ✅ 날짜 + 키워드 결합 검색
+def keyword_then_semantic_rerank(question: str, keywords: List[str], top_k: int = 5, user_grade: str = ""):
+    # 임베딩은 배치 스레드에서 진행, 그동안 키워드 분류/필터 구성
+    vector_future = submit_encode_query(question)
+    date_keywords, text_keywords, keyword_types = classify_keywords(keywords)
+    filter_query = build_combined_filter(date_keywords, text_keywords, keyword_types)
+    log_hybrid_search(question, date_keywords, text_keywords)
+
+    with stage("embedding"):
+        query_vector = vector_future.result()
+    batch_requests = build_hybrid_requests(query_vector, filter_query, top_k, user_grade=user_grade)
+    with stage("qdrant_query"), qdrant_executor.slot():
+        responses = qdrant_client.query_batch_points(collection_name=collection_name, requests=batch_requests)
+    with stage("rerank"):
+        hits = resolve_hybrid_responses(responses, filter_query, keywords, text_keywords, top_k)
+    return attach_text(hits)
+
+
+async def async_keyword_then_semantic_rerank(question: str, keywords: List[str], top_k: int = 5, user_grade: str = ""):
+    """keyword_then_semantic_rerank 의 비동기 버전"""
+    vector_future = asyncio.wrap_future(submit_encode_query(question))
+    date_keywords, text_keywords, keyword_types = classify_keywords(keywords)
+    filter_query = build_combined_filter(date_keywords, text_keywords, keyword_types)
+    log_hybrid_search(question, date_keywords, text_keywords)
+
+    with stage("embedding"):
+        query_vector = await vector_future
+    responses = await async_query_hybrid(query_vector, filter_query, top_k, user_grade=user_grade)
+    with stage("rerank"):
+        hits = resolve_hybrid_responses(responses, filter_query, keywords, text_keywords, top_k)
+    return await async_attach_text(hits)
+
+
+async def async_query_hybrid(
+    query_vector, filter_query: Optional[Filter], top_k: int, with_vectors: bool = False, user_grade: str = ""
+):
+    batch_requests = build_hybrid_requests(query_vector, filter_query, top_k, with_vectors, user_grade)
+    with stage("qdrant_query"):
+        async with qdrant_executor.async_slot():
+            return await async_qdrant_client.query_batch_points(collection_name=collection_name, requests=batch_requests)
+
+
+# ✅ 후속 질문 검색 (이전 후보 재사용 → 주제가 바뀌면 Qdrant 검색)
+async def async_followup_search(
+    question: str, keywords: List[str], top_k: int = 5, previous: Optional[CandidateSet] = None, user_grade: str = ""
+) -> Tuple[List[Dict], Optional[CandidateSet]]:
+    """(결과, 다음 질문에 쓸 후보) — 후보를 재사용했으면 previous 를 그대로 반환 (후보는 이미 등급 필터 적용)"""
+    vector_future = asyncio.wrap_future(submit_encode_query(question))
+    date_keywords, text_keywords, keyword_types = classify_keywords(keywords)
+    with stage("embedding"):
+        query_vector = await vector_future
+
+    if previous is not None and previous.covers(query_vector, date_keywords, FOLLOWUP_SIMILARITY_THRESHOLD):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("followup_reuse " + format_fields(
+                question=question, similarity=round(previous.similarity(query_vector), 4), candidates=len(previous.points)
+            ))
+        with stage("followup_rerank"):
+            hits = previous.rerank(query_vector, text_keywords, top_k)
+        return await async_attach_text(hits), previous
+
+    filter_query = build_combined_filter(date_keywords, text_keywords, keyword_types)
+    log_hybrid_search(question, date_keywords, text_keywords)
+    responses = await async_query_hybrid(query_vector, filter_query, top_k, with_vectors=True, user_grade=user_grade)
+    with stage("rerank"):
+        hits = resolve_hybrid_responses(responses, filter_query, keywords, text_keywords, top_k)
+    # 필터 검색이 0건이라 의미검색 fallback 을 쓴 경우는 후보로 남기지 않음
+    candidates = CandidateSet(query_vector, date_keywords, responses[0].points, user_grade) if responses[0].points else None
+    return await async_attach_text(hits), candidates
+
+
+# ✅ 최종 top_k 의 본문만 id 로 조회 (후보 검색은 CANDIDATE_PAYLOAD_FIELDS 만 전송)
+def merge_text(hits: List[Dict], points) -> List[Dict]:
+    texts = {point.id: (point.payload or {}).get("text", "") for point in points}
+    for hit in hits:
+        hit["본문"] = texts.get(hit["id"], "")
+    return hits
+
+
+def attach_text(hits: List[Dict]) -> List[Dict]:
+    if not hits:
+        return hits
+    with stage("qdrant_text"), qdrant_executor.slot():
+        points = qdrant_client.retrieve(
+            collection_name, ids=[hit["id"] for hit in hits], with_payload=TEXT_PAYLOAD_FIELDS, with_vectors=False
         )
-        return apply_keyword_bonus(results, keywords, top_k)
+    return merge_text(hits, points)
+
+
+async def async_attach_text(hits: List[Dict]) -> List[Dict]:
+    if not hits:
+        return hits
+    with stage("qdrant_text"):
+        async with qdrant_executor.async_slot():
+            points = await async_qdrant_client.retrieve(
+                collection_name, ids=[hit["id"] for hit in hits], with_payload=TEXT_PAYLOAD_FIELDS, with_vectors=False
+            )
+    return merge_text(hits, points)
+
+
+# ✅ 벡터 + BM25 희소 검색 결합 (날짜 / 등급은 필터, 텍스트 키워드는 희소 질의에 포함해 순위에 반영)
+def build_fusion_requests(
+    query_vector, sparse_query, date_filter: Optional[Filter], top_k: int, user_grade: str = ""
+) -> List[QueryRequest]:
+    """[벡터, 희소] (+ 날짜 필터가 있으면 0건일 때 쓸 날짜 조건 없는 벡터 검색) — 후보는 쪽 단위이므로 top_k * 배수"""
+    query = query_vector.tolist() if hasattr(query_vector, "tolist") else list(query_vector)
+    filter_query = apply_grade_filter(date_filter, user_grade)
+    limit = top_k * QDRANT_CANDIDATE_FACTOR
+    requests = [
+        QueryRequest(query=query, filter=filter_query, limit=limit,
+                     params=SEARCH_MODE_PARAMS["hybrid"], with_payload=CANDIDATE_PAYLOAD_FIELDS),
+        QueryRequest(query=sparse_query, using=SPARSE_VECTOR_NAME, filter=filter_query, limit=limit,
+                     with_payload=CANDIDATE_PAYLOAD_FIELDS),
+    ]
+    if date_filter is not None:
+        requests.append(QueryRequest(
+            query=query, filter=apply_grade_filter(None, user_grade), limit=limit,
+            params=SEARCH_MODE_PARAMS["semantic"], with_payload=CANDIDATE_PAYLOAD_FIELDS,
+        ))
+    return requests
+
+
+def fuse_ranked_lists(ranked_lists, top_k: int, method: str = HYBRID_FUSION) -> List[Dict]:
+    weights = [HYBRID_DENSE_WEIGHT, HYBRID_SPARSE_WEIGHT][:len(ranked_lists)]
+    if method == "rrf":
+        hits, scores = rrf_fuse(ranked_lists, weights, k=HYBRID_RRF_K)
+    elif method == "weighted":
+        hits, scores = weighted_fuse(ranked_lists, weights)
+    else:
+        raise ValueError(f"알 수 없는 HYBRID_FUSION: {method}")
+    return dedupe_by_document(hits, scores, top_k)
+
+
+async def async_fusion_search(
+    question: str, keywords: List[str], top_k: int = 5, user_grade: str = "", method: str = HYBRID_FUSION
+) -> List[Dict]:
+    vector_future = asyncio.wrap_future(submit_encode_query(question))
+    date_keywords, text_keywords, keyword_types = classify_keywords(keywords)
+    date_filter = Filter(must=build_date_conditions(date_keywords, keyword_types)) if date_keywords else None
+    sparse_query = query_sparse_vector(" ".join([question, *text_keywords]))
+    log_hybrid_search(question, date_keywords, text_keywords)
+
+    with stage("embedding"):
+        query_vector = await vector_future
+    requests = build_fusion_requests(query_vector, sparse_query, date_filter, top_k, user_grade)
+    with stage("qdrant_query"):
+        async with qdrant_executor.async_slot():
+            responses = await async_qdrant_client.query_batch_points(collection_name=collection_name, requests=requests)
+
+    dense, sparse = responses[0].points, responses[1].points
+    if date_filter is not None and not dense and not sparse:
+        logger.info("hybrid_search_fallback " + format_fields(reason="필터 검색 결과 0건", hits=len(responses[2].points)))
+        dense = responses[2].points
+    with stage("fusion"):
+        hits = fuse_ranked_lists([dense, sparse], top_k, method)
+    return await async_attach_text(hits)
+
+
+def log_hybrid_search(question: str, date_keywords: List[str], text_keywords: List[str]):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("hybrid_search " + format_fields(
+            question=question, date_keywords=date_keywords, text_keywords=text_keywords
+        ))
 
 
 # ✅ 의미검색 fallback (단순 벡터검색)
-def semantic_vector_search(question: str, top_k: int = 30):
-    query_vector = encode_and_clear([question])[0]
-    results = qdrant_client.search(
-        collection_name=collection_name,
-        query_vector=query_vector,
-        limit=top_k,
-        with_payload=True
-    )
+def format_semantic_hits(results):
     return [
         {
             "id": hit.id,
@@ -232,6 +416,7 @@ def semantic_vector_search(question: str, top_k: int = 30):
             "날짜": f"{hit.payload.get('year', '----')}-{hit.payload.get('month', '--')}-{hit.payload.get('day', '--')}",
             "경로": hit.payload.get("sFilePath", ""),
             "보안등급": hit.payload.get("sGrade", ""),
+            "본문": hit.payload.get("text", ""),
             "score": round(hit.score, 5),
         }
         for hit in results
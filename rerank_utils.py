@@ -0,0 +1,249 @@
+import re
+import sys
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+KEYWORD_SEPARATOR = "\x1f"
+DENSE_VECTOR_NAME = ""  # 기본(이름 없는) 밀집 벡터, bm25 희소 벡터가 있는 컬렉션은 point.vector 가 이름별 dict
+
+# 매칭 개수별 누적 보너스 (0.05, 0.04, 0.03, 0.02, 0.01, 0.01, ...)
+MAX_BONUS_KEYWORDS = 64
+BONUS_BY_MATCH_COUNT = np.concatenate(
+    [[0.0], np.cumsum([max(0.05 - i * 0.01, 0.01) for i in range(MAX_BONUS_KEYWORDS)])]
+)
+
+
+# ✅ 검색 결과 → 배열 (점수) + 구분자로 이어 붙인 검색용 문자열 (파일명 / 문서 키워드)
+class HitArrays:
+    def __init__(self, hits: Sequence, scores: Optional[np.ndarray] = None):
+        self.hits = hits
+        if scores is None:
+            scores = np.fromiter((float(hit.score) for hit in hits), dtype=np.float64, count=len(hits))
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.file_names, self.file_name_starts = _join_with_offsets(
+            [hit.payload.get("sFileName") or "" for hit in hits]
+        )
+        # 문서 keywords 를 구분자로 감싸 정확 일치를 부분문자열 검색으로 처리
+        self.keywords, self.keyword_starts = _join_with_offsets(
+            [KEYWORD_SEPARATOR + KEYWORD_SEPARATOR.join(map(str, hit.payload.get("keywords") or [])) + KEYWORD_SEPARATOR
+             for hit in hits]
+        )
+
+
+def _join_with_offsets(parts: List[str]):
+    lengths = np.fromiter((len(part) + 1 for part in parts), dtype=np.int64, count=len(parts))
+    starts = np.zeros(len(parts), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    return KEYWORD_SEPARATOR.join(parts), starts
+
+
+def _matching_rows(text: str, starts: np.ndarray, pattern: str) -> np.ndarray:
+    """text 전체를 한 번 훑어 pattern 이 등장하는 행 번호 반환"""
+    positions = [match.start() for match in re.finditer(re.escape(pattern), text)]
+    if not positions:
+        return np.empty(0, dtype=np.int64)
+    return np.searchsorted(starts, np.asarray(positions), side="right") - 1
+
+
+# ✅ 키워드 매칭 행렬 (hits × keywords)
+def keyword_match_matrix(arrays: HitArrays, keywords: Sequence[str]) -> np.ndarray:
+    keywords = list(dict.fromkeys(keywords))
+    matches = np.zeros((len(arrays.hits), len(keywords)), dtype=bool)
+    if len(arrays.hits) == 0:
+        return matches
+    for j, kw in enumerate(keywords):
+        if not kw:
+            matches[:, j] = True  # 빈 문자열은 모든 파일명에 포함
+            continue
+        matches[_matching_rows(arrays.file_names, arrays.file_name_starts, kw), j] = True
+        matches[_matching_rows(arrays.keywords, arrays.keyword_starts, KEYWORD_SEPARATOR + kw + KEYWORD_SEPARATOR), j] = True
+    return matches
+
+
+# ─────────────────────────────
+# ✅ 점수 함수 (scores, matches) → 최종 점수
+# ─────────────────────────────
+def decaying_bonus_score(scores: np.ndarray, matches: np.ndarray) -> np.ndarray:
+    """교집합 보너스 (0.05, 0.04, 0.03, ...) — 기존 apply_keyword_bonus 와 동일"""
+    counts = np.minimum(matches.sum(axis=1), MAX_BONUS_KEYWORDS)
+    return scores + BONUS_BY_MATCH_COUNT[counts]
+
+
+def bm25_style_score(scores: np.ndarray, matches: np.ndarray, weight: float = 0.05) -> np.ndarray:
+    """후보 집합 안에서 드문 키워드일수록 큰 가중치 (BM25 idf, tf=매칭 여부)"""
+    n_hits = max(len(scores), 1)
+    doc_freq = matches.sum(axis=0)
+    idf = np.log1p((n_hits - doc_freq + 0.5) / (doc_freq + 0.5))
+    keyword_score = matches @ idf
+    max_score = keyword_score.max() if keyword_score.size else 0.0
+    if max_score > 0:
+        keyword_score = keyword_score / max_score
+    return scores + weight * keyword_score
+
+
+def reciprocal_rank_fusion_score(scores: np.ndarray, matches: np.ndarray, k: int = 60) -> np.ndarray:
+    """벡터 점수 순위와 키워드 매칭 수 순위를 RRF 로 결합"""
+    def ranks(values):
+        order = np.argsort(-values, kind="stable")
+        result = np.empty(len(values), dtype=np.float64)
+        result[order] = np.arange(1, len(values) + 1)
+        return result
+
+    return 1.0 / (k + ranks(scores)) + 1.0 / (k + ranks(matches.sum(axis=1).astype(np.float64)))
+
+
+# ✅ 상위 top_k 인덱스 (partition 후 부분 정렬, 동점은 원래 순서 유지)
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    if top_k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < scores.size:
+        kth = -np.partition(-scores, top_k - 1)[top_k - 1]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:top_k - above.size]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(scores.size)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def format_reranked_hit(hit, score: float) -> Dict:
+    payload = hit.payload
+    return {
+        "id": hit.id,
+        "문서ID": payload.get("doc_id", ""),
+        "페이지": payload.get("nPage", ""),
+        "파일명": payload.get("sFileName", ""),
+        "날짜": f"{payload.get('year', '----')}-{payload.get('month', '--')}-{payload.get('day', '--')}",
+        "경로": payload.get("sFilePath", ""),
+        "보안등급": payload.get("sGrade", ""),
+        "본문": payload.get("text", ""),
+        "score": score,
+    }
+
+
+# ✅ 키워드 기반 재정렬 (점수 함수 교체 가능)
+def rerank_hits(
+    hits: Sequence,
+    keywords: Sequence[str],
+    top_k: int,
+    scoring_fn: Callable[[np.ndarray, np.ndarray], np.ndarray] = decaying_bonus_score,
+    scores: Optional[np.ndarray] = None,
+) -> List[Dict]:
+    """scores 를 주면 hit.score 대신 사용 (후보 집합 재사용 시 새 질문 기준 유사도)"""
+    arrays = HitArrays(hits, scores)
+    final_scores = np.round(scoring_fn(arrays.scores, keyword_match_matrix(arrays, keywords)), 5)
+    return [format_reranked_hit(hits[i], float(final_scores[i])) for i in top_k_indices(final_scores, top_k)]
+
+
+# ─────────────────────────────
+# ✅ 순위 목록 결합 (벡터 검색 / BM25 희소 검색 결과를 point id 기준으로 합침)
+# ─────────────────────────────
+def _union_hits(ranked_lists: Sequence[Sequence]):
+    """(중복 없는 hit 목록, 목록별 (hit 번호, 순위 0부터) 배열)"""
+    hits, position = [], {}
+    rows = []
+    for ranked in ranked_lists:
+        list_rows = []
+        for hit in ranked:
+            if hit.id not in position:
+                position[hit.id] = len(hits)
+                hits.append(hit)
+            list_rows.append(position[hit.id])
+        rows.append(np.asarray(list_rows, dtype=np.int64))
+    return hits, rows
+
+
+def rrf_fuse(ranked_lists: Sequence[Sequence], weights: Optional[Sequence[float]] = None, k: int = 60):
+    """Reciprocal Rank Fusion: Σ weight / (k + 순위) — 점수 척도가 다른 목록도 그대로 결합"""
+    hits, rows = _union_hits(ranked_lists)
+    fused = np.zeros(len(hits), dtype=np.float64)
+    for i, list_rows in enumerate(rows):
+        weight = weights[i] if weights is not None else 1.0
+        fused[list_rows] += weight / (k + 1 + np.arange(len(list_rows)))
+    return hits, fused
+
+
+def weighted_fuse(ranked_lists: Sequence[Sequence], weights: Optional[Sequence[float]] = None):
+    """목록별 점수를 min-max 정규화 후 가중합 (목록에 없으면 0)"""
+    hits, rows = _union_hits(ranked_lists)
+    fused = np.zeros(len(hits), dtype=np.float64)
+    for i, (ranked, list_rows) in enumerate(zip(ranked_lists, rows)):
+        if not len(list_rows):
+            continue
+        scores = np.fromiter((float(hit.score) for hit in ranked), dtype=np.float64, count=len(ranked))
+        span = scores.max() - scores.min()
+        normalized = (scores - scores.min()) / span if span > 0 else np.ones_like(scores)
+        fused[list_rows] += (weights[i] if weights is not None else 1.0) * normalized
+    return hits, fused
+
+
+def document_key(hit) -> str:
+    payload = hit.payload or {}
+    return payload.get("doc_id") or payload.get("sFilePath") or str(hit.id)
+
+
+def dedupe_by_document(hits: Sequence, scores: np.ndarray, top_k: int) -> List[Dict]:
+    """같은 문서의 여러 쪽(nPage) 청크 중 점수가 가장 높은 쪽만 남겨 상위 top_k 문서"""
+    results, seen = [], set()
+    scores = np.round(scores, 6)
+    for i in top_k_indices(scores, len(hits)):
+        key = document_key(hits[i])
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append(format_reranked_hit(hits[i], float(scores[i])))
+        if len(results) >= top_k:
+            break
+    return results
+
+
+def dense_vector(vector):
+    return vector[DENSE_VECTOR_NAME] if isinstance(vector, dict) else vector
+
+
+def unit_vectors(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def object_nbytes(value) -> int:
+    """payload (dict / list / 문자열 / 숫자) 의 대략적인 메모리 크기 (sys.getsizeof 재귀 합)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(object_nbytes(key) + object_nbytes(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(object_nbytes(item) for item in value)
+    return size
+
+
+# ✅ 이전 질문의 검색 후보 (후속 질문은 Qdrant 대신 이 안에서 재정렬)
+class CandidateSet:
+    def __init__(self, query_vector, date_keywords: Sequence[str], points: Sequence, user_grade: str = ""):
+        self.query_vector = unit_vectors(query_vector)
+        self.date_keywords = sorted(date_keywords)
+        self.user_grade = user_grade  # 후보를 뽑을 때 적용한 보안등급
+        self.points = list(points)
+        self.vectors = unit_vectors([dense_vector(point.vector) for point in self.points])
+        for point in self.points:
+            point.vector = None  # 벡터는 self.vectors 에만 보관
+        # 캐시 메모리 상한 기준: 벡터 배열 + 포인트별 id / payload
+        self.nbytes = self.vectors.nbytes + self.query_vector.nbytes + sum(
+            sys.getsizeof(point) + object_nbytes(point.id) + object_nbytes(point.payload or {}) for point in self.points
+        )
+
+    def similarity(self, query_vector) -> float:
+        return float(self.query_vector @ unit_vectors(query_vector))
+
+    def covers(self, query_vector, date_keywords: Sequence[str], min_similarity: float) -> bool:
+        """같은 날짜 조건(또는 날짜 없음)이고 후보를 뽑은 질문과 충분히 비슷하면 재사용"""
+        if date_keywords and sorted(date_keywords) != self.date_keywords:
+            return False
+        return self.similarity(query_vector) >= min_similarity
+
+    def rerank(self, query_vector, keywords: Sequence[str], top_k: int, scoring_fn=decaying_bonus_score) -> List[Dict]:
+        scores = self.vectors @ unit_vectors(query_vector)
+        return rerank_hits(self.points, keywords, top_k, scoring_fn=scoring_fn, scores=scores)
@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import List, Dict, AsyncIterator, Optional
+
+from cache_utils import ResponseCache, CollectionVersionTracker, normalize_question
+from keyword_extractor import LocalKeywordExtractor
+from metrics_utils import stage
+from qdrant_utils import (
+    SEARCH_RANKING,
+    async_keyword_then_semantic_rerank,
+    async_followup_search,
+    async_fusion_search,
+    async_collection_version,
+    async_scroll_keyword_terms,
+)
+from session_store import candidate_cache, session_store
+from summary_utils import summarize_documents, summarize_documents_all, summary_store
+from vllm_utils import (
+    async_call_vllm_generate_search_condition,
+    async_call_vllm_answer,
+    async_stream_vllm_answer,
+    clean_llm_keywords,
+    clean_streamed_answer,
+    LLM_CONNECTION_FAILED,
+    LLM_EMPTY_RESPONSE,
+)
+
+logger = logging.getLogger(__name__)
+
+# ✅ 응답 캐시 설정
+RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "64"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "1800"))
+KEYWORD_CACHE_TTL = float(os.getenv("KEYWORD_CACHE_TTL", "86400"))
+COLLECTION_VERSION_REFRESH_SEC = float(os.getenv("COLLECTION_VERSION_REFRESH_SEC", "10"))
+
+response_cache = ResponseCache(max_bytes=int(RESPONSE_CACHE_MAX_MB * 1024 * 1024), ttl=RESPONSE_CACHE_TTL)
+keyword_cache = ResponseCache(max_bytes=int(RESPONSE_CACHE_MAX_MB * 1024 * 1024) // 16, ttl=KEYWORD_CACHE_TTL)
+collection_version = CollectionVersionTracker(async_collection_version, COLLECTION_VERSION_REFRESH_SEC)
+
+# ✅ 키워드 추출 방식: hybrid (로컬 우선, 신뢰도 낮으면 LLM) | local | llm
+KEYWORD_EXTRACTOR_MODE = os.getenv("KEYWORD_EXTRACTOR_MODE", "hybrid")
+KEYWORD_MIN_CONFIDENCE = float(os.getenv("KEYWORD_MIN_CONFIDENCE", "0.6"))
+local_keyword_extractor = LocalKeywordExtractor(min_confidence=KEYWORD_MIN_CONFIDENCE)
+
+# ✅ 문서별 요약 생성 여부 (답변과 동시에 진행)
+SEARCH_SUMMARIES = os.getenv("SEARCH_SUMMARIES", "1") == "1"
+
+# ✅ 같은 세션의 후속 질문은 직전 검색 후보 안에서 재정렬 (주제가 바뀌면 Qdrant 재검색)
+# - SEARCH_RANKING=fusion 이면 매 질문 벡터 + BM25 결합 검색 (후보 재사용 없음)
+FOLLOWUP_REUSE = os.getenv("FOLLOWUP_REUSE", "1") == "1"
+
+
+# ✅ 검색 결과(qdrant_utils 포맷) → UI 문서 카드 포맷 (summaries 가 있으면 요약 포함, None 항목은 생성 중)
+def format_documents(hits: List[Dict], summaries: Optional[List[Optional[str]]] = None) -> List[Dict]:
+    documents = [
+        {
+            "id": hit.get("id"),
+            "file_name": hit.get("파일명", ""),
+            "date": hit.get("날짜", ""),
+            "path": hit.get("경로", ""),
+            "grade": hit.get("보안등급", ""),
+            "accuracy": f"{min(max(hit.get('score', 0.0), 0.0), 1.0) * 100:.1f}%",
+        }
+        for hit in hits
+    ]
+    if summaries is not None:
+        for document, summary in zip(documents, summaries):
+            document["summary"] = summary
+    return documents
+
+
+def is_llm_failure(text: str) -> bool:
+    return LLM_CONNECTION_FAILED in text or LLM_EMPTY_RESPONSE in text
+
+
+# ✅ 로컬 추출 사전 적재 (Qdrant keywords payload)
+async def load_keyword_vocabulary() -> int:
+    local_keyword_extractor.vocabulary.add(await async_scroll_keyword_terms())
+    return len(local_keyword_extractor.vocabulary)
+
+
+# ✅ 키워드 생성 (로컬 추출 → 신뢰도 낮으면 LLM, LLM 결과는 캐시)
+async def extract_keywords(question: str) -> List[str]:
+    with stage("keywords"):
+        return await _extract_keywords(question)
+
+
+async def _extract_keywords(question: str) -> List[str]:
+    if KEYWORD_EXTRACTOR_MODE != "llm":
+        keywords, confidence = local_keyword_extractor.extract(question)
+        if KEYWORD_EXTRACTOR_MODE == "local" or local_keyword_extractor.is_confident(confidence):
+            return keywords
+
+    key = normalize_question(question)
+    keywords = keyword_cache.get(key)
+    if keywords is not None:
+        return keywords
+
+    start = time.perf_counter()
+    keywords = clean_llm_keywords(await async_call_vllm_generate_search_condition(question))
+    if keywords:
+        keyword_cache.put(key, keywords, time.perf_counter() - start)
+    return keywords
+
+
+def response_cache_key(question: str, keywords: List[str], user_grade: str, top_k: int) -> str:
+    return json.dumps([normalize_question(question), sorted(keywords), user_grade, top_k], ensure_ascii=False)
+
+
+async def lookup_cached_response(question: str, top_k: int, user_grade: str):
+    """(캐시 키, 키워드, 캐시된 응답 또는 None)"""
+    response_cache.set_version(await collection_version.current())
+    keywords = await extract_keywords(question)
+    key = response_cache_key(question, keywords, user_grade, top_k)
+    return key, keywords, response_cache.get(key)
+
+
+def build_response(hits: List[Dict], llm_answer: str, summaries: Optional[List[str]] = None) -> Dict:
+    documents = format_documents(hits, summaries)
+    return {
+        "result_count": len(documents),
+        "llm_response": llm_answer,
+        "documents": documents,
+    }
+
+
+# ✅ 검색 (세션이 있으면 후속 질문 후보 재사용)
+async def retrieve(
+    question: str, keywords: List[str], top_k: int, user_grade: str = "", user_id: str = "", session_id: str = ""
+) -> List[Dict]:
+    if SEARCH_RANKING == "fusion":
+        return await async_fusion_search(question, keywords, top_k, user_grade)
+    if not (FOLLOWUP_REUSE and user_id and session_id):
+        return await async_keyword_then_semantic_rerank(question, keywords, top_k, user_grade)
+
+    previous = candidate_cache.get(user_id, session_id)
+    if previous is not None and previous.user_grade != user_grade:
+        previous = None  # 등급이 바뀌면 이전 후보는 사용하지 않음
+    hits, candidates = await async_followup_search(question, keywords, top_k, previous, user_grade)
+    reused = previous is not None and candidates is previous
+    candidate_cache.record(reused, previous is not None)
+    if candidates is not None and not reused:
+        candidate_cache.put(user_id, session_id, candidates)
+    return hits
+
+
+# ✅ 사용자 / 세션별 검색 기록 (질문, 키워드, 검색된 문서 ID, 답변)
+async def record_history(user_id: str, session_id: str, question: str, keywords: List[str], response: Dict):
+    if not user_id or not session_id:
+        return
+    turn = {
+        "question": question,
+        "keywords": keywords,
+        "doc_ids": [document.get("id") for document in response["documents"]],
+        "answer": response["llm_response"],
+        "documents": response["documents"],
+    }
+    try:
+        await asyncio.to_thread(session_store.add_turn, user_id, session_id, turn)
+    except Exception as e:
+        logger.warning(f"⚠️ 검색 기록 저장 실패: {e}")
+
+
+async def record_stream_history(
+    events: AsyncIterator[Dict], user_id: str, session_id: str, question: str, keywords: List[str]
+) -> AsyncIterator[Dict]:
+    """이벤트는 그대로 전달하고, 스트림이 끝나면 최종 문서 / 답변을 기록"""
+    documents, chunks = [], []
+    async for message in events:
+        if message["event"] == "documents":
+            documents = [dict(document) for document in message["data"]["documents"]]
+        elif message["event"] == "summary":
+            documents[message["data"]["index"]]["summary"] = message["data"]["summary"]
+        elif message["event"] == "token":
+            chunks.append(message["data"]["text"])
+        yield message
+
+    response = {"documents": documents, "llm_response": clean_streamed_answer(chunks)}
+    await record_history(user_id, session_id, question, keywords, response)
+
+
+# ✅ 비동기 검색 파이프라인 (키워드 생성 → 검색 → 답변 생성)
+async def run_search_pipeline(
+    question: str, top_k: int = 5, user_grade: str = "", user_id: str = "", session_id: str = ""
+) -> Dict:
+    start = time.perf_counter()
+    key, keywords, cached = await lookup_cached_response(question, top_k, user_grade)
+    if cached is not None:
+        await record_history(user_id, session_id, question, keywords, cached)
+        return cached
+
+    hits = await retrieve(question, keywords, top_k, user_grade, user_id, session_id)
+    if SEARCH_SUMMARIES:
+        llm_answer, summaries = await asyncio.gather(
+            async_call_vllm_answer(question, hits),
+            summarize_documents_all([hit.get("본문", "") for hit in hits]),
+        )
+    else:
+        llm_answer, summaries = await async_call_vllm_answer(question, hits), None
+
+    response = build_response(hits, llm_answer, summaries)
+    if not is_llm_failure(llm_answer):
+        response_cache.put(key, response, time.perf_counter() - start)
+    await record_history(user_id, session_id, question, keywords, response)
+    return response
+
+
+# ✅ 여러 이벤트 스트림을 도착 순서대로 합침 (하나라도 실패하면 예외 전파)
+async def merge_streams(*streams: AsyncIterator[Dict]) -> AsyncIterator[Dict]:
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def _pump(stream):
+        try:
+            async for item in stream:
+                await queue.put(item)
+        finally:
+            await queue.put(finished)
+
+    tasks = [asyncio.create_task(_pump(stream)) for stream in streams]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is finished:
+                remaining -= 1
+                continue
+            yield item
+        for task in tasks:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def answer_token_events(question: str, hits: List[Dict]) -> AsyncIterator[Dict]:
+    async for text in async_stream_vllm_answer(question, hits):
+        yield {"event": "token", "data": {"text": text}}
+
+
+async def summary_events(hits: List[Dict]) -> AsyncIterator[Dict]:
+    async for index, summary in summarize_documents([hit.get("본문", "") for hit in hits]):
+        yield {"event": "summary", "data": {"index": index, "summary": summary}}
+
+
+# ✅ 스트리밍 검색 파이프라인 (문서 목록 먼저 → 답변 토큰 / 문서 요약을 도착 순서대로 전달)
+async def stream_answer_events(
+    question: str, hits: List[Dict], cache_key: Optional[str] = None, start: float = 0.0
+) -> AsyncIterator[Dict]:
+    summaries = [None] * len(hits) if SEARCH_SUMMARIES else None
+    documents = format_documents(hits, summaries)
+    yield {"event": "documents", "data": {"result_count": len(documents), "documents": documents}}
+
+    streams = [answer_token_events(question, hits)]
+    if SEARCH_SUMMARIES:
+        streams.append(summary_events(hits))
+
+    chunks = []
+    async for message in merge_streams(*streams):
+        if message["event"] == "token":
+            chunks.append(message["data"]["text"])
+        else:
+            summaries[message["data"]["index"]] = message["data"]["summary"]
+        yield message
+
+    llm_answer = clean_streamed_answer(chunks)
+    if cache_key is not None and not is_llm_failure(llm_answer):
+        response_cache.put(cache_key, build_response(hits, llm_answer, summaries), time.perf_counter() - start)
+
+    # 최종 답변은 비스트리밍 / 캐시 응답과 같은 정제 결과 (클라이언트가 스트리밍 중 표시한 텍스트를 교체)
+    yield {"event": "done", "data": {"answer": llm_answer}}
+
+
+async def replay_cached_events(response: Dict) -> AsyncIterator[Dict]:
+    yield {"event": "documents", "data": {"result_count": response["result_count"], "documents": response["documents"]}}
+    yield {"event": "token", "data": {"text": response["llm_response"]}}
+    yield {"event": "done", "data": {"answer": response["llm_response"]}}
+
+
+async def stream_search_pipeline(
+    question: str, top_k: int = 5, user_grade: str = "", user_id: str = "", session_id: str = ""
+) -> AsyncIterator[Dict]:
+    """검색은 응답 시작 전에 끝내고 (포화 시 503 가능), 이벤트 스트림을 반환"""
+    start = time.perf_counter()
+    key, keywords, cached = await lookup_cached_response(question, top_k, user_grade)
+    if cached is not None:
+        events = replay_cached_events(cached)
+    else:
+        hits = await retrieve(question, keywords, top_k, user_grade, user_id, session_id)
+        events = stream_answer_events(question, hits, cache_key=key, start=start)
+
+    if user_id and session_id:
+        events = record_stream_history(events, user_id, session_id, question, keywords)
+    return events
+
+
+def cache_stats() -> Dict[str, Dict]:
+    return {
+        "response_cache": response_cache.stats(),
+        "keyword_cache": keyword_cache.stats(),
+        "summary_cache": summary_store.stats(),
+        "followup_candidates": candidate_cache.stats(),
+    }
@@ -0,0 +1,477 @@
+import os
+import hmac
+import json
+import time
+import hashlib
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# ✅ 세션 / 검색 기록 저장소 설정
+# memory: 프로세스 내 LRU + TTL (단일 워커) | sqlite: 파일 공유 (uvicorn 다중 워커, 재시작 후 유지)
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "session_store.sqlite3")
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))  # memory 백엔드 전체 세션 상한
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "50"))  # 세션당 보관하는 질문 수
+SESSION_HISTORY_TTL = float(os.getenv("SESSION_HISTORY_TTL", str(30 * 86400)))  # 마지막 질문 이후 보관 기간
+VERIFICATION_CODE_TTL = float(os.getenv("VERIFICATION_CODE_TTL", "600"))
+AUTH_TOKEN_TTL = float(os.getenv("AUTH_TOKEN_TTL", str(12 * 3600)))  # 로그인 토큰 유효 기간
+# ✅ 후속 질문용 검색 후보 (벡터 + payload, 워커 프로세스 메모리에만 보관, 상한은 둘을 합친 추정 크기)
+FOLLOWUP_CACHE_MAX_MB = float(os.getenv("FOLLOWUP_CACHE_MAX_MB", "64"))
+FOLLOWUP_CACHE_TTL = float(os.getenv("FOLLOWUP_CACHE_TTL", "1800"))
+
+PASSWORD_HASH_ITERATIONS = 100_000
+SQLITE_PRUNE_EVERY = 256  # sqlite 백엔드: 기록 N건마다 만료 세션 정리
+
+
+# ✅ 비밀번호는 salt + PBKDF2 로만 저장
+def hash_password(password: str, salt: Optional[str] = None) -> str:
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), PASSWORD_HASH_ITERATIONS)
+    return f"{salt}${digest.hex()}"
+
+
+def check_password(password: str, stored: str) -> bool:
+    salt, _, _ = stored.partition("$")
+    return hmac.compare_digest(hash_password(password, salt), stored)
+
+
+# ✅ 로그인 토큰 (클라이언트에는 원문, 저장소에는 해시만)
+def new_auth_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def session_summary(session_id: str, turns: List[Dict], created_at: float, updated_at: float) -> Dict:
+    """사이드바 목록 항목 (첫 질문을 제목으로)"""
+    return {
+        "session_id": session_id,
+        "title": turns[0]["question"] if turns else "",
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "turns": len(turns),
+    }
+
+
+# ─────────────────────────────
+# ✅ memory 백엔드 (최근 기록 순 LRU + TTL)
+# ─────────────────────────────
+class MemorySessionStore:
+    def __init__(
+        self,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+        max_turns: int = SESSION_MAX_TURNS,
+        ttl: float = SESSION_HISTORY_TTL,
+        code_ttl: float = VERIFICATION_CODE_TTL,
+        token_ttl: float = AUTH_TOKEN_TTL,
+    ):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.code_ttl = code_ttl
+        self.token_ttl = token_ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._users: Dict[str, str] = {}  # user_id → 비밀번호 해시
+        self._codes: Dict[str, Tuple[str, float]] = {}  # user_id → (인증 코드, 만료 시각)
+        self._tokens: Dict[str, Tuple[str, float]] = {}  # 토큰 해시 → (user_id, 만료 시각)
+        self._sessions: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()  # 마지막 기록이 뒤로
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    # ── 인증 ──
+    def set_verification_code(self, user_id: str, code: str):
+        now = time.time()
+        with self._lock:
+            for expired in [u for u, (_, expires_at) in self._codes.items() if expires_at < now]:
+                del self._codes[expired]
+            self._codes[user_id] = (code, now + self.code_ttl)
+
+    def consume_verification_code(self, user_id: str, code: str) -> bool:
+        """코드가 맞으면 삭제 후 True (틀리면 유지)"""
+        with self._lock:
+            saved = self._codes.get(user_id)
+            if saved is None or saved[1] < time.time():
+                self._codes.pop(user_id, None)
+                return False
+            if not hmac.compare_digest(saved[0], code):
+                return False
+            del self._codes[user_id]
+            return True
+
+    def is_registered(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._users
+
+    def register_user(self, user_id: str, password: str, overwrite: bool = True):
+        password_hash = hash_password(password)
+        with self._lock:
+            if overwrite or user_id not in self._users:
+                self._users[user_id] = password_hash
+
+    def verify_password(self, user_id: str, password: str) -> bool:
+        with self._lock:
+            stored = self._users.get(user_id)
+        return stored is not None and check_password(password, stored)
+
+    def create_auth_token(self, user_id: str) -> str:
+        token = new_auth_token()
+        now = time.time()
+        with self._lock:
+            for expired in [t for t, (_, expires_at) in self._tokens.items() if expires_at < now]:
+                del self._tokens[expired]
+            self._tokens[token_digest(token)] = (user_id, now + self.token_ttl)
+        return token
+
+    def resolve_auth_token(self, token: str) -> Optional[str]:
+        """유효한 토큰이면 user_id, 아니면 None"""
+        with self._lock:
+            saved = self._tokens.get(token_digest(token))
+        return saved[0] if saved is not None and saved[1] >= time.time() else None
+
+    def revoke_auth_token(self, token: str):
+        with self._lock:
+            self._tokens.pop(token_digest(token), None)
+
+    # ── 검색 기록 ──
+    def add_turn(self, user_id: str, session_id: str, turn: Dict):
+        now = time.time()
+        key = (user_id, session_id)
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.pop(key, None)
+            if session is None:
+                session = {"turns": [], "created_at": now}
+                self._by_user.setdefault(user_id, set()).add(session_id)
+            session["turns"].append({**turn, "created_at": now})
+            del session["turns"][:-self.max_turns]
+            session["updated_at"] = now
+            self._sessions[key] = session
+            while len(self._sessions) > self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def list_sessions(self, user_id: str, limit: int, offset: int = 0) -> Tuple[List[Dict], int]:
+        """최근 세션부터 (목록, 전체 수)"""
+        with self._lock:
+            self._expire(time.time())
+            sessions = [(sid, self._sessions[(user_id, sid)]) for sid in self._by_user.get(user_id, ())]
+        sessions.sort(key=lambda item: item[1]["updated_at"], reverse=True)
+        page = [
+            session_summary(sid, s["turns"], s["created_at"], s["updated_at"])
+            for sid, s in sessions[offset:offset + limit]
+        ]
+        return page, len(sessions)
+
+    def get_turns(self, user_id: str, session_id: str, limit: int, offset: int = 0) -> Tuple[List[Dict], int]:
+        """오래된 질문부터 (목록, 전체 수)"""
+        with self._lock:
+            self._expire(time.time())
+            session = self._sessions.get((user_id, session_id))
+            turns = list(session["turns"]) if session else []
+        return turns[offset:offset + limit], len(turns)
+
+    def delete_session(self, user_id: str, session_id: str) -> bool:
+        with self._lock:
+            if (user_id, session_id) not in self._sessions:
+                return False
+            self._drop((user_id, session_id))
+            return True
+
+    def _drop(self, key: Tuple[str, str]):
+        del self._sessions[key]
+        user_sessions = self._by_user.get(key[0])
+        if user_sessions is not None:
+            user_sessions.discard(key[1])
+            if not user_sessions:
+                del self._by_user[key[0]]
+
+    def _expire(self, now: float):
+        # 마지막 기록 순서로 정렬되어 있으므로 앞에서부터 만료 확인
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session["updated_at"] <= self.ttl:
+                break
+            self._drop(key)
+            self.expirations += 1
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "users": len(self._by_user),
+                "auth_tokens": len(self._tokens),
+                "turns": sum(len(s["turns"]) for s in self._sessions.values()),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# ─────────────────────────────
+# ✅ sqlite 백엔드 (WAL, 다중 워커 공유)
+# ─────────────────────────────
+class SQLiteSessionStore:
+    def __init__(
+        self,
+        path: str = SESSION_STORE_PATH,
+        max_turns: int = SESSION_MAX_TURNS,
+        ttl: float = SESSION_HISTORY_TTL,
+        code_ttl: float = VERIFICATION_CODE_TTL,
+        token_ttl: float = AUTH_TOKEN_TTL,
+    ):
+        self.path = path
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.code_ttl = code_ttl
+        self.token_ttl = token_ttl
+        self.writes = 0
+        self._lock = threading.Lock()
+        # 다른 워커가 쓰는 동안에는 잠금 해제까지 대기
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " user_id TEXT PRIMARY KEY, password_hash TEXT NOT NULL, created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS verification_codes ("
+            " user_id TEXT PRIMARY KEY, code TEXT NOT NULL, expires_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS auth_tokens ("
+            " token_hash TEXT PRIMARY KEY, user_id TEXT NOT NULL, expires_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS turns ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, session_id TEXT NOT NULL,"
+            " created_at REAL NOT NULL, question TEXT NOT NULL, turn TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS turns_by_session ON turns (user_id, session_id, id);"
+        )
+        self._conn.commit()
+        self.prune()
+
+    # ── 인증 ──
+    def set_verification_code(self, user_id: str, code: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM verification_codes WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verification_codes (user_id, code, expires_at) VALUES (?, ?, ?)",
+                (user_id, code, now + self.code_ttl),
+            )
+            self._conn.commit()
+
+    def consume_verification_code(self, user_id: str, code: str) -> bool:
+        """코드가 맞으면 삭제 후 True (틀리면 유지, 다른 워커와 동시에 사용해도 한 번만 성공)"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM verification_codes WHERE user_id = ? AND code = ? AND expires_at >= ?",
+                (user_id, code, time.time()),
+            ).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def is_registered(self, user_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def register_user(self, user_id: str, password: str, overwrite: bool = True):
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        password_hash = hash_password(password)
+        with self._lock:
+            self._conn.execute(
+                f"{verb} INTO users (user_id, password_hash, created_at) VALUES (?, ?, ?)",
+                (user_id, password_hash, time.time()),
+            )
+            self._conn.commit()
+
+    def verify_password(self, user_id: str, password: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT password_hash FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return row is not None and check_password(password, row[0])
+
+    def create_auth_token(self, user_id: str) -> str:
+        token = new_auth_token()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO auth_tokens (token_hash, user_id, expires_at) VALUES (?, ?, ?)",
+                (token_digest(token), user_id, time.time() + self.token_ttl),
+            )
+            self._conn.commit()
+        return token
+
+    def resolve_auth_token(self, token: str) -> Optional[str]:
+        """유효한 토큰이면 user_id, 아니면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id FROM auth_tokens WHERE token_hash = ? AND expires_at >= ?",
+                (token_digest(token), time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def revoke_auth_token(self, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM auth_tokens WHERE token_hash = ?", (token_digest(token),))
+            self._conn.commit()
+
+    # ── 검색 기록 ──
+    def add_turn(self, user_id: str, session_id: str, turn: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO turns (user_id, session_id, created_at, question, turn) VALUES (?, ?, ?, ?, ?)",
+                (user_id, session_id, time.time(), turn.get("question", ""), json.dumps(turn, ensure_ascii=False)),
+            )
+            self._conn.execute(
+                "DELETE FROM turns WHERE user_id = ? AND session_id = ? AND id NOT IN ("
+                " SELECT id FROM turns WHERE user_id = ? AND session_id = ? ORDER BY id DESC LIMIT ?)",
+                (user_id, session_id, user_id, session_id, self.max_turns),
+            )
+            self._conn.commit()
+            self.writes += 1
+            prune = self.writes % SQLITE_PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def list_sessions(self, user_id: str, limit: int, offset: int = 0) -> Tuple[List[Dict], int]:
+        """최근 세션부터 (목록, 전체 수)"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, MIN(created_at), MAX(created_at), COUNT(*),"
+                " (SELECT question FROM turns f WHERE f.user_id = t.user_id AND f.session_id = t.session_id"
+                "  ORDER BY id LIMIT 1)"
+                " FROM turns t WHERE user_id = ? GROUP BY session_id HAVING MAX(created_at) >= ?"
+                " ORDER BY MAX(created_at) DESC LIMIT ? OFFSET ?",
+                (user_id, cutoff, limit, offset),
+            ).fetchall()
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM turns WHERE user_id = ?"
+                " GROUP BY session_id HAVING MAX(created_at) >= ?)",
+                (user_id, cutoff),
+            ).fetchone()[0]
+        page = [
+            {"session_id": sid, "title": title, "created_at": created_at, "updated_at": updated_at, "turns": count}
+            for sid, created_at, updated_at, count, title in rows
+        ]
+        return page, total
+
+    def get_turns(self, user_id: str, session_id: str, limit: int, offset: int = 0) -> Tuple[List[Dict], int]:
+        """오래된 질문부터 (목록, 전체 수)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT created_at, turn FROM turns WHERE user_id = ? AND session_id = ? ORDER BY id LIMIT ? OFFSET ?",
+                (user_id, session_id, limit, offset),
+            ).fetchall()
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM turns WHERE user_id = ? AND session_id = ?", (user_id, session_id)
+            ).fetchone()[0]
+        return [{**json.loads(turn), "created_at": created_at} for created_at, turn in rows], total
+
+    def delete_session(self, user_id: str, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM turns WHERE user_id = ? AND session_id = ?", (user_id, session_id)
+            ).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def prune(self):
+        """마지막 질문이 TTL 을 넘긴 세션 / 만료된 인증 코드 / 만료된 로그인 토큰 삭제"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM turns WHERE (user_id, session_id) IN ("
+                " SELECT user_id, session_id FROM turns GROUP BY user_id, session_id HAVING MAX(created_at) < ?)",
+                (now - self.ttl,),
+            )
+            self._conn.execute("DELETE FROM verification_codes WHERE expires_at < ?", (now,))
+            self._conn.execute("DELETE FROM auth_tokens WHERE expires_at < ?", (now,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            sessions, users, turns = self._conn.execute(
+                "SELECT COUNT(DISTINCT user_id || char(31) || session_id), COUNT(DISTINCT user_id), COUNT(*) FROM turns"
+            ).fetchone()
+        return {"sessions": sessions, "users": users, "turns": turns, "writes": self.writes}
+
+
+# ─────────────────────────────
+# ✅ 세션별 직전 검색 후보 (메모리 상한 + TTL, 값은 nbytes 속성을 가진 객체)
+# ─────────────────────────────
+class CandidateCache:
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.reused = 0
+        self.refreshed = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, session_id: str):
+        key = (user_id, session_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+            if entry is not None:
+                self._evict(key)
+            return None
+
+    def put(self, user_id: str, session_id: str, candidates):
+        key = (user_id, session_id)
+        if candidates.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.monotonic(), candidates)
+            self.bytes += candidates.nbytes
+            while self.bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def record(self, reused: bool, had_previous: bool):
+        """재사용 / 주제 변경으로 재검색 / 이전 후보 없음"""
+        with self._lock:
+            if reused:
+                self.reused += 1
+            elif had_previous:
+                self.refreshed += 1
+            else:
+                self.misses += 1
+
+    def _evict(self, key: Tuple[str, str]):
+        self.bytes -= self._entries.pop(key)[1].nbytes
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.reused + self.refreshed + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "reused": self.reused,
+                "refreshed": self.refreshed,
+                "misses": self.misses,
+                "reuse_rate": self.reused / total if total else 0.0,
+            }
+
+
+def create_session_store(backend: str = SESSION_STORE_BACKEND):
+    if backend == "sqlite":
+        return SQLiteSessionStore(SESSION_STORE_PATH)
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"알 수 없는 SESSION_STORE_BACKEND: {backend}")
+
+
+session_store = create_session_store()
+candidate_cache = CandidateCache(max_bytes=int(FOLLOWUP_CACHE_MAX_MB * 1024 * 1024), ttl=FOLLOWUP_CACHE_TTL)
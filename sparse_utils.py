@@ -0,0 +1,62 @@
+"""
+BM25 스타일 희소 벡터 (Qdrant sparse vector "bm25")
+
+- 문서: 토큰별 BM25 tf 포화값 (k1, b, 평균 문서 길이) → 적재 시 기록
+- 질의: 토큰별 1.0 → Qdrant 가 내적 계산, idf 는 컬렉션 설정 Modifier.IDF 로 Qdrant 가 반영
+- 토큰: 영문/숫자 단어 + 한글은 음절 bigram (조사가 붙어도 어간 bigram 이 일치)
+"""
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List
+
+from qdrant_client.models import SparseVector
+
+SPARSE_VECTOR_NAME = "bm25"
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+BM25_AVG_DOC_LEN = float(os.getenv("BM25_AVG_DOC_LEN", "256"))  # 토큰 수 기준 (청크 크기에 맞춰 조정)
+
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in TOKEN_PATTERN.findall((text or "").lower()):
+        if "가" <= word[0] <= "힣" and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def term_index(token: str) -> int:
+    """토큰 → uint32 인덱스 (프로세스와 무관하게 고정, 어휘 사전 불필요)"""
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _sparse_vector(weights: Dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+def document_sparse_text(payload: Dict) -> str:
+    """파일명 / 문서 키워드 / 본문을 함께 색인 (기존 키워드 필터가 보던 필드 포함)"""
+    keywords = " ".join(map(str, payload.get("keywords") or []))
+    return f"{payload.get('sFileName') or ''} {keywords} {payload.get('text') or ''}"
+
+
+def document_sparse_vector(text: str) -> SparseVector:
+    tokens = tokenize(text)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / BM25_AVG_DOC_LEN)
+    weights: Dict[int, float] = {}
+    for token, tf in Counter(tokens).items():
+        index = term_index(token)
+        weights[index] = weights.get(index, 0.0) + tf * (BM25_K1 + 1) / (tf + norm)
+    return _sparse_vector(weights)
+
+
+def query_sparse_vector(text: str) -> SparseVector:
+    return _sparse_vector({term_index(token): 1.0 for token in tokenize(text)})
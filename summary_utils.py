@@ -0,0 +1,166 @@
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+
+from vllm_utils import (
+    async_call_vllm,
+    async_call_vllm_batch,
+    build_summary_prompt,
+    clean_article_text,
+    clean_sentences_preserve_meaning,
+    summary_precheck,
+    LLM_CONNECTION_FAILED,
+    LLM_EMPTY_RESPONSE,
+)
+
+# ✅ 요약 단계 설정
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "summary_cache.sqlite3")
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))  # 요청 하나가 동시에 보내는 vLLM 요청 수
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "4"))  # vLLM 요청 1회에 담는 요약 프롬프트 수 (1 이면 문서별 요청)
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "512"))
+# 프롬프트/모델을 바꾸면 값을 올려 기존 요약을 무효화
+SUMMARY_PROMPT_VERSION = os.getenv("SUMMARY_PROMPT_VERSION", "1")
+
+
+# ✅ 정제된 본문 + 프롬프트 버전 → 캐시 키 (본문이 바뀌면 새로 요약)
+def content_hash(cleaned_text: str) -> str:
+    return hashlib.sha256(f"{SUMMARY_PROMPT_VERSION}\x1f{cleaned_text}".encode("utf-8")).hexdigest()
+
+
+def is_summary_failure(summary: str) -> bool:
+    return not summary or LLM_CONNECTION_FAILED in summary or LLM_EMPTY_RESPONSE in summary
+
+
+# ✅ 요약 영구 저장소 (SQLite, 프로세스 재시작 후에도 유지)
+class SummaryStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "content_hash TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, str]:
+        hashes = list(dict.fromkeys(hashes))
+        if not hashes:
+            return {}
+        placeholders = ",".join("?" * len(hashes))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT content_hash, summary FROM summaries WHERE content_hash IN ({placeholders})", hashes
+            ).fetchall()
+            found = dict(rows)
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (content_hash, summary, created_at) VALUES (?, ?, ?)",
+                (key, summary, time.time()),
+            )
+            self._conn.commit()
+            self.writes += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "writes": self.writes,
+            }
+
+
+summary_store = SummaryStore(SUMMARY_CACHE_PATH)
+
+
+# ✅ 여러 문서 요약 (캐시 조회 → 나머지는 batch_size 개씩 배치 요청을 동시에, 완료되는 배치 순서대로 전달)
+async def summarize_documents(
+    article_texts: List[str],
+    concurrency: int = SUMMARY_CONCURRENCY,
+    store: SummaryStore = None,
+    batch_size: int = SUMMARY_BATCH_SIZE,
+) -> AsyncIterator[Tuple[int, str]]:
+    """(문서 순번, 요약) — 생략/캐시 대상은 즉시, 같은 본문은 한 번만 요약"""
+    store = store or summary_store
+    cleaned = [clean_article_text(text or "") for text in article_texts]
+    skipped = [summary_precheck(text) for text in cleaned]
+    hashes = [content_hash(text) for text in cleaned]
+    cached = await asyncio.to_thread(store.get_many, [h for h, s in zip(hashes, skipped) if s is None])
+
+    pending: Dict[str, List[int]] = {}
+    for i, key in enumerate(hashes):
+        if skipped[i] is not None:
+            yield i, skipped[i]
+        elif key in cached:
+            yield i, cached[key]
+        else:
+            pending.setdefault(key, []).append(i)
+    if not pending:
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    keys = list(pending)
+    batches = [keys[i:i + max(batch_size, 1)] for i in range(0, len(keys), max(batch_size, 1))]
+
+    async def _summarize_one(key: str) -> str:
+        raw_summary = await async_call_vllm(
+            build_summary_prompt(cleaned[pending[key][0]]), max_tokens=SUMMARY_MAX_TOKENS, call_type="summary"
+        )
+        return clean_sentences_preserve_meaning(raw_summary) or LLM_EMPTY_RESPONSE
+
+    async def _summarize(batch: List[str]) -> List[Tuple[str, str]]:
+        async with semaphore:
+            if len(batch) == 1:
+                summaries = [await _summarize_one(batch[0])]
+            else:
+                raw_summaries = await async_call_vllm_batch(
+                    [build_summary_prompt(cleaned[pending[key][0]]) for key in batch],
+                    max_tokens=SUMMARY_MAX_TOKENS, call_type="summary",
+                )
+                summaries = [clean_sentences_preserve_meaning(raw) or LLM_EMPTY_RESPONSE for raw in raw_summaries]
+                # 배치 요청이 실패했거나 빈 응답인 항목만 문서별 요청으로 재시도
+                retry = [i for i, summary in enumerate(summaries) if is_summary_failure(summary)]
+                for i, summary in zip(retry, await asyncio.gather(*(_summarize_one(batch[i]) for i in retry))):
+                    summaries[i] = summary
+        for key, summary in zip(batch, summaries):
+            if not is_summary_failure(summary):
+                await asyncio.to_thread(store.put, key, summary)
+        return list(zip(batch, summaries))
+
+    tasks = [asyncio.create_task(_summarize(batch)) for batch in batches]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for key, summary in await next_done:
+                for i in pending[key]:
+                    yield i, summary
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def summarize_documents_all(article_texts: List[str], concurrency: int = SUMMARY_CONCURRENCY) -> List[str]:
+    summaries = [""] * len(article_texts)
+    async for i, summary in summarize_documents(article_texts, concurrency):
+        summaries[i] = summary
+    return summaries
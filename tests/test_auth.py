@@ -0,0 +1,95 @@
+import os
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(scope="module")
+def app_main(tmp_path_factory):
+    """main 은 import 시 현재 디렉터리에 static/ 을 만들므로 임시 디렉터리에서 import"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    os.environ.setdefault("EMBEDDING_WARMUP", "0")
+    try:
+        yield importlib.import_module("main")
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def client(app_main, monkeypatch):
+    calls = []
+
+    async def run_search_pipeline(question, top_k=5, user_grade="", user_id="", session_id=""):
+        calls.append({"user_grade": user_grade, "user_id": user_id, "session_id": session_id})
+        return {"documents": [], "llm_response": ""}
+
+    store = MemorySessionStore()
+    store.register_user("admin", "1234")
+    store.register_user("user1", "pw")
+    monkeypatch.setattr(app_main, "session_store", store)
+    monkeypatch.setattr(app_main, "run_search_pipeline", run_search_pipeline)
+    http = TestClient(app_main.app)
+    http.calls = calls
+    return http
+
+
+def login(http, user_id: str, password: str) -> dict:
+    token = http.post("/auth/login", json={"user_id": user_id, "password": password}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_clearance_ignores_user_id_in_body(client):
+    client.post("/search/documents", json={"question": "q", "user_id": "admin", "session_id": "s"})
+    assert client.calls[-1] == {"user_grade": "C", "user_id": "", "session_id": "s"}
+
+    client.post("/search/documents", json={"question": "q", "user_id": "admin"}, headers=login(client, "user1", "pw"))
+    assert client.calls[-1]["user_id"] == "user1" and client.calls[-1]["user_grade"] == "C"
+
+    client.post("/search/documents", json={"question": "q"}, headers=login(client, "admin", "1234"))
+    assert client.calls[-1]["user_id"] == "admin" and client.calls[-1]["user_grade"] == "A"
+
+
+def test_logout_revokes_token(client):
+    headers = login(client, "admin", "1234")
+    client.post("/auth/logout", headers=headers)
+    client.post("/search/documents", json={"question": "q"}, headers=headers)
+    assert client.calls[-1]["user_grade"] == "C"
+
+
+def test_wrong_password_gets_no_token(client):
+    assert "token" not in client.post("/auth/login", json={"user_id": "admin", "password": "x"}).json()
+
+
+@pytest.mark.parametrize("make_store", [MemorySessionStore, lambda: SQLiteSessionStore(":memory:")])
+def test_auth_tokens(make_store):
+    store = make_store()
+    token = store.create_auth_token("admin")
+    assert store.resolve_auth_token(token) == "admin"
+    assert store.resolve_auth_token(token + "x") is None
+    store.revoke_auth_token(token)
+    assert store.resolve_auth_token(token) is None
+
+    store.token_ttl = -1
+    assert store.resolve_auth_token(store.create_auth_token("admin")) is None
+
+
+def test_history_requires_owner_token(client, app_main):
+    app_main.session_store.add_turn("admin", "s1", {"question": "기밀 질문", "answer": "기밀 답변"})
+
+    assert client.get("/history/list", params={"user_id": "admin"}).status_code == 401
+    assert client.get("/history/s1", params={"user_id": "admin"}).status_code == 401
+    assert client.delete("/history/s1", params={"user_id": "admin"}).status_code == 401
+
+    other = login(client, "user1", "pw")
+    assert client.get("/history/list", params={"user_id": "admin"}, headers=other).json()["total"] == 0
+    assert client.get("/history/s1", params={"user_id": "admin"}, headers=other).json()["turns"] == []
+    assert client.delete("/history/s1", params={"user_id": "admin"}, headers=other).json()["deleted"] is False
+
+    owner = login(client, "admin", "1234")
+    assert client.get("/history/list", headers=owner).json()["total"] == 1
+    assert client.get("/history/s1", headers=owner).json()["turns"][0]["answer"] == "기밀 답변"
+    assert client.delete("/history/s1", headers=owner).json()["deleted"] is True
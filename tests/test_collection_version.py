@@ -0,0 +1,60 @@
+import json
+import asyncio
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from cache_utils import CollectionVersionTracker, ResponseCache
+from collection_bootstrap import collection_version_key
+from ingest_documents import DocumentIngestor, IngestState
+
+COLLECTION = "docs_test_all"
+
+
+def encode(texts):
+    return np.array([[1.0, float(len(text) % 7 + 1)] for text in texts], dtype=np.float32)
+
+
+def write_records(path, text):
+    record = {"doc_id": "doc-1", "sFileName": "24년_1월_설비_점검.pdf", "text": text}
+    path.write_text(json.dumps(record, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def test_reingest_with_same_point_count_invalidates_response_cache(tmp_path):
+    client = QdrantClient(location=":memory:")
+    ingestor = DocumentIngestor(client, COLLECTION, encode, IngestState(str(tmp_path / "state.sqlite3")), upsert_workers=1)
+    ingestor.ensure_collection(2)
+
+    async def fetch_version():
+        return await asyncio.to_thread(lambda: collection_version_key(client.get_collection(COLLECTION)))
+
+    tracker = CollectionVersionTracker(fetch_version, refresh_interval=0)
+    cache = ResponseCache(max_bytes=1 << 20, ttl=60)
+
+    source = tmp_path / "docs.jsonl"
+    write_records(source, "1호기 점검 결과 이상 없음.")
+    ingestor.ingest_file(str(source))
+    cache.set_version(asyncio.run(tracker.current()))
+    cache.put("질문", {"llm_response": "이상 없음"})
+    points_before = client.count(COLLECTION).count
+
+    write_records(source, "1호기 점검 결과 베어링 교체 필요.")
+    ingestor.ingest_file(str(source), restart=True)
+    assert client.count(COLLECTION).count == points_before
+
+    cache.set_version(asyncio.run(tracker.current()))
+    assert cache.get("질문") is None
+    assert cache.invalidations == 1
+
+
+def test_unchanged_reingest_keeps_version(tmp_path):
+    client = QdrantClient(location=":memory:")
+    ingestor = DocumentIngestor(client, COLLECTION, encode, IngestState(str(tmp_path / "state.sqlite3")), upsert_workers=1)
+    ingestor.ensure_collection(2)
+    source = tmp_path / "docs.jsonl"
+    write_records(source, "1호기 점검 결과 이상 없음.")
+
+    ingestor.ingest_file(str(source))
+    version = collection_version_key(client.get_collection(COLLECTION))
+    ingestor.ingest_file(str(source), restart=True)  # content hash 가 같으면 건너뜀
+    assert collection_version_key(client.get_collection(COLLECTION)) == version
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from embedding_utils import EmbeddingBatcher, detached_future
+
+
+def blocking_encoder(release: threading.Event):
+    def encode(texts):
+        release.wait(5)
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+
+    return encode
+
+
+def test_cancelled_future_does_not_kill_batcher():
+    release = threading.Event()
+    batcher = EmbeddingBatcher(blocking_encoder(release), window_ms=0, max_batch=1)
+    first = batcher.submit("점검")
+    cancelled = batcher.submit("설비 점검")
+    assert cancelled.cancel()
+    release.set()
+
+    assert first.result(timeout=5)[0] == 2.0
+    assert batcher.submit("보고서 목록").result(timeout=5)[0] == 6.0
+    assert batcher._worker.is_alive()
+
+
+def test_cancelled_awaiter_does_not_cancel_shared_batch_future():
+    release = threading.Event()
+    batcher = EmbeddingBatcher(blocking_encoder(release), window_ms=0)
+    shared = batcher.submit("점검")
+
+    async def cancel_waiter():
+        waiter = asyncio.ensure_future(asyncio.wrap_future(detached_future(shared)))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return waiter.cancelled()
+
+    assert asyncio.run(cancel_waiter())
+    assert not shared.cancelled()
+    release.set()
+    assert shared.result(timeout=5)[0] == 2.0
+    assert batcher.submit("설비").result(timeout=5)[0] == 2.0
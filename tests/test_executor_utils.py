@@ -0,0 +1,93 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from executor_utils import BoundedExecutor, ExecutorSaturatedError
+
+
+def test_async_waiters_wait_on_the_loop_and_respect_queue_timeout():
+    executor = BoundedExecutor("test", max_workers=1, max_concurrency=2, queue_timeout=0.2)
+
+    async def hold(seconds: float):
+        async with executor.async_slot():
+            await asyncio.sleep(seconds)
+
+    async def run():
+        holders = [asyncio.create_task(hold(1.0)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(hold(0)) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queue_depth"] == 50
+        # 대기자가 기본 스레드 풀을 점유하지 않음
+        start = time.monotonic()
+        await asyncio.to_thread(lambda: None)
+        assert time.monotonic() - start < 0.1
+
+        start = time.monotonic()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert time.monotonic() - start < 0.5
+        assert all(isinstance(result, ExecutorSaturatedError) for result in results)
+        await asyncio.gather(*holders)
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert (stats["queue_depth"], stats["in_flight"], stats["rejected"], stats["acquired"]) == (0, 0, 50, 2)
+
+
+def test_released_slot_is_handed_to_waiters_in_order():
+    executor = BoundedExecutor("test", max_workers=1, max_concurrency=1, queue_timeout=2.0)
+    order = []
+
+    async def task(name: str):
+        async with executor.async_slot():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        async with executor.async_slot():
+            tasks = [asyncio.create_task(task(name)) for name in "abc"]
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["a", "b", "c"]
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_sync_and_async_callers_share_the_limit():
+    executor = BoundedExecutor("test", max_workers=1, max_concurrency=1, queue_timeout=2.0)
+    acquired = threading.Event()
+
+    def sync_caller():
+        with executor.slot():
+            acquired.set()
+
+    async def run():
+        async with executor.async_slot():
+            thread = threading.Thread(target=sync_caller)
+            thread.start()
+            await asyncio.sleep(0.05)
+            assert not acquired.is_set() and executor.stats()["queue_depth"] == 1
+        await asyncio.to_thread(thread.join, 2.0)
+
+    asyncio.run(run())
+    assert acquired.is_set() and executor.stats()["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    executor = BoundedExecutor("test", max_workers=1, max_concurrency=1, queue_timeout=5.0)
+
+    async def run():
+        async with executor.async_slot():
+            waiter = asyncio.create_task(executor.async_slot().__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        async with executor.async_slot():
+            pass
+
+    asyncio.run(run())
+    assert executor.stats()["in_flight"] == 0
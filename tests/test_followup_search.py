@@ -0,0 +1,84 @@
+import asyncio
+import concurrent.futures
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct
+
+import qdrant_utils
+from collection_bootstrap import create_collection_kwargs
+from sparse_utils import SPARSE_VECTOR_NAME, document_sparse_text, document_sparse_vector
+
+DIM = 8
+DOCS = [
+    {"doc_id": f"DOC{i}", "nPage": 1, "sFileName": f"24년_3월_설비기술그룹_연신설비_{i}.pdf", "sGrade": "C",
+     "year": 2024, "month": 3, "day": 1, "keywords": ["설비기술그룹", "연신설비"], "text": f"연신설비 점검 {i}"}
+    for i in range(20)
+]
+
+
+def query_vector(question: str) -> np.ndarray:
+    return np.random.default_rng(len(question)).standard_normal(DIM).astype(np.float32)
+
+
+@pytest.fixture
+def sparse_collection(monkeypatch):
+    """ingest_documents / --migrate-sparse 와 같은 구성 (밀집 + bm25 희소 벡터)"""
+    async def build():
+        client = AsyncQdrantClient(location=":memory:")
+        await client.create_collection(qdrant_utils.collection_name, **create_collection_kwargs(DIM, sparse=True))
+        rng = np.random.default_rng(0)
+        await client.upsert(qdrant_utils.collection_name, points=[
+            PointStruct(id=i, payload=doc, vector={
+                "": rng.standard_normal(DIM).tolist(),
+                SPARSE_VECTOR_NAME: document_sparse_vector(document_sparse_text(doc)),
+            })
+            for i, doc in enumerate(DOCS)
+        ])
+        return client
+
+    def submit_encode_query(question: str):
+        future = concurrent.futures.Future()
+        future.set_result(query_vector(question))
+        return future
+
+    monkeypatch.setattr(qdrant_utils, "async_qdrant_client", asyncio.run(build()))
+    monkeypatch.setattr(qdrant_utils, "submit_encode_query", submit_encode_query)
+
+
+def test_followup_search_on_sparse_collection(sparse_collection):
+    async def run():
+        hits, candidates = await qdrant_utils.async_followup_search("2024년 연신설비 점검", ["2024", "연신설비"], 5)
+        assert len(hits) == 5
+        assert candidates is not None and candidates.vectors.shape == (len(candidates.points), DIM)
+        # 후보는 메타데이터만, 본문은 최종 top_k 만 따로 조회
+        assert all("text" not in point.payload for point in candidates.points)
+        assert [hit["본문"] for hit in hits] == [DOCS[hit["id"]]["text"] for hit in hits]
+
+        # 같은 질문 → 이전 후보 재사용 (Qdrant 재검색 없이 재정렬)
+        followup_hits, reused = await qdrant_utils.async_followup_search(
+            "2024년 연신설비 점검", ["2024", "연신설비"], 5, previous=candidates
+        )
+        assert reused is candidates
+        assert [hit["id"] for hit in followup_hits] == [hit["id"] for hit in hits]
+        assert [hit["본문"] for hit in followup_hits] == [hit["본문"] for hit in hits]
+
+    asyncio.run(run())
+
+
+def test_candidate_set_size_counts_payloads():
+    from qdrant_client.models import ScoredPoint
+    from rerank_utils import CandidateSet
+
+    def points(text_size: int):
+        return [
+            ScoredPoint(id=i, version=0, score=0.5, payload={**doc, "text": "가" * text_size}, vector=[0.1] * DIM)
+            for i, doc in enumerate(DOCS)
+        ]
+
+    small = CandidateSet(query_vector("질문"), [], points(0))
+    large = CandidateSet(query_vector("질문"), [], points(1000))
+    vector_bytes = small.vectors.nbytes + small.query_vector.nbytes
+    assert small.nbytes > vector_bytes + len(DOCS) * 100
+    assert large.nbytes - small.nbytes >= len(DOCS) * 2000  # 한글 1000자 ≈ 2KB (UCS-2)
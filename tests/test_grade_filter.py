@@ -0,0 +1,38 @@
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+import qdrant_utils
+from collection_bootstrap import create_collection_kwargs, ensure_payload_indexes
+
+GRADES = {1: "A", 2: "B", 3: "C", 4: "", 5: None, 6: "missing"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    client = QdrantClient(location=":memory:")
+    client.create_collection("grades", **create_collection_kwargs(2))
+    ensure_payload_indexes(client, "grades")
+    client.upsert("grades", points=[
+        PointStruct(id=i, vector=[1.0, 0.0], payload={} if grade == "missing" else {"sGrade": grade})
+        for i, grade in GRADES.items()
+    ])
+    return client
+
+
+def visible_ids(client, user_grade: str):
+    points, _ = client.scroll("grades", scroll_filter=qdrant_utils.apply_grade_filter(None, user_grade), limit=10)
+    return sorted(point.id for point in points)
+
+
+def test_grade_filter_hides_higher_grades(client, monkeypatch):
+    monkeypatch.setattr(qdrant_utils, "SECURITY_ALLOW_UNGRADED", False)
+    assert visible_ids(client, "C") == [3]
+    assert visible_ids(client, "B") == [2, 3]
+    assert visible_ids(client, "") == [1, 2, 3, 4, 5, 6]
+
+
+def test_allow_ungraded_includes_empty_string_grade(client, monkeypatch):
+    monkeypatch.setattr(qdrant_utils, "SECURITY_ALLOW_UNGRADED", True)
+    assert visible_ids(client, "C") == [3, 4, 5, 6]
+    assert visible_ids(client, "B") == [2, 3, 4, 5, 6]
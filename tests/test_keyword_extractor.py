@@ -0,0 +1,64 @@
+import pytest
+
+from keyword_extractor import KeywordVocabulary, LocalKeywordExtractor, extract_date_parts, strip_particles
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2024.01.15 회의록", (2024, 1, 15)),
+    ("2023-5 점검 보고서", (2023, 5, None)),
+    ("2024/01/15. 회의록", (2024, 1, 15)),
+    ("23년도 5월 점검", (2023, 5, None)),
+])
+def test_date_expressions(text, expected):
+    assert extract_date_parts(text)[:3] == expected
+
+
+@pytest.mark.parametrize("text", [
+    "압력 10.5 이상 기록",
+    "펌웨어 3.10.2 업데이트",
+    "v1.2.3 배포 문서",
+    "해상도 1024-768 설정",
+    "버전 2.2024.01 변경",
+])
+def test_numbers_and_versions_are_not_dates(text):
+    year, month, day, rest = extract_date_parts(text)
+    assert (year, month, day) == (None, None, None)
+    assert rest == text
+
+
+@pytest.mark.parametrize("token, stem", [
+    ("설비에서는", "설비"),
+    ("보고서를", "보고서"),
+    ("회의록으로는", "회의록"),
+    ("점검", "점검"),
+])
+def test_strip_particles_takes_most_stripped_candidate(token, stem):
+    assert strip_particles(token) == stem
+
+
+@pytest.mark.parametrize("token, stem", [
+    ("점검결과", "점검결과"),  # "과" 는 명사 끝 글자 (결과)
+    ("점검결과의", "점검결과"),
+    ("설비점검과", "설비점검"),
+    ("회로도", "회로도"),
+])
+def test_ambiguous_particles_keep_unknown_nouns(token, stem):
+    assert strip_particles(token) == stem
+
+
+def test_ambiguous_particle_stripped_when_stem_is_known():
+    assert strip_particles("설비도", KeywordVocabulary(["설비"])) == "설비"
+    assert strip_particles("설비도") == "설비도"
+
+
+def test_filename_keywords_keep_compound_nouns():
+    from ingest_documents import filename_metadata
+
+    assert filename_metadata("24년_3월_연신설비_점검결과.pdf") == (2024, 3, None, ["연신설비", "점검결과"])
+
+
+def test_unknown_word_falls_back_to_most_stripped_candidate():
+    extractor = LocalKeywordExtractor(KeywordVocabulary(["보고서"]))
+    keywords, confidence = extractor.extract("변전소에서는 보고서를 찾아줘")
+    assert keywords == ["변전소", "보고서"]
+    assert confidence == 0.5
@@ -0,0 +1,69 @@
+import asyncio
+
+import summary_utils
+from summary_utils import SummaryStore, summarize_documents_all
+from vllm_utils import LLM_CONNECTION_FAILED
+
+ARTICLES = [
+    f"{n}호기 냉각수 펌프 교체 작업 후 압력 점검 결과 정상 범위를 확인하였으며 다음 점검은 분기별로 진행한다."
+    for n in range(1, 6)
+]
+
+
+def summarize(monkeypatch, tmp_path, batch_results, batch_size=2):
+    calls = {"batch": [], "single": 0}
+
+    async def fake_batch(prompts, **kwargs):
+        calls["batch"].append(len(prompts))
+        return batch_results(prompts)
+
+    async def fake_single(prompt, **kwargs):
+        calls["single"] += 1
+        return f"단건 요약 {prompt.split('호기')[0].split()[-1]}"
+
+    monkeypatch.setattr(summary_utils, "async_call_vllm_batch", fake_batch)
+    monkeypatch.setattr(summary_utils, "async_call_vllm", fake_single)
+    store = SummaryStore(str(tmp_path / "summary.sqlite3"))
+
+    async def run():
+        summaries = [""] * len(ARTICLES)
+        async for i, summary in summary_utils.summarize_documents(ARTICLES, 2, store, batch_size):
+            summaries[i] = summary
+        return summaries
+
+    return asyncio.run(run()), calls, store
+
+
+def test_summaries_are_sent_in_batches(monkeypatch, tmp_path):
+    summaries, calls, store = summarize(
+        monkeypatch, tmp_path, lambda prompts: [f"배치 요약 {len(prompt)}" for prompt in prompts]
+    )
+    assert calls["batch"] == [2, 2]  # 5건 → 배치 2건 x 2 + 마지막 1건은 문서별 요청
+    assert calls["single"] == 1
+    assert all(summaries)
+    assert store.stats()["writes"] == 5
+
+
+def test_failed_batch_items_fall_back_to_single_requests(monkeypatch, tmp_path):
+    def partial_failure(prompts):
+        return [LLM_CONNECTION_FAILED if i % 2 else "배치 요약" for i in range(len(prompts))]
+
+    summaries, calls, _ = summarize(monkeypatch, tmp_path, partial_failure, batch_size=5)
+    assert calls["batch"] == [5]
+    assert calls["single"] == 2
+    assert summaries == ["배치 요약", "단건 요약 2", "배치 요약", "단건 요약 4", "배치 요약"]
+
+
+def test_summarize_documents_all_keeps_order(monkeypatch, tmp_path):
+    monkeypatch.setattr(summary_utils, "summary_store", SummaryStore(str(tmp_path / "all.sqlite3")))
+
+    async def fake_batch(prompts, **kwargs):
+        return [await fake_single(prompt) for prompt in prompts]
+
+    async def fake_single(prompt, **kwargs):
+        return prompt.strip().splitlines()[-1][:3]
+
+    monkeypatch.setattr(summary_utils, "async_call_vllm_batch", fake_batch)
+    monkeypatch.setattr(summary_utils, "async_call_vllm", fake_single)
+    summaries = asyncio.run(summarize_documents_all(ARTICLES))
+    assert summaries == [f"{n}호기" for n in range(1, 6)]
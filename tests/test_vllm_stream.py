@@ -0,0 +1,85 @@
+import json
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from vllm_utils import (
+    ReasoningStripper,
+    ThinkStripper,
+    VLLMClient,
+    call_vllm_answer,
+    clean_completion_text,
+    clean_sentences_preserve_meaning,
+    clean_streamed_answer,
+)
+
+RAW_ANSWERS = [
+    "<think>질문 분석</think>\n2023년 점검 보고서가 있습니다.\nAnalysis: 문서 3건 비교\n추가 문서는 없습니다.",
+    "보고서 두 건을 찾았습니다. Step-by-step 으로 보면\n첫째 문서가 가장 최근입니다.",
+    "reasoning 생략",
+    "관련 문서를 찾지 못했습니다.",
+]
+
+
+def random_chunks(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(1, 12))))
+    return [text[start:end] for start, end in zip([0, *cuts], [*cuts, len(text)])]
+
+
+def strip_stream(chunks):
+    think, reasoning = ThinkStripper(), ReasoningStripper()
+    output = [reasoning.feed(think.feed(chunk)) for chunk in chunks]
+    return "".join(output) + reasoning.feed(think.flush()) + reasoning.flush()
+
+
+@pytest.mark.parametrize("raw", RAW_ANSWERS)
+def test_stream_filters_match_clean_completion_text(raw):
+    rng = random.Random(7)
+    for _ in range(50):
+        streamed = strip_stream(random_chunks(raw, rng))
+        assert streamed.strip() == clean_completion_text(raw)
+
+
+def stream_transport(raw):
+    def handler(request):
+        lines = [f"data: {json.dumps({'choices': [{'text': raw[i:i + 3]}]})}\n\n" for i in range(0, len(raw), 3)]
+        return httpx.Response(200, content="".join(lines) + "data: [DONE]\n\n")
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.parametrize("raw", RAW_ANSWERS)
+def test_streamed_answer_matches_non_streamed(raw, monkeypatch):
+    client = VLLMClient()
+    client._async_client = httpx.AsyncClient(transport=stream_transport(raw))
+
+    async def collect():
+        chunks = [text async for text in client.astream("질문")]
+        await client.aclose()
+        return chunks
+
+    chunks = asyncio.run(collect())
+    assert not any("analysis" in chunk.lower() or "<think>" in chunk for chunk in chunks)
+
+    monkeypatch.setattr("vllm_utils.call_vllm", lambda *args, **kwargs: clean_completion_text(raw))
+    assert clean_streamed_answer(chunks) == call_vllm_answer("질문", [])
+    assert clean_streamed_answer(chunks) == clean_sentences_preserve_meaning(clean_completion_text(raw))
+
+
+def test_stream_done_event_carries_cleaned_answer(monkeypatch):
+    import search_pipeline
+
+    async def fake_stream(question, hits):
+        for text in ["<b>점검", "</b> 결과", "<img src=x onerror=alert(1)>입니다."]:
+            yield text
+
+    monkeypatch.setattr(search_pipeline, "SEARCH_SUMMARIES", False)
+    monkeypatch.setattr(search_pipeline, "async_stream_vllm_answer", fake_stream)
+
+    async def collect():
+        return [message async for message in search_pipeline.stream_answer_events("질문", [])]
+
+    events = asyncio.run(collect())
+    assert events[-1] == {"event": "done", "data": {"answer": "점검 결과입니다."}}
@@ -1,9 +1,37 @@
-import requests
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import httpx
 import re
+from typing import Dict, List, Optional
+
+from metrics_utils import format_fields, record_stage, stage
+
+logger = logging.getLogger(__name__)
 
 # ✅ vLLM API 서버 (Qwen32B 기반)
-VLLM_API_URL = "http://localhost:8000/v1/completions"  # ← 실제 포트 확인 필요
-MODEL_ID = "/model"  # 도커 내 Qwen3-32B 경로 (vLLM 기본값)
+VLLM_API_URL = os.getenv("VLLM_API_URL", "http://localhost:8000/v1/completions")  # ← 실제 포트 확인 필요
+MODEL_ID = os.getenv("VLLM_MODEL_ID", "/model")  # 도커 내 Qwen3-32B 경로 (vLLM 기본값)
+VLLM_MAX_CONNECTIONS = int(os.getenv("VLLM_MAX_CONNECTIONS", "64"))
+
+# ✅ 호출 유형별 타임아웃(초) / 재시도 / 서킷 브레이커
+VLLM_TIMEOUTS = {
+    "keywords": float(os.getenv("VLLM_TIMEOUT_KEYWORDS", "10")),
+    "answer": float(os.getenv("VLLM_TIMEOUT_ANSWER", "60")),
+    "summary": float(os.getenv("VLLM_TIMEOUT_SUMMARY", "60")),
+    "default": float(os.getenv("VLLM_TIMEOUT", "60")),
+}
+VLLM_MAX_RETRIES = int(os.getenv("VLLM_MAX_RETRIES", "2"))
+VLLM_RETRY_BACKOFF = float(os.getenv("VLLM_RETRY_BACKOFF", "0.2"))
+VLLM_BREAKER_THRESHOLD = int(os.getenv("VLLM_BREAKER_THRESHOLD", "5"))
+VLLM_BREAKER_RESET_SEC = float(os.getenv("VLLM_BREAKER_RESET_SEC", "30"))
+
+LLM_CONNECTION_FAILED = "[❌ LLM 서버 연결 실패]"
+LLM_EMPTY_RESPONSE = "[⚠️ LLM 응답에 텍스트 없음]"
 
 # ✅ 시스템 프롬프트 (think 차단 + 한국어 응답 고정)
 SYSTEM_PROMPT = """
@@ -15,47 +43,392 @@ SYSTEM_PROMPT = """
 """
 
 
-# ✅ 1️⃣ vLLM API 호출 함수
-def call_vllm(prompt, max_tokens=256, stop=None):
+# ✅ 1️⃣ vLLM 응답 처리
+def build_vllm_payload(prompt, max_tokens=256, stop=None):
+    payload = {
+        "model": MODEL_ID,
+        "prompt": [p.strip() for p in prompt] if isinstance(prompt, list) else prompt.strip(),
+        "max_tokens": max_tokens,
+        "temperature": 0.4,
+    }
+    if stop:
+        payload["stop"] = stop
+    return payload
+
+
+# ✅ reasoning 표식 (표식부터 줄 끝까지 제거, 스트리밍 / 비스트리밍 공통)
+REASONING_MARKERS = ("reasoning", "analysis") + tuple(
+    f"step{first}by{second}step" for first in ("", " ", "-") for second in ("", " ", "-")
+)
+REASONING_MARKER_PATTERN = re.compile("|".join(map(re.escape, REASONING_MARKERS)), flags=re.IGNORECASE)
+REASONING_LINE_PATTERN = re.compile(f"(?:{REASONING_MARKER_PATTERN.pattern}).*", flags=re.IGNORECASE)
+
+
+def clean_completion_text(text):
+    # ✅ think / system / reasoning 필터링
+    text = text.strip()
+    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
+    text = REASONING_LINE_PATTERN.sub("", text)
+    return text.strip()
+
+
+def extract_vllm_texts(result, n_prompts=1):
+    # 🔹 LLM 응답 추출 (배치 요청은 choices[].index 가 프롬프트 순서)
+    texts = [LLM_EMPTY_RESPONSE] * n_prompts
+    for position, choice in enumerate(result.get("choices", [])):
+        index = choice.get("index", position)
+        if 0 <= index < n_prompts and "text" in choice:
+            texts[index] = clean_completion_text(choice.get("text", ""))
+    return texts
+
+
+def extract_vllm_text(result):
+    return extract_vllm_texts(result, 1)[0]
+
+
+# ✅ 1️⃣-2 스트리밍 응답용 증분 제거기 (<think> 구간 / reasoning 줄, clean_completion_text 와 같은 규칙)
+class ThinkStripper:
+    """청크 경계에 걸친 <think>...</think> 구간을 스트림 상태로 제거"""
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.buffer = ""
+        self.in_think = False
+
+    @staticmethod
+    def _partial_tag_len(text, tag):
+        # text 끝부분이 tag 의 앞부분과 일치하는 최대 길이 (다음 청크에서 완성될 수 있음)
+        for size in range(min(len(text), len(tag) - 1), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        output = []
+        while self.buffer:
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            index = self.buffer.find(tag)
+            if index >= 0:
+                if not self.in_think:
+                    output.append(self.buffer[:index])
+                self.buffer = self.buffer[index + len(tag):]
+                self.in_think = not self.in_think
+                continue
+
+            keep = self._partial_tag_len(self.buffer, tag)
+            if not self.in_think:
+                output.append(self.buffer[:len(self.buffer) - keep])
+            self.buffer = self.buffer[len(self.buffer) - keep:]
+            break
+        return "".join(output)
+
+    def flush(self) -> str:
+        text = "" if self.in_think else self.buffer
+        self.buffer = ""
+        return text
+
+
+class ReasoningStripper:
+    """reasoning 표식이 나오면 그 줄 끝까지 버리고, 청크 끝의 표식 앞부분은 다음 청크까지 보류"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.in_reasoning = False
+
+    @staticmethod
+    def _partial_marker_len(text):
+        tail = text[-(max(map(len, REASONING_MARKERS)) - 1):].lower()
+        for size in range(len(tail), 0, -1):
+            if any(marker.startswith(tail[-size:]) for marker in REASONING_MARKERS):
+                return size
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        output = []
+        while self.buffer:
+            if self.in_reasoning:
+                index = self.buffer.find("\n")
+                if index < 0:
+                    self.buffer = ""
+                    break
+                self.buffer = self.buffer[index:]
+                self.in_reasoning = False
+                continue
+
+            match = REASONING_MARKER_PATTERN.search(self.buffer)
+            if match:
+                output.append(self.buffer[:match.start()])
+                self.buffer = self.buffer[match.end():]
+                self.in_reasoning = True
+                continue
+
+            keep = self._partial_marker_len(self.buffer)
+            output.append(self.buffer[:len(self.buffer) - keep])
+            self.buffer = self.buffer[len(self.buffer) - keep:]
+            break
+        return "".join(output)
+
+    def flush(self) -> str:
+        text = "" if self.in_reasoning else self.buffer
+        self.buffer = ""
+        return text
+
+
+# ✅ 1️⃣-3 vLLM 클라이언트 (커넥션 풀 + 호출 유형별 타임아웃 + 지터 재시도 + 서킷 브레이커)
+class VLLMError(Exception):
+    """재시도 후에도 실패했거나 서킷이 열려 있는 경우"""
+
+
+class VLLMCircuitOpenError(VLLMError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"  # 시험 요청 허용
+            return self.state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+class VLLMClient:
+    def __init__(
+        self,
+        api_url: str = VLLM_API_URL,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_connections: int = VLLM_MAX_CONNECTIONS,
+        max_retries: int = VLLM_MAX_RETRIES,
+        retry_backoff: float = VLLM_RETRY_BACKOFF,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.api_url = api_url
+        self.timeouts = timeouts or VLLM_TIMEOUTS
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker(VLLM_BREAKER_THRESHOLD, VLLM_BREAKER_RESET_SEC)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    # ─────────────────────────────
+    # 연결 관리 (keep-alive 풀 재사용)
+    # ─────────────────────────────
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(headers={"Content-Type": "application/json"}, limits=self._limits)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(headers={"Content-Type": "application/json"}, limits=self._limits)
+        return self._async_client
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+        self.close()
+
+    def timeout(self, call_type: str) -> httpx.Timeout:
+        return httpx.Timeout(self.timeouts.get(call_type, self.timeouts["default"]), connect=5.0)
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))  # full jitter
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            raise VLLMCircuitOpenError("vLLM 서킷 열림 (연속 실패로 호출 차단 중)")
+
+    def _should_retry(self, exc: Exception, attempt: int) -> bool:
+        if not is_retryable(exc):
+            return False
+        self.breaker.record_failure()
+        return attempt < self.max_retries and self.breaker.allow()
+
+    # ─────────────────────────────
+    # 동기 호출
+    # ─────────────────────────────
+    def _post(self, payload: Dict, call_type: str) -> Dict:
+        self._check_breaker()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.post(self.api_url, json=payload, timeout=self.timeout(call_type))
+                response.raise_for_status()
+                self.breaker.record_success()
+                return response.json()
+            except httpx.HTTPError as e:
+                if not self._should_retry(e, attempt):
+                    raise VLLMError(str(e)) from e
+                time.sleep(self.backoff_delay(attempt))
+
+    def complete(self, prompt: str, max_tokens=256, stop=None, call_type="default") -> str:
+        return extract_vllm_text(self._post(build_vllm_payload(prompt, max_tokens, stop), call_type))
+
+    def complete_batch(self, prompts: List[str], max_tokens=256, stop=None, call_type="default") -> List[str]:
+        """여러 프롬프트를 한 번의 /v1/completions 요청으로 처리"""
+        if not prompts:
+            return []
+        return extract_vllm_texts(self._post(build_vllm_payload(list(prompts), max_tokens, stop), call_type), len(prompts))
+
+    # ─────────────────────────────
+    # 비동기 호출
+    # ─────────────────────────────
+    async def _apost(self, payload: Dict, call_type: str) -> Dict:
+        self._check_breaker()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.async_client.post(self.api_url, json=payload, timeout=self.timeout(call_type))
+                response.raise_for_status()
+                self.breaker.record_success()
+                return response.json()
+            except httpx.HTTPError as e:
+                if not self._should_retry(e, attempt):
+                    raise VLLMError(str(e)) from e
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+    async def acomplete(self, prompt: str, max_tokens=256, stop=None, call_type="default") -> str:
+        return extract_vllm_text(await self._apost(build_vllm_payload(prompt, max_tokens, stop), call_type))
+
+    async def acomplete_batch(self, prompts: List[str], max_tokens=256, stop=None, call_type="default") -> List[str]:
+        if not prompts:
+            return []
+        result = await self._apost(build_vllm_payload(list(prompts), max_tokens, stop), call_type)
+        return extract_vllm_texts(result, len(prompts))
+
+    async def astream(self, prompt: str, max_tokens=256, stop=None, call_type="default"):
+        """stream: true 응답을 토큰 단위로 전달 (첫 토큰 전까지만 재시도)"""
+        payload = build_vllm_payload(prompt, max_tokens, stop)
+        payload["stream"] = True
+        self._check_breaker()
+        for attempt in range(self.max_retries + 1):
+            started = False
+            stripper, reasoning = ThinkStripper(), ReasoningStripper()
+            try:
+                async with self.async_client.stream(
+                    "POST", self.api_url, json=payload, timeout=self.timeout(call_type)
+                ) as response:
+                    response.raise_for_status()
+                    self.breaker.record_success()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        choices = json.loads(data).get("choices", [])
+                        if not choices:
+                            continue
+                        text = reasoning.feed(stripper.feed(choices[0].get("text", "")))
+                        if text:
+                            started = True
+                            yield text
+
+                tail = reasoning.feed(stripper.flush()) + reasoning.flush()
+                if tail:
+                    yield tail
+                return
+            except httpx.HTTPError as e:
+                if started or not self._should_retry(e, attempt):
+                    raise VLLMError(str(e)) from e
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+
+vllm_client = VLLMClient()
+
+
+async def close_vllm_client():
+    await vllm_client.aclose()
+
+
+# ✅ 1️⃣-4 vLLM API 호출 함수 (실패 시 안내 문자열 반환, 호출 유형별 소요 시간 기록: llm_<call_type>)
+def log_vllm_failure(event: str, call_type: str, error: Exception):
+    logger.warning(f"{event} " + format_fields(call_type=call_type, error=str(error)))
+
+
+def call_vllm(prompt, max_tokens=256, stop=None, call_type="default"):
     try:
-        # 🔹 요청 JSON 구성
-        payload = {
-            "model": MODEL_ID,
-            "prompt": prompt.strip(),
-            "max_tokens": max_tokens,
-            "temperature": 0.4,
-        }
-        if stop:
-            payload["stop"] = stop
-
-        response = requests.post(
-            VLLM_API_URL,
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=60
-        )
-
-        response.raise_for_status()
-        result = response.json()
-
-        # 🔹 LLM 응답 추출
-        choices = result.get("choices", [])
-        if choices and "text" in choices[0]:
-            text = choices[0].get("text", "").strip()
-            # ✅ think / system / reasoning 필터링
-            text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
-            text = re.sub(r"(?i)(reasoning|analysis|step[- ]?by[- ]?step).*", "", text)
-            return text.strip()
-
-        return "[⚠️ LLM 응답에 텍스트 없음]"
-
-    except requests.RequestException as e:
-        print(f"[❌ vLLM 호출 실패]: {e}")
-        return "[❌ LLM 서버 연결 실패]"
+        with stage(f"llm_{call_type}"):
+            return vllm_client.complete(prompt, max_tokens, stop, call_type)
+    except VLLMError as e:
+        log_vllm_failure("vllm_call_failed", call_type, e)
+        return LLM_CONNECTION_FAILED
+
+
+async def async_call_vllm(prompt, max_tokens=256, stop=None, call_type="default"):
+    try:
+        with stage(f"llm_{call_type}"):
+            return await vllm_client.acomplete(prompt, max_tokens, stop, call_type)
+    except VLLMError as e:
+        log_vllm_failure("vllm_call_failed", call_type, e)
+        return LLM_CONNECTION_FAILED
+
+
+async def async_call_vllm_batch(prompts, max_tokens=256, stop=None, call_type="default"):
+    try:
+        with stage(f"llm_{call_type}"):
+            return await vllm_client.acomplete_batch(prompts, max_tokens, stop, call_type)
+    except VLLMError as e:
+        log_vllm_failure("vllm_batch_failed", call_type, e)
+        return [LLM_CONNECTION_FAILED] * len(prompts)
+
+
+async def async_stream_vllm(prompt, max_tokens=256, stop=None, call_type="default"):
+    start = time.perf_counter()
+    first_token = True
+    try:
+        async for text in vllm_client.astream(prompt, max_tokens, stop, call_type):
+            if first_token:
+                record_stage(f"llm_{call_type}_first_token", time.perf_counter() - start)
+                first_token = False
+            yield text
+    except VLLMError as e:
+        log_vllm_failure("vllm_stream_failed", call_type, e)
+        yield LLM_CONNECTION_FAILED
+    finally:
+        record_stage(f"llm_{call_type}", time.perf_counter() - start)
+
 
 # ✅ 2️⃣ 문서 검색용 키워드 생성 함수
-def call_vllm_generate_search_condition(user_question):
-    prompt = f"""
+def build_search_condition_prompt(user_question):
+    return f"""
 너는 한국어 문서를 검색하기 위한 키워드 생성 전문가야.
 다음 규칙을 철저히 지켜서 쉼표(,)로 구분된 핵심 단어만 출력해.
 설명, 문장, 불릿, <think> 같은 내부 문장은 절대 쓰면 안 돼.
@@ -81,7 +454,14 @@ def call_vllm_generate_search_condition(user_question):
 
 키워드:
 """
-    return call_vllm(prompt, max_tokens=64, stop=["\n"])
+
+
+def call_vllm_generate_search_condition(user_question):
+    return call_vllm(build_search_condition_prompt(user_question), max_tokens=64, stop=["\n"], call_type="keywords")
+
+
+async def async_call_vllm_generate_search_condition(user_question):
+    return await async_call_vllm(build_search_condition_prompt(user_question), max_tokens=64, stop=["\n"], call_type="keywords")
 
 
 # ✅ 3️⃣ 키워드 후처리
@@ -98,9 +478,8 @@ def clean_llm_keywords(raw_text: str) -> list:
     return [kw.strip() for kw in cleaned.split(",") if kw.strip()]
 
 # ✅ 4️⃣ 기사 요약 함수
-def call_vllm_summarize_article(article_text, user_question=None):
-    cleaned_text = clean_article_text(article_text)
-
+def summary_precheck(cleaned_text):
+    """요약할 필요가 없는 본문이면 "내용없음", 아니면 None"""
     # ✅ 1️⃣ 내용 유효성 검사 (파일명/확장자/너무 짧은 본문 등)
     if not cleaned_text.strip():
         return "내용없음"
@@ -108,9 +487,12 @@ def call_vllm_summarize_article(article_text, user_question=None):
         return "내용없음"
     if len(cleaned_text) < 30:  # 본문이 너무 짧은 경우 (예: 파일명 리스트 등)
         return "내용없음"
+    return None
+
 
+def build_summary_prompt(cleaned_text):
     # ✅ 2️⃣ 요약 프롬프트
-    prompt = f"""
+    return f"""
 다음은 기술 문서 또는 기록표입니다.
 핵심 내용을 3문장 이내로 간결하게 정리하세요.
 
@@ -123,10 +505,59 @@ def call_vllm_summarize_article(article_text, user_question=None):
 [본문]
 {cleaned_text}
 """
-    raw_summary = call_vllm(prompt, max_tokens=512)
+
+
+def call_vllm_summarize_article(article_text, user_question=None):
+    cleaned_text = clean_article_text(article_text)
+    skipped = summary_precheck(cleaned_text)
+    if skipped:
+        return skipped
+
+    raw_summary = call_vllm(build_summary_prompt(cleaned_text), max_tokens=512, call_type="summary")
     return clean_sentences_preserve_meaning(raw_summary)
 
 
+# ✅ 4️⃣-2 검색 결과 기반 답변 생성
+def build_answer_prompt(user_question, hits):
+    doc_lines = "\n".join(
+        f"- {hit.get('파일명', '')} ({hit.get('날짜', '')})" for hit in hits
+    ) or "- (검색된 문서 없음)"
+    return f"""
+{SYSTEM_PROMPT}
+다음은 사용자의 질문과 검색된 관련 문서 목록입니다.
+문서 목록을 근거로 질문에 대해 3~5문장으로 안내하세요.
+문서가 없으면 관련 문서를 찾지 못했다고 답하세요.
+
+[질문]
+{user_question}
+
+[검색된 문서]
+{doc_lines}
+
+답변:
+"""
+
+
+def call_vllm_answer(user_question, hits):
+    raw_answer = call_vllm(build_answer_prompt(user_question, hits), max_tokens=512, call_type="answer")
+    return clean_sentences_preserve_meaning(raw_answer)
+
+
+async def async_call_vllm_answer(user_question, hits):
+    raw_answer = await async_call_vllm(build_answer_prompt(user_question, hits), max_tokens=512, call_type="answer")
+    return clean_sentences_preserve_meaning(raw_answer)
+
+
+async def async_stream_vllm_answer(user_question, hits):
+    async for text in async_stream_vllm(build_answer_prompt(user_question, hits), max_tokens=512, call_type="answer"):
+        yield text
+
+
+def clean_streamed_answer(chunks: List[str]) -> str:
+    # 🔹 스트리밍 토큰을 모은 최종 답변 (비스트리밍 답변과 같은 정제 → 캐시 / 기록 일치)
+    return clean_sentences_preserve_meaning(clean_completion_text("".join(chunks)))
+
+
 # ✅ 5️⃣ 문장 정제
 def clean_sentences_preserve_meaning(text: str) -> str:
     text = re.sub(r"<[^>]+>", "", text)